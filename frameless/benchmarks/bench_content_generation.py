@@ -0,0 +1,89 @@
+"""Benchmark the latency of content generation against the local fake API,
+fetching the parts one after another and concurrently, with and without
+keep-alive connections.
+
+The fake API is served by uvicorn in a background thread, so each request goes
+through a real TCP connection. Run it from the project root, the fake API is
+imported from the tests folder:
+
+    PYTHONPATH=.:tests python benchmarks/bench_content_generation.py --contents 20 --latency 0.1
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import threading
+import time
+import uvicorn
+from fake_generator_server import create_fake_app
+from frameless.app.generators.base import CAPTION_COUNT
+from frameless.app.generators.openai import OpenAIContentGenerator
+from frameless.app.schemas.content import ContentGenerate
+
+
+async def generate_sequentially(generator: OpenAIContentGenerator,
+                                request: ContentGenerate) -> None:
+    """Fetch the parts one after another, the way the old client would."""
+    await generator.generate_title(request)
+    await generator.generate_text(request)
+    for i in range(1, CAPTION_COUNT + 1):
+        await generator.generate_caption(request, i)
+
+
+async def generate_concurrently(generator: OpenAIContentGenerator,
+                                request: ContentGenerate) -> None:
+    await generator.generate(request)
+
+
+def serve(latency: float) -> str:
+    """Serve the fake API in a background thread.
+
+    Returns:
+        str: the base URL of the fake API.
+    """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    config = uvicorn.Config(create_fake_app(latency=latency), port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+async def run(api_url: str, generate, keepalive: bool, contents: int) -> dict:
+    """Generate `contents` contents one after another.
+
+    Returns:
+        dict: p50 and p95 latency of a content, in milliseconds.
+    """
+    generator = OpenAIContentGenerator(api_url=api_url,
+                                       max_keepalive_connections=10 if keepalive else 0)
+    request = ContentGenerate(theme="adventure", owner_id=1)
+    latencies = []
+    for _ in range(contents):
+        start = time.perf_counter()
+        await generate(generator, request)
+        latencies.append(time.perf_counter() - start)
+    await generator.aclose()
+    quantiles = statistics.quantiles(latencies, n=20)
+    return dict(p50=quantiles[9] * 1000, p95=quantiles[18] * 1000)
+
+
+async def main(contents: int, latency: float) -> None:
+    api_url = serve(latency)
+    for name, generate, keepalive in (("sequential, no keep-alive", generate_sequentially, False),
+                                      ("sequential, pooled", generate_sequentially, True),
+                                      ("concurrent, pooled", generate_concurrently, True)):
+        result = await run(api_url, generate, keepalive, contents)
+        print(f"{name:<26} p50 {result['p50']:8.1f}ms  p95 {result['p95']:8.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contents", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.1,
+                        help="seconds the fake API takes per completion")
+    args = parser.parse_args()
+    asyncio.run(main(args.contents, args.latency))
@@ -0,0 +1,69 @@
+"""Benchmark the peak RSS of parallel image uploads read into memory at once and
+streamed to disk in chunks.
+
+Each mode runs in its own process, since the peak RSS of a process never goes
+down. Run it from the project root:
+
+    PYTHONPATH=. python benchmarks/bench_image_upload.py --uploads 8 --size-mb 50
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess  # nosec
+import sys
+import tempfile
+import aiofiles
+from fastapi import UploadFile
+from frameless.app.utils.uploads import save_upload
+
+
+async def read_all(file: UploadFile, path: str) -> None:
+    """Save the upload the old way, holding the whole content in memory."""
+    async with aiofiles.open(path, "wb") as f:
+        content = await file.read()
+        await f.write(content)
+
+
+async def stream(file: UploadFile, path: str) -> None:
+    """Save the upload chunk by chunk."""
+    await save_upload(file, path)
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of the current process in MB (ru_maxrss is in KB on linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run(mode: str, uploads: int, size_mb: int) -> None:
+    handler = read_all if mode == "read-all" else stream
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # the uploads are backed by files on disk, as starlette spools large
+        # request bodies to a temporary file
+        files = []
+        for i in range(uploads):
+            f = tempfile.TemporaryFile(dir=tmp_dir)
+            for _ in range(size_mb):
+                f.write(os.urandom(1024 * 1024))
+            f.seek(0)
+            files.append(UploadFile(file=f, filename=f"{i}.png"))
+        baseline = peak_rss_mb()
+        await asyncio.gather(*(handler(f, os.path.join(tmp_dir, f"out{i}.png"))
+                               for i, f in enumerate(files)))
+        print(f"{mode:<10} peak RSS {peak_rss_mb():8.1f}MB "
+              f"(+{peak_rss_mb() - baseline:.1f}MB for {uploads} x {size_mb}MB uploads)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--mode", choices=["read-all", "stream"])
+    args = parser.parse_args()
+    if args.mode:
+        asyncio.run(run(args.mode, args.uploads, args.size_mb))
+    else:
+        for mode in ("read-all", "stream"):
+            subprocess.run([sys.executable, __file__, "--mode", mode,  # nosec
+                            "--uploads", str(args.uploads), "--size-mb", str(args.size_mb)],
+                           check=True)
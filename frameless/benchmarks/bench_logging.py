@@ -0,0 +1,74 @@
+"""Benchmark the throughput of the log formatters on request log records, the
+formatters compiled once per level against the former ones building a new
+logging.Formatter, and styling the message, for every record.
+
+Only the formatting is measured, the records are not written. Run it from the
+project root:
+
+    PYTHONPATH=. python benchmarks/bench_logging.py --records 100000
+"""
+import argparse
+import copy
+import logging
+import time
+import click
+from frameless.app.utils.logging import (ColorFormatter, StandardFormatter, request_msg_format,
+                                         status_code_colors)
+
+
+class FormerStandardFormatter(StandardFormatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return logging.Formatter(self.build_msg_format(record)).format(record)
+
+
+class FormerColorFormatter(ColorFormatter):
+    @staticmethod
+    def format_request_msg(msg: str, host: str, port: int, method_path: str, status: str,
+                           process_time: float) -> str:
+        method_path = click.style(method_path, bold=True)
+        status = status_code_colors[int(status.split(" ")[0]) // 100](status)
+        return msg % (host, port, method_path, status, process_time)
+
+    def format(self, record: logging.LogRecord) -> str:
+        if record.msg == request_msg_format:
+            record.msg = self.format_request_msg(record.msg, *record.args)
+            record.args = ()
+        return logging.Formatter(self.build_msg_format(record)).format(record)
+
+
+def request_records(count: int) -> list:
+    statuses = ["200 OK", "201 Created", "304 Not Modified", "404 Not Found",
+                "500 Internal Server Error"]
+    return [logging.LogRecord("frameless", logging.INFO, __file__, 1, request_msg_format,
+                              ("127.0.0.1", 50000, "GET /api/v1/version HTTP/1.1",
+                               statuses[i % len(statuses)], 0.42), None)
+            for i in range(count)]
+
+
+def run(formatter: logging.Formatter, records: list) -> float:
+    """Format the records, copies since the color formatters modify them.
+
+    Returns:
+        float: the records formatted per second.
+    """
+    records = [copy.copy(record) for record in records]
+    start = time.perf_counter()
+    for record in records:
+        formatter.format(record)
+    return len(records) / (time.perf_counter() - start)
+
+
+def main(args: argparse.Namespace) -> None:
+    records = request_records(args.records)
+    for name, former, current in (
+            ("StandardFormatter", FormerStandardFormatter(), StandardFormatter()),
+            ("ColorFormatter", FormerColorFormatter(), ColorFormatter())):
+        former_rate, current_rate = run(former, records), run(current, records)
+        print(f"{name:<18} former {former_rate:10.0f} records/s   "
+              f"compiled {current_rate:10.0f} records/s   x{current_rate / former_rate:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    main(parser.parse_args())
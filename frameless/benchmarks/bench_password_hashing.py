@@ -0,0 +1,69 @@
+"""Benchmark a burst of logins verifying bcrypt hashes inline on the event loop
+and in the bounded worker pool.
+
+While the logins run, a ticker coroutine stands in for the other endpoints and
+measures how late the event loop wakes it up. Run it from the project root:
+
+    PYTHONPATH=. python benchmarks/bench_password_hashing.py --logins 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from frameless.app.utils.hashing import PasswordHasher, hash_password, verify_password
+
+
+async def inline_verify(plain_password: str, hashed_password: str) -> bool:
+    """Verify the password the old way, blocking the event loop."""
+    return verify_password(plain_password, hashed_password)
+
+
+async def ticker(stop: asyncio.Event, lags: list, interval: float = 0.005) -> None:
+    """Record how late the event loop schedules a periodic coroutine."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run(verify, logins: int, hashed_password: str) -> dict:
+    """Run a burst of `logins` concurrent password verifications.
+
+    Returns:
+        dict: p99 login latency and max event loop lag, in milliseconds.
+    """
+    stop, lags, latencies = asyncio.Event(), [], []
+
+    async def login():
+        # all logins arrive at once, the latency includes the time spent waiting
+        await verify("dummy_password", hashed_password)
+        latencies.append(time.perf_counter() - start)
+
+    ticker_task = asyncio.create_task(ticker(stop, lags))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    stop.set()
+    await ticker_task
+    p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+    return dict(p99=p99 * 1000, max_lag=max(lags, default=0) * 1000)
+
+
+async def main(args: argparse.Namespace) -> None:
+    hashed_password = hash_password("dummy_password")
+    hasher = PasswordHasher(executor_type=args.executor, workers=args.workers,
+                            max_concurrency=args.workers)
+    for name, verify in (("inline", inline_verify), ("worker pool", hasher.verify)):
+        result = await run(verify, args.logins, hashed_password)
+        print(f"{name:<12} login p99 {result['p99']:8.1f}ms   "
+              f"max event loop lag {result['max_lag']:8.1f}ms")
+    print(f"pool stats: {hasher.stats()}")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    asyncio.run(main(parser.parse_args()))
@@ -1,14 +1,15 @@
 """Authentication endpoints."""
+import time
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from ..db.session import get_db
 from ..schemas.user import UserResponse
-from ..services.user_service import UserService
-from ..configs.base import get_settings
+from ..services.user_service import UserService, get_token_cache
+from ..configs import get_settings
 
 auth_router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -28,8 +29,20 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserResponse:
-    """Get current authenticated user."""
+async def get_current_user(token: str = Depends(oauth2_scheme),
+                           db: AsyncSession = Depends(get_db)) -> UserResponse:
+    """Get current authenticated user.
+
+    The decoded claims and the user of a valid token are cached, so repeated
+    requests with the same token don't hit the database. The cache is per
+    worker process, see get_token_cache.
+    """
+    token_cache = get_token_cache()
+    cached = token_cache.get(token)
+    if cached is not None:
+        _, user_response = cached
+        return user_response
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -50,16 +63,22 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     if user is None:
         raise credentials_exception
     
-    return UserResponse.from_orm(user)
+    user_response = UserResponse.from_orm(user)
+    expires_in = payload["exp"] - time.time() if "exp" in payload else None
+    token_cache.set(token, (payload, user_response), tags=(user.id,),
+                    ttl=None if expires_in is None else min(expires_in, token_cache.ttl))
+    return user_response
 
 
 @auth_router.post("/token")
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)) -> Any:
+async def login(form_data: OAuth2PasswordRequestForm = Depends(),
+                db: AsyncSession = Depends(get_db)) -> Any:
     """Login endpoint to get access token."""
     user_service = UserService(db)
     user = await user_service.get_user_by_username(form_data.username)
     
-    if not user or not user_service.verify_password(form_data.password, user.hashed_password):
+    if not user or not await user_service.verify_password(form_data.password,
+                                                          user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
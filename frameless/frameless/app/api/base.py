@@ -1,7 +1,10 @@
-"""Endpoints for getting version information."""
-from typing import Any
+"""Endpoints for getting version information and the state of the service."""
+import os
+from typing import Any, Dict
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
+from ..db.pool import pool_stats
+from ..db.session import get_async_engine, get_replica_set
 from ..schemas.base import VersionResponse
 from ..version import __version__
 
@@ -33,3 +36,14 @@ async def version() -> Any:
         VersionResponse: A json response containing the version number.
     """
     return VersionResponse(version=__version__)
+
+
+@base_router.get("/db/pool", response_model=Dict[str, Any])
+async def get_pool_stats() -> Any:
+    """Get the usage of the connection pool of the worker answering, e.g. to
+    size SQLALCHEMY_POOL_SIZE by the number of workers. The pid tells the
+    workers apart, the pools of the read replicas are listed by replicas."""
+    replicas = get_replica_set()
+    return dict(pid=os.getpid(), **pool_stats(get_async_engine().pool),
+                replicas=[dict(pool_stats(engine.pool), healthy=replicas.is_healthy(engine))
+                          for engine in replicas.engines] if replicas is not None else [])
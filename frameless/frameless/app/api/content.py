@@ -1,59 +1,186 @@
 """Content management endpoints."""
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import asyncio
+from typing import AsyncIterator, Dict, List, Any
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import conlist
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from ..db.session import get_db
 from ..db.models.contents import GeneratedContent
-from ..schemas.content import ContentCreate, ContentResponse, ContentUpdate, ContentGenerate
+from ..generators import get_generation_cache, get_generation_flights
+from ..schemas.content import (ContentCreate, ContentResponse, ContentUpdate, ContentGenerate,
+                               ContentJobCreate, ContentJobResponse)
+from ..services.content_job_service import ContentJobService, get_content_job_queue
 from ..services.content_service import ContentService
+from ..constants import BULK_CREATE_MAX_ITEMS, NEXT_CURSOR_HEADER
+from ..utils.errors import GenerationError, InvalidCursorError
+from ..utils.http_cache import compute_etag, not_modified
+from ..utils.pagination import next_cursor
+from ..utils.sse import SSE_HEADERS, format_sse
 
 content_router = APIRouter()
 
 
 @content_router.post("/content/generate", response_model=ContentResponse, status_code=status.HTTP_201_CREATED)
-async def generate_content(content_request: ContentGenerate, db: Session = Depends(get_db)) -> Any:
+async def generate_content(content_request: ContentGenerate,
+                           db: AsyncSession = Depends(get_db)) -> Any:
     """Generate new content using AI."""
     content_service = ContentService(db)
-    return await content_service.generate_content(content_request)
+    try:
+        return await content_service.generate_content(content_request)
+    except GenerationError:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY,
+                            detail="Content generation failed")
+
+
+@content_router.post("/content/generate/stream", response_class=StreamingResponse)
+async def stream_generated_content(content_request: ContentGenerate,
+                                   db: AsyncSession = Depends(get_db)) -> Any:
+    """Generate new content using AI, streamed as server-sent events.
+
+    The `title`, `content` and `caption` events are sent as soon as the parts
+    are generated, the last event is `done` with the created content, or
+    `error` if the generation failed.
+    """
+    return StreamingResponse(_stream_events(db.bind, content_request),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+async def _stream_events(bind: AsyncEngine,
+                         content_request: ContentGenerate) -> AsyncIterator[str]:
+    # the stream uses its own session, since the session of the request is
+    # closed once the response is sent, maybe before the stream is consumed
+    async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+        try:
+            async for event, data in ContentService(db).stream_content(content_request):
+                if event == "done":
+                    data = jsonable_encoder(ContentResponse.from_orm(data))
+                yield format_sse(event, data)
+        except GenerationError:
+            yield format_sse("error", dict(detail="Content generation failed"))
+
+
+@content_router.get("/content/generate/stats", response_model=Dict[str, Any])
+async def get_generation_stats() -> Any:
+    """Get the hit and miss counters of the cache of generated contents, and
+    the number of generations shared by identical concurrent requests."""
+    cache = get_generation_cache()
+    return dict(cache=cache.stats() if cache is not None else None,
+                coalescing=get_generation_flights().stats())
+
+
+@content_router.post("/content/generate/jobs", response_model=ContentJobResponse,
+                     status_code=status.HTTP_202_ACCEPTED)
+async def create_content_job(job_request: ContentJobCreate, request: Request, response: Response,
+                             db: AsyncSession = Depends(get_db)) -> Any:
+    """Queue a content generation job and return right away.
+
+    Poll the job at the URL in the Location header, or pass a `webhook_url` to
+    get the job posted once it is done or failed.
+    """
+    job_queue = get_content_job_queue()
+    if job_queue.full():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Too many queued jobs")
+    job_service = ContentJobService(db)
+    job = await job_service.create_job(job_request)
+    try:
+        job_queue.put(db.bind, job.id)
+    except asyncio.QueueFull:
+        # filled up while the job was recorded, it is not accepted
+        await job_service.fail_job(job.id, "Too many queued jobs")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Too many queued jobs")
+    response.headers["Location"] = str(request.url_for("get_content_job", job_id=job.id))
+    return job
+
+
+@content_router.get("/content/jobs/{job_id}", response_model=ContentJobResponse)
+async def get_content_job(job_id: str, db: AsyncSession = Depends(get_db)) -> Any:
+    """Get content generation job by ID."""
+    job_service = ContentJobService(db)
+    job = await job_service.get_job_by_id(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
 @content_router.post("/content", response_model=ContentResponse, status_code=status.HTTP_201_CREATED)
-async def create_content(content: ContentCreate, db: Session = Depends(get_db)) -> Any:
+async def create_content(content: ContentCreate, db: AsyncSession = Depends(get_db)) -> Any:
     """Create new content manually."""
     content_service = ContentService(db)
     return await content_service.create_content(content)
 
 
+@content_router.post("/content/bulk", response_model=List[ContentResponse],
+                     status_code=status.HTTP_201_CREATED)
+async def create_contents(
+    contents: conlist(ContentCreate, min_items=1, max_items=BULK_CREATE_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Create a batch of contents manually, all or none of them are created."""
+    content_service = ContentService(db)
+    try:
+        return await content_service.create_contents(contents)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Invalid contents")
+
+
 @content_router.get("/content/{content_id}", response_model=ContentResponse)
-async def get_content(content_id: int, db: Session = Depends(get_db)) -> Any:
-    """Get content by ID."""
+async def get_content(content_id: int, request: Request, response: Response,
+                      db: AsyncSession = Depends(get_db)) -> Any:
+    """Get content by ID.
+
+    Answers 304 if the If-None-Match header matches the ETag of the content.
+    """
     content_service = ContentService(db)
     content = await content_service.get_content_by_id(content_id)
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
-    return content
+    etag = compute_etag(ContentResponse, [content])
+    return not_modified(request, response, etag, public=content.is_public) or content
 
 
 @content_router.get("/content", response_model=List[ContentResponse])
 async def list_content(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     theme: str = None,
     is_public: bool = None,
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
-    """List content with optional filtering."""
+    """List content with optional filtering.
+
+    The cursor of the next page is returned in the X-Next-Cursor header, pass it
+    as `cursor` to continue right after the current page. Answers 304 if the
+    If-None-Match header matches the ETag of the page.
+    """
     content_service = ContentService(db)
-    return await content_service.get_content(
-        skip=skip, 
-        limit=limit, 
-        theme=theme, 
-        is_public=is_public
-    )
+    try:
+        contents = await content_service.get_content(
+            skip=skip,
+            limit=limit,
+            theme=theme,
+            is_public=is_public,
+            cursor=cursor
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    cursor = next_cursor(contents, limit, "created_at", "id")
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    etag = compute_etag(ContentResponse, contents)
+    return not_modified(request, response, etag, public=is_public is True) or contents
 
 
 @content_router.put("/content/{content_id}", response_model=ContentResponse)
-async def update_content(content_id: int, content_update: ContentUpdate, db: Session = Depends(get_db)) -> Any:
+async def update_content(content_id: int, content_update: ContentUpdate,
+                         db: AsyncSession = Depends(get_db)) -> Any:
     """Update content."""
     content_service = ContentService(db)
     content = await content_service.update_content(content_id, content_update)
@@ -63,7 +190,7 @@ async def update_content(content_id: int, content_update: ContentUpdate, db: Ses
 
 
 @content_router.delete("/content/{content_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_content(content_id: int, db: Session = Depends(get_db)) -> Any:
+async def delete_content(content_id: int, db: AsyncSession = Depends(get_db)) -> None:
     """Delete content."""
     content_service = ContentService(db)
     success = await content_service.delete_content(content_id)
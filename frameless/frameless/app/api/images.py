@@ -1,11 +1,22 @@
 """Image management endpoints."""
 from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import (APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status,
+                     UploadFile, File)
+from fastapi.responses import RedirectResponse
+from pydantic import conlist
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..db.session import get_db
 from ..db.models.image import Image
-from ..schemas.image import ImageResponse, ImageCreate
+from ..configs import get_settings
+from ..schemas.image import (ImageResponse, ImageCreate, ImageUploadComplete, ImageUploadCreate,
+                             ImageUploadResponse)
 from ..services.image_service import ImageService
+from ..constants import BULK_CREATE_MAX_ITEMS, NEXT_CURSOR_HEADER
+from ..utils.errors import (DirectUploadsNotSupportedError, InvalidCursorError,
+                            UploadNotFoundError, UploadTooLargeError)
+from ..utils.http_cache import compute_etag, not_modified
+from ..utils.pagination import next_cursor
 
 images_router = APIRouter()
 
@@ -16,50 +27,141 @@ async def upload_image(
     description: str = None,
     is_public: bool = False,
     owner_id: int = None,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks = None,
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
-    """Upload a new image."""
+    """Upload a new image, its downscaled variants are generated in the background."""
     image_service = ImageService(db)
-    return await image_service.upload_image(file, description, is_public, owner_id)
+    try:
+        return await image_service.upload_image(file, description, is_public, owner_id,
+                                                background_tasks=background_tasks)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Image too large")
+
+
+@images_router.post("/images/uploads", response_model=ImageUploadResponse)
+async def create_upload(upload: ImageUploadCreate, db: AsyncSession = Depends(get_db)) -> Any:
+    """Get the pre-signed request uploading an image file directly to the
+    storage, then record the image with POST /images/uploads/complete.
+
+    No upload URL is returned if the same content is stored already.
+    """
+    if upload.size > get_settings().IMAGE_UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Image too large")
+    image_service = ImageService(db)
+    try:
+        path, upload_url, headers = await image_service.create_upload(
+            upload.filename, upload.content_type, upload.size, upload.sha256)
+    except DirectUploadsNotSupportedError:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                            detail="Direct uploads are not supported by the storage")
+    return ImageUploadResponse(path=path, upload_url=upload_url, headers=headers)
+
+
+@images_router.post("/images/uploads/complete", response_model=ImageResponse,
+                    status_code=status.HTTP_201_CREATED)
+async def complete_upload(upload: ImageUploadComplete, background_tasks: BackgroundTasks = None,
+                          db: AsyncSession = Depends(get_db)) -> Any:
+    """Record the image of a file uploaded directly to the storage, its
+    downscaled variants are generated in the background."""
+    image_service = ImageService(db)
+    try:
+        return await image_service.complete_upload(
+            upload.filename, upload.sha256, upload.description, upload.is_public,
+            upload.owner_id, background_tasks=background_tasks)
+    except DirectUploadsNotSupportedError:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                            detail="Direct uploads are not supported by the storage")
+    except UploadNotFoundError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload not found")
 
 
 @images_router.post("/images", response_model=ImageResponse, status_code=status.HTTP_201_CREATED)
-async def create_image(image: ImageCreate, db: Session = Depends(get_db)) -> Any:
+async def create_image(image: ImageCreate, db: AsyncSession = Depends(get_db)) -> Any:
     """Create image record with URL."""
     image_service = ImageService(db)
     return await image_service.create_image(image)
 
 
+@images_router.post("/images/bulk", response_model=List[ImageResponse],
+                    status_code=status.HTTP_201_CREATED)
+async def create_images(images: conlist(ImageCreate, min_items=1, max_items=BULK_CREATE_MAX_ITEMS),
+                        db: AsyncSession = Depends(get_db)) -> Any:
+    """Create a batch of image records with URL, all or none of them are created."""
+    image_service = ImageService(db)
+    try:
+        return await image_service.create_images(images)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Invalid images")
+
+
 @images_router.get("/images/{image_id}", response_model=ImageResponse)
-async def get_image(image_id: int, db: Session = Depends(get_db)) -> Any:
-    """Get image by ID."""
+async def get_image(image_id: int, request: Request, response: Response,
+                    db: AsyncSession = Depends(get_db)) -> Any:
+    """Get image by ID.
+
+    Answers 304 if the If-None-Match header matches the ETag of the image,
+    which changes once its variants are generated.
+    """
     image_service = ImageService(db)
     image = await image_service.get_image_by_id(image_id)
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
-    return image
+    etag = compute_etag(ImageResponse, [image])
+    return not_modified(request, response, etag, public=image.is_public) or image
+
+
+@images_router.get("/images/{image_id}/download", response_class=RedirectResponse,
+                   status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+async def download_image(image_id: int, db: AsyncSession = Depends(get_db)) -> Any:
+    """Redirect to the file of an image, with a pre-signed URL if the storage
+    supports it, so the file is downloaded from the storage directly."""
+    image_service = ImageService(db)
+    image = await image_service.get_image_by_id(image_id)
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return RedirectResponse(await image_service.get_download_url(image))
 
 
 @images_router.get("/images", response_model=List[ImageResponse])
 async def list_images(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     is_public: bool = None,
     owner_id: int = None,
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
-    """List images with optional filtering."""
+    """List images with optional filtering.
+
+    The cursor of the next page is returned in the X-Next-Cursor header, pass it
+    as `cursor` to continue right after the current page. Answers 304 if the
+    If-None-Match header matches the ETag of the page.
+    """
     image_service = ImageService(db)
-    return await image_service.get_images(
-        skip=skip, 
-        limit=limit, 
-        is_public=is_public,
-        owner_id=owner_id
-    )
+    try:
+        images = await image_service.get_images(
+            skip=skip,
+            limit=limit,
+            is_public=is_public,
+            owner_id=owner_id,
+            cursor=cursor
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    cursor = next_cursor(images, limit, "created_at", "id")
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    etag = compute_etag(ImageResponse, images)
+    return not_modified(request, response, etag, public=is_public is True) or images
 
 
 @images_router.delete("/images/{image_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_image(image_id: int, db: Session = Depends(get_db)) -> Any:
+async def delete_image(image_id: int, db: AsyncSession = Depends(get_db)) -> None:
     """Delete image."""
     image_service = ImageService(db)
     success = await image_service.delete_image(image_id)
@@ -1,41 +1,80 @@
 """User management endpoints."""
 from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from pydantic import conlist
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..db.session import get_db
 from ..db.models.user import User
 from ..schemas.user import UserCreate, UserResponse, UserUpdate
 from ..services.user_service import UserService
+from ..constants import BULK_CREATE_MAX_ITEMS, NEXT_CURSOR_HEADER
+from ..utils.errors import InvalidCursorError
+from ..utils.http_cache import compute_etag, not_modified
+from ..utils.pagination import next_cursor
 
 users_router = APIRouter()
 
 
 @users_router.post("/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)) -> Any:
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)) -> Any:
     """Create a new user."""
     user_service = UserService(db)
     return await user_service.create_user(user)
 
 
+@users_router.post("/users/bulk", response_model=List[UserResponse],
+                   status_code=status.HTTP_201_CREATED)
+async def create_users(users: conlist(UserCreate, min_items=1, max_items=BULK_CREATE_MAX_ITEMS),
+                       db: AsyncSession = Depends(get_db)) -> Any:
+    """Create a batch of users, all or none of them are created."""
+    for field in ("username", "email"):
+        if len({getattr(user, field) for user in users}) < len(users):
+            raise HTTPException(status_code=422, detail=f"Duplicate {field} in the batch")
+    user_service = UserService(db)
+    try:
+        return await user_service.create_users(users)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Users conflict with existing users")
+
+
 @users_router.get("/users/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: Session = Depends(get_db)) -> Any:
-    """Get user by ID."""
+async def get_user(user_id: int, request: Request, response: Response,
+                   db: AsyncSession = Depends(get_db)) -> Any:
+    """Get user by ID.
+
+    Answers 304 if the If-None-Match header matches the ETag of the user.
+    """
     user_service = UserService(db)
     user = await user_service.get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return not_modified(request, response, compute_etag(UserResponse, [user])) or user
 
 
 @users_router.get("/users", response_model=List[UserResponse])
-async def list_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)) -> Any:
-    """List all users."""
+async def list_users(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                     cursor: str = None, db: AsyncSession = Depends(get_db)) -> Any:
+    """List all users.
+
+    The cursor of the next page is returned in the X-Next-Cursor header, pass it
+    as `cursor` to continue right after the current page. Answers 304 if the
+    If-None-Match header matches the ETag of the page.
+    """
     user_service = UserService(db)
-    return await user_service.get_users(skip=skip, limit=limit)
+    try:
+        users = await user_service.get_users(skip=skip, limit=limit, cursor=cursor)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    cursor = next_cursor(users, limit, "id")
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    return not_modified(request, response, compute_etag(UserResponse, users)) or users
 
 
 @users_router.put("/users/{user_id}", response_model=UserResponse)
-async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)) -> Any:
+async def update_user(user_id: int, user_update: UserUpdate,
+                      db: AsyncSession = Depends(get_db)) -> Any:
     """Update user information."""
     user_service = UserService(db)
     user = await user_service.update_user(user_id, user_update)
@@ -45,7 +84,7 @@ async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depen
 
 
 @users_router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user(user_id: int, db: Session = Depends(get_db)) -> Any:
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)) -> None:
     """Delete a user."""
     user_service = UserService(db)
     success = await user_service.delete_user(user_id)
@@ -1,26 +1,27 @@
 """Module containing FastAPI instance related functions and classes."""
 # mypy: ignore-errors
 import logging.config
+from pathlib import Path
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 from .api import api_router
 from .configs import get_settings
-from .db import Base, engine
+from .constants import IMAGE_UPLOAD_DIR, IMAGE_UPLOAD_URL, MULTIPART_OVERHEAD_BYTES
 from .events import startup_handler, shutdown_handler
-from .middlewares import log_time
+from .middlewares import BodySizeLimitMiddleware, TimingMiddleware
+from .utils.logging import queue_stream_handlers
+from .utils.static import MediaFiles
 from .version import __version__
 
-
-def create_db_tables():
-    """Create all tables in database."""
-    Base.metadata.create_all(engine)
+STATIC_DIR = Path(__file__).resolve().parents[1] / "static"
 
 
 def create_application() -> FastAPI:
     """Create a FastAPI instance.
 
+    It runs no DDL, the database is migrated once before the workers start,
+    see scripts/prestart.sh.
+
     Returns:
         object of FastAPI: the fastapi application instance.
     """
@@ -45,20 +46,31 @@ def create_application() -> FastAPI:
     # add defined routers
     application.include_router(api_router, prefix=settings.API_STR)
 
-    # Mount static files
-    application.mount("/static", StaticFiles(directory="frameless/static"), name="static")
+    # Mount static files and the uploaded images, the upload directory is
+    # created by the first upload. Uploads of private images must not be
+    # stored by shared caches
+    application.mount("/static", MediaFiles(directory=STATIC_DIR), name="static")
+    application.mount(IMAGE_UPLOAD_URL, MediaFiles(directory=IMAGE_UPLOAD_DIR, check_dir=False,
+                                                   public=False),
+                      name="uploads")
 
     # event handler
     application.add_event_handler("startup", startup_handler)
     application.add_event_handler("shutdown", shutdown_handler)
 
     # load logging config
-    logging.config.dictConfig(settings.LOGGING_CONFIG)
-
-    # add defined middleware functions
-    application.add_middleware(BaseHTTPMiddleware, dispatch=log_time)
+    logging_config = settings.LOGGING_CONFIG
+    if settings.LOG_QUEUE_ENABLED:
+        logging_config = queue_stream_handlers(logging_config, settings.LOG_QUEUE_SIZE,
+                                               settings.LOG_QUEUE_BATCH_SIZE)
+    logging.config.dictConfig(logging_config)
 
-    # create tables in db
-    create_db_tables()
+    # add defined middlewares, the last one added runs first
+    upload_max_bytes = settings.IMAGE_UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES
+    application.add_middleware(BodySizeLimitMiddleware, max_sizes={
+        f"{settings.API_STR}/images/images/upload": upload_max_bytes})
+    application.add_middleware(TimingMiddleware,
+                               sample_rates=settings.LOG_REQUEST_SAMPLE_RATES,
+                               default_sample_rate=settings.LOG_REQUEST_SAMPLE_RATE)
 
     return application
@@ -33,3 +33,14 @@ def get_settings():
     elif mode_name == "TEST":
         return SettingsTest()
     return SettingsProd()
+
+
+def get_logger() -> logging.Logger:
+    """Get the project logger, named after PROJECT_SLUG of the current
+    settings. The settings are only loaded on the first call, not when the
+    calling module is imported.
+
+    Returns:
+        logging.Logger: the project logger.
+    """
+    return logging.getLogger(get_settings().PROJECT_SLUG)
@@ -5,3 +5,5 @@ from .base import Settings
 
 class SettingsDev(Settings):
     DEBUG = True
+    # records are written right away, in order with the output of the tools
+    LOG_QUEUE_ENABLED = False
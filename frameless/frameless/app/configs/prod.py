@@ -6,6 +6,8 @@ from .base import Settings, LoggingConfig
 
 class SettingsProd(Settings):
     DEBUG = False
+    # a slow log driver must not stall the requests
+    LOG_QUEUE_ENABLED = True
     LOGGING_CONFIG: LoggingConfig = {
         "version": 1,
         "disable_existing_loggers": False,
@@ -1 +1,29 @@
 """Module for defining constants centrally."""
+from enum import Enum
+
+# response header carrying the cursor of the next page of a list endpoint
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# directory the uploaded images and their variants are stored in by the local
+# storage, served under IMAGE_UPLOAD_URL
+IMAGE_UPLOAD_DIR = "uploads/images"
+IMAGE_UPLOAD_URL = "/uploads/images"
+# allowance for the boundaries and form fields of a multipart upload on top of
+# the size of the file, the file itself is checked while it is stored
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# cookie set by write requests, the reads of the client go to the primary
+# database while it is set instead of the read replicas
+READ_PRIMARY_COOKIE = "read_primary"
+
+# maximum number of rows of a bulk create request, larger loads are sent in
+# several batches
+BULK_CREATE_MAX_ITEMS = 1000
+
+
+class JobStatus(str, Enum):
+    """Status of a content generation job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
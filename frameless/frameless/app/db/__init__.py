@@ -1,2 +1,2 @@
 from .base import Base
-from .session import engine, session_scope
+from .session import get_engine, get_async_engine, dispose_engines, session_scope, get_db
@@ -0,0 +1,63 @@
+"""Alembic environment running the migrations against the app database."""
+# mypy: ignore-errors
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+try:
+    from frameless.app.configs import get_settings
+    from frameless.app.db.base import Base
+    from frameless.app.db import models  # noqa: F401, register all tables
+except ImportError:
+    # the app is deployed as top level package, see main.py
+    from app.configs import get_settings
+    from app.db.base import Base
+    from app.db import models  # noqa: F401, register all tables
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def get_url() -> str:
+    """Get the URI of the migrated database, sqlalchemy.url of the config
+    takes precedence over the settings."""
+    return config.get_main_option("sqlalchemy.url") or str(get_settings().SQLALCHEMY_DATABASE_URI)
+
+
+def run_migrations_offline() -> None:
+    """Emit the SQL of the migrations without connecting to the database."""
+    context.configure(url=get_url(), target_metadata=target_metadata, literal_binds=True,
+                      render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run the migrations on the connection given in the config attributes, or
+    on a new connection to the database."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_migrations(connection)
+        return
+    connectable = engine_from_config({"sqlalchemy.url": get_url()}, prefix="sqlalchemy.",
+                                     poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        _run_migrations(connection)
+
+
+def _run_migrations(connection) -> None:
+    # batch mode lets ALTER TABLE migrations run on SQLite too, a transaction
+    # per migration lets a migration commit early to build indexes concurrently
+    context.configure(connection=connection, target_metadata=target_metadata,
+                      render_as_batch=True, transaction_per_migration=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
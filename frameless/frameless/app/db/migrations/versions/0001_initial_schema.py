@@ -0,0 +1,74 @@
+"""initial schema
+
+The tables as created by `Base.metadata.create_all` before the migrations
+were introduced: users, images and generated_content.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 17:33:00.021119
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('password', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('password'),
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table(
+        'images',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('is_public', sa.Boolean(), nullable=True),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(),
+                  nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_images_id', 'images', ['id'])
+
+    op.create_table(
+        'generated_content',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('is_story', sa.Boolean(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('title', sa.Text(), nullable=False),
+        sa.Column('theme', sa.String(), nullable=False),
+        sa.Column('is_public', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('image_url_1', sa.String(), nullable=False),
+        sa.Column('image_url_2', sa.String(), nullable=False),
+        sa.Column('image_url_3', sa.String(), nullable=False),
+        sa.Column('caption_1', sa.String(), nullable=False),
+        sa.Column('caption_2', sa.String(), nullable=False),
+        sa.Column('caption_3', sa.String(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_generated_content_id', 'generated_content', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('generated_content')
+    op.drop_table('images')
+    op.drop_table('users')
@@ -0,0 +1,26 @@
+"""keyset pagination indexes
+
+(created_at, id) indexes on the sort key of the content and image lists.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 17:33:08.410372
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_images_created_at_id', 'images', ['created_at', 'id'])
+    op.create_index('ix_generated_content_created_at_id', 'generated_content',
+                    ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_generated_content_created_at_id', 'generated_content')
+    op.drop_index('ix_images_created_at_id', 'images')
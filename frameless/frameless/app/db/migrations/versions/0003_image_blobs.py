@@ -0,0 +1,41 @@
+"""image blobs
+
+Content-addressed files of the uploaded images, referenced by images.sha256.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 17:33:14.771904
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'image_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    # the images of existing databases were all created without hash
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.add_column(sa.Column('sha256', sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key('fk_images_sha256_image_blobs', 'image_blobs',
+                                    ['sha256'], ['sha256'])
+        batch_op.create_index('ix_images_sha256', ['sha256'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.drop_index('ix_images_sha256')
+        batch_op.drop_constraint('fk_images_sha256_image_blobs', type_='foreignkey')
+        batch_op.drop_column('sha256')
+    op.drop_table('image_blobs')
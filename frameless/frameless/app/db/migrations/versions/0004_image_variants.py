@@ -0,0 +1,36 @@
+"""image variants
+
+Downscaled variants of the image blobs, generated in the background.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 17:33:20.093517
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'image_variants',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=False),
+        sa.Column('height', sa.Integer(), nullable=False),
+        sa.Column('format', sa.String(length=8), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['sha256'], ['image_blobs.sha256']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sha256', 'width', 'format'),
+    )
+    op.create_index('ix_image_variants_sha256', 'image_variants', ['sha256'])
+
+
+def downgrade() -> None:
+    op.drop_table('image_variants')
@@ -0,0 +1,38 @@
+"""generation jobs
+
+Content generations running in the background, polled by their id.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 17:33:26.358240
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'generation_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('request', sa.JSON(), nullable=False),
+        sa.Column('webhook_url', sa.String(), nullable=True),
+        sa.Column('content_id', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['content_id'], ['generated_content.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_generation_jobs_status', 'generation_jobs', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_table('generation_jobs')
@@ -0,0 +1,48 @@
+"""query shape indexes
+
+Composite indexes matching the filters of the content and image lists, and
+partial indexes on the public rows, all ending with the (created_at, id) sort
+key of the keyset pagination.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 17:33:32.522152
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# the literal of the query filter, a bound parameter would not match the index
+is_public = sa.column('is_public') == sa.true()
+
+
+def upgrade() -> None:
+    # built without locking the tables against writes on postgres, which
+    # cannot happen inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_generated_content_theme_is_public_created_at_id',
+                        'generated_content', ['theme', 'is_public', 'created_at', 'id'],
+                        postgresql_concurrently=True)
+        op.create_index('ix_generated_content_public_created_at_id',
+                        'generated_content', ['created_at', 'id'],
+                        postgresql_where=is_public, sqlite_where=is_public,
+                        postgresql_concurrently=True)
+        op.create_index('ix_images_owner_id_is_public_created_at_id',
+                        'images', ['owner_id', 'is_public', 'created_at', 'id'],
+                        postgresql_concurrently=True)
+        op.create_index('ix_images_public_created_at_id',
+                        'images', ['created_at', 'id'],
+                        postgresql_where=is_public, sqlite_where=is_public,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_images_public_created_at_id', 'images')
+    op.drop_index('ix_images_owner_id_is_public_created_at_id', 'images')
+    op.drop_index('ix_generated_content_public_created_at_id', 'generated_content')
+    op.drop_index('ix_generated_content_theme_is_public_created_at_id', 'generated_content')
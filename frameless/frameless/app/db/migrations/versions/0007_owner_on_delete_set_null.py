@@ -0,0 +1,37 @@
+"""owner on delete set null
+
+The images and contents of a deleted user are kept without owner by the
+foreign keys themselves, so deleting a user is a single DELETE.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 21:12:40.518306
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# the owner_id foreign keys of 0001 are unnamed, name them the way postgres
+# does so the same name also drops them on sqlite
+naming_convention = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+tables = ('images', 'generated_content')
+
+
+def upgrade() -> None:
+    for table in tables:
+        with op.batch_alter_table(table, naming_convention=naming_convention) as batch_op:
+            batch_op.drop_constraint(f'{table}_owner_id_fkey', type_='foreignkey')
+            batch_op.create_foreign_key(f'{table}_owner_id_fkey', 'users',
+                                        ['owner_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    for table in tables:
+        with op.batch_alter_table(table, naming_convention=naming_convention) as batch_op:
+            batch_op.drop_constraint(f'{table}_owner_id_fkey', type_='foreignkey')
+            batch_op.create_foreign_key(f'{table}_owner_id_fkey', 'users',
+                                        ['owner_id'], ['id'])
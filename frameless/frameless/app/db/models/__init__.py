@@ -0,0 +1,4 @@
+from .user import User
+from .image import Image, ImageBlob, ImageVariant
+from .contents import GeneratedContent
+from .job import GenerationJob
@@ -1,5 +1,5 @@
-from app.db.base import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text
+from ..base import Base
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text, Index, true
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -19,5 +19,16 @@ class GeneratedContent(Base):
     caption_2 = Column(String, nullable=False)
     caption_3 = Column(String, nullable=False)
 
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
     owner = relationship("User", back_populates="generated_contents")
+
+    __table_args__ = (
+        # sort key of the keyset pagination
+        Index("ix_generated_content_created_at_id", "created_at", "id"),
+        # list filtered by theme and visibility, rows in the order of the sort key
+        Index("ix_generated_content_theme_is_public_created_at_id",
+              "theme", "is_public", "created_at", "id"),
+        # list of the public contents only, the private ones are not indexed
+        Index("ix_generated_content_public_created_at_id", "created_at", "id",
+              postgresql_where=is_public == true(), sqlite_where=is_public == true()),
+    )
@@ -1,6 +1,7 @@
 # frameless/app/db/models/image.py
-from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey,Boolean, Text
-from app.db.base import Base
+from sqlalchemy import (Column, Integer, String, DateTime, func, ForeignKey, Boolean, Text, Index,
+                        UniqueConstraint, true)
+from ..base import Base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -13,5 +14,52 @@ class Image(Base):
     url = Column(String, nullable=False)
     description = Column(Text, nullable =True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    owner_id= Column(Integer,ForeignKey("users.id"))
-    owner = relationship("User", back_populates="images")
\ No newline at end of file
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    owner = relationship("User", back_populates="images")
+    # content hash of uploaded images, None for images created from a URL
+    sha256 = Column(String(64), ForeignKey("image_blobs.sha256"), nullable=True, index=True)
+    # downscaled variants of the content, generated in the background
+    variants = relationship("ImageVariant",
+                            primaryjoin="foreign(ImageVariant.sha256) == Image.sha256",
+                            order_by="(ImageVariant.width, ImageVariant.format)",
+                            viewonly=True, lazy="selectin")
+
+    __table_args__ = (
+        # sort key of the keyset pagination
+        Index("ix_images_created_at_id", "created_at", "id"),
+        # list filtered by owner and visibility, rows in the order of the sort key
+        Index("ix_images_owner_id_is_public_created_at_id",
+              "owner_id", "is_public", "created_at", "id"),
+        # list of the public images only, the private ones are not indexed
+        Index("ix_images_public_created_at_id", "created_at", "id",
+              postgresql_where=is_public == true(), sqlite_where=is_public == true()),
+    )
+
+
+class ImageBlob(Base):
+    """Content-addressed file of uploaded images, shared by all the images
+    with the same content and removed once no image references it."""
+    __tablename__ = "image_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    # path relative to the upload directory
+    path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+
+
+class ImageVariant(Base):
+    """Downscaled variant of a content-addressed image file."""
+    __tablename__ = "image_variants"
+
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String(64), ForeignKey("image_blobs.sha256"), nullable=False, index=True)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    format = Column(String(8), nullable=False)
+    # path relative to the upload directory
+    path = Column(String, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("sha256", "width", "format"),
+    )
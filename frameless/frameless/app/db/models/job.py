@@ -0,0 +1,21 @@
+from ..base import Base
+from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, JSON, Text
+from datetime import datetime
+from ...constants import JobStatus
+
+
+class GenerationJob(Base):
+    """Content generation running in the background, polled by its id."""
+    __tablename__ = "generation_jobs"
+    # random hex uuid, job ids must not be guessable
+    id = Column(String(32), primary_key=True)
+    status = Column(String(16), nullable=False, default=JobStatus.QUEUED.value, index=True)
+    # the ContentGenerate payload of the job
+    request = Column(JSON, nullable=False)
+    webhook_url = Column(String, nullable=True)
+    content_id = Column(Integer, ForeignKey("generated_content.id", ondelete="SET NULL"),
+                        nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
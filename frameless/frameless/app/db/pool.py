@@ -0,0 +1,79 @@
+"""Connection pools recording how long the checkouts wait for a connection,
+reported with the sizes of the pool by `pool_stats`."""
+# mypy: ignore-errors
+import time
+from typing import Any, Dict
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+
+class TimedPoolMixin:
+    """Record the checkouts of the pool and the time they took, which covers
+    waiting for a free connection, opening a new one and the pre-ping, and
+    when a checkout last failed, e.g. because the database is down."""
+
+    # log under sqlalchemy like the stock pools, not under the project logger
+    _sqla_logger_namespace = "sqlalchemy.pool"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.failures = 0
+        self.failed_at = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failures += 1
+            self.failed_at = time.monotonic()
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    """QueuePool of the sync engines."""
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    """QueuePool of the async engines."""
+
+
+class TimedNullPool(TimedPoolMixin, NullPool):
+    """Pool opening a connection per checkout, e.g. when PgBouncer does the
+    pooling in front of the database."""
+
+
+def pool_stats(pool: Pool) -> Dict[str, Any]:
+    """Report the usage of a connection pool.
+
+    Args:
+        pool (Pool): the pool of an engine.
+
+    Returns:
+        dict: the pool class, for a queue pool its size, the idle and checked
+        out connections and the overflow connections currently open, for a
+        timed pool the number of checkouts, the checkouts timed out or failed
+        and the total, average and maximum time of a checkout in seconds.
+    """
+    stats = dict(pool=type(pool).__name__)
+    if isinstance(pool, QueuePool):
+        stats.update(size=pool.size(), checked_in=pool.checkedin(),
+                     checked_out=pool.checkedout(), overflow=max(pool.overflow(), 0))
+    if isinstance(pool, TimedPoolMixin):
+        avg_wait = pool.wait_seconds / pool.checkouts if pool.checkouts else 0.0
+        stats.update(checkouts=pool.checkouts, timeouts=pool.timeouts, failures=pool.failures,
+                     wait_seconds=pool.wait_seconds, avg_wait_seconds=avg_wait,
+                     max_wait_seconds=pool.max_wait_seconds)
+    return stats
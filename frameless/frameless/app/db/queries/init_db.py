@@ -1,17 +1,56 @@
-# app/db/queries/init_db.py
-from app.db.base import Base
+"""Apply the versioned database migrations.
 
-from app.db.models.user import User
-from app.db.models.image import Image
-from app.db.models.contents import GeneratedContent
-from app.db.session import engine
+It runs once before the app workers are started, see scripts/prestart.sh, the
+workers themselves never run any DDL:
 
+    python -m app.db.queries.init_db
+"""
+from pathlib import Path
+from typing import Optional
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from ..session import get_engine
 
-def create_tables():
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("✅ Tables created successfully!")
+ALEMBIC_INI = Path(__file__).resolve().parents[3] / "alembic.ini"
+# the revision of the tables created by create_all before the migrations
+BASELINE_REVISION = "0001"
+BASELINE_TABLES = {"users", "images", "generated_content"}
+
+
+def migrate_db(bind: Optional[Engine] = None, revision: str = "head") -> None:
+    """Upgrade the database to the given revision.
+
+    A database created by create_all before the migrations were introduced is
+    stamped with the baseline revision first, then upgraded. Any other
+    database with tables but no revision is left untouched.
+
+    Args:
+        bind (Optional[Engine]): the engine of the database, defaults to the
+            engine of the settings.
+        revision (str): the target revision.
+
+    Raises:
+        RuntimeError: if the database has no revision and its tables are not
+            the baseline ones.
+    """
+    config = Config(str(ALEMBIC_INI))
+    with (bind or get_engine()).connect() as connection:
+        config.attributes.update(connection=connection)
+        tables = set(inspect(connection).get_table_names())
+        # the migrations manage their own transactions
+        connection.commit()
+        if tables and "alembic_version" not in tables:
+            if tables != BASELINE_TABLES:
+                raise RuntimeError(
+                    f"The database has no revision and its tables {sorted(tables)} are not "
+                    f"the baseline ones, stamp it with its revision: alembic stamp <revision>")
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
 
 
 if __name__ == "__main__":
-    create_tables()
\ No newline at end of file
+    print("Migrating the database...")
+    migrate_db()
+    print("✅ Database migrated successfully!")
@@ -0,0 +1,88 @@
+"""Route the reads of a session to the read replicas and its writes to the
+primary database."""
+# mypy: ignore-errors
+import itertools
+import time
+from typing import List, Optional
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+# Session.info key, set when the reads of the session go to the primary
+READ_PRIMARY = "read_primary"
+
+
+class ReplicaSet:
+    """Round-robin over the engines of the read replicas.
+
+    A replica is skipped for `retry_seconds` after a connection to it failed,
+    see TimedPoolMixin, the next request to pick it again checks it is back.
+
+    Args:
+        engines (List[AsyncEngine]): the engines of the replicas.
+        retry_seconds (float): time a failed replica is skipped.
+    """
+
+    def __init__(self, engines: List[AsyncEngine], retry_seconds: float):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._next = itertools.count()
+
+    def is_healthy(self, engine: AsyncEngine) -> bool:
+        """Check that no connection to the replica failed recently."""
+        failed_at = getattr(engine.pool, "failed_at", None)
+        return failed_at is None or time.monotonic() - failed_at >= self.retry_seconds
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """Choose the next healthy replica.
+
+        Returns:
+            Optional[AsyncEngine]: the replica, None if all of them failed.
+        """
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._next) % len(self.engines)]
+            if self.is_healthy(engine):
+                return engine
+        return None
+
+
+class RoutingSession(Session):
+    """Session sending its writes to its bind, the primary, and its reads to
+    one replica chosen for the whole session.
+
+    Once the session writes, or if READ_PRIMARY is set in its info, it reads
+    from the primary as well, so it reads its own writes whatever the lag of
+    the replicas. If connecting to its replica fails, the session reads from
+    the primary instead, and the next sessions skip the replica, see
+    ReplicaSet.
+
+    Args:
+        replicas (ReplicaSet): the read replicas, None to use the primary only.
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info[READ_PRIMARY] = True
+        if self.replicas is None or self.info.get(READ_PRIMARY):
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        if "replica" not in self.info:
+            self.info["replica"] = self.replicas.choose()
+        if self.info["replica"] is None:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        return self.info["replica"].sync_engine
+
+    def _connection_for_bind(self, engine, execution_options=None, **kwargs):
+        try:
+            return super()._connection_for_bind(engine, execution_options, **kwargs)
+        except (exc.DBAPIError, OSError):
+            replica = self.info.get("replica")
+            if replica is None or engine is not replica.sync_engine:
+                raise
+        # retried once, the primary failing as well fails the read
+        self.info[READ_PRIMARY] = True
+        return super()._connection_for_bind(self.bind, execution_options, **kwargs)
@@ -1,14 +1,125 @@
 """Define a session instance for doing all database related operations inside
-the app."""
+the app.
+
+The engines are created on first use, not at import, so importing the app
+stays cheap and commands not touching the database never build a pool.
+"""
 # mypy: ignore-errors
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession, async_sessionmaker,
+                                    create_async_engine)
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi import Request, Response
 from ..configs import get_settings
+from ..constants import READ_PRIMARY_COOKIE
+from .pool import TimedAsyncAdaptedQueuePool, TimedNullPool, TimedQueuePool
+from .routing import READ_PRIMARY, ReplicaSet, RoutingSession
+
+
+def pool_options(is_async: bool = False) -> Dict[str, Any]:
+    """Get the pool arguments of an engine configured by the current settings.
+
+    Args:
+        is_async (bool): whether the options are used by an async engine.
+
+    Returns:
+        dict: keyword arguments of create_engine or create_async_engine.
+    """
+    settings = get_settings()
+    if settings.SQLALCHEMY_POOL_CLASS == "null":
+        return dict(poolclass=TimedNullPool)
+    return dict(poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+                pool_size=settings.SQLALCHEMY_POOL_SIZE,
+                max_overflow=settings.SQLALCHEMY_MAX_OVERFLOW,
+                pool_timeout=settings.SQLALCHEMY_POOL_TIMEOUT_SECONDS,
+                pool_recycle=settings.SQLALCHEMY_POOL_RECYCLE_SECONDS,
+                pool_pre_ping=settings.SQLALCHEMY_POOL_PRE_PING)
+
+
+@lru_cache()
+def get_engine() -> Engine:
+    """Get the sync engine, used by the migrations and scripts.
+
+    Returns:
+        Engine: the shared sync engine.
+    """
+    return create_engine(get_settings().SQLALCHEMY_DATABASE_URI, **pool_options())
+
+
+@lru_cache()
+def get_session_factory() -> sessionmaker:
+    """Get the factory of sync sessions bound to the sync engine.
+
+    Returns:
+        sessionmaker: the shared session factory.
+    """
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+@lru_cache()
+def get_async_engine() -> AsyncEngine:
+    """Get the async engine.
+
+    The services run inside the event loop, so they use the async engine to
+    avoid blocking it for the whole DB round-trip.
+
+    Returns:
+        AsyncEngine: the shared async engine.
+    """
+    return create_async_engine(get_settings().SQLALCHEMY_ASYNC_DATABASE_URI,
+                               **pool_options(is_async=True))
+
+
+@lru_cache()
+def get_replica_set() -> Optional[ReplicaSet]:
+    """Get the async engines of the read replicas.
+
+    Returns:
+        Optional[ReplicaSet]: the shared replicas, None if none is configured.
+    """
+    settings = get_settings()
+    if not settings.SQLALCHEMY_REPLICA_URIS:
+        return None
+    engines = [create_async_engine(uri, **pool_options(is_async=True))
+               for uri in settings.SQLALCHEMY_REPLICA_URIS]
+    return ReplicaSet(engines, retry_seconds=settings.SQLALCHEMY_REPLICA_RETRY_SECONDS)
+
+
+@lru_cache()
+def get_async_session_factory() -> async_sessionmaker:
+    """Get the factory of async sessions bound to the async engine.
+
+    Objects are not expired on commit, since an expired attribute would
+    trigger an implicit (sync) IO when being accessed outside of the session.
+    The sessions read from the replicas if any, see RoutingSession.
+
+    Returns:
+        async_sessionmaker: the shared async session factory.
+    """
+    return async_sessionmaker(bind=get_async_engine(), autoflush=False,
+                              expire_on_commit=False, sync_session_class=RoutingSession,
+                              replicas=get_replica_set())
+
 
-settings = get_settings()
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async def dispose_engines() -> None:
+    """Close the connection pools of the engines if they were created."""
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+        get_async_session_factory.cache_clear()
+        get_async_engine.cache_clear()
+    if get_replica_set.cache_info().currsize:
+        replicas = get_replica_set()
+        for engine in replicas.engines if replicas is not None else []:
+            await engine.dispose()
+        get_replica_set.cache_clear()
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+        get_session_factory.cache_clear()
+        get_engine.cache_clear()
 
 
 @contextmanager
@@ -24,7 +135,7 @@ def session_scope():
         ...    session.add(Table1(url="https://www.example.com"))
         ...    session.commit()
     """
-    session = SessionLocal()
+    session = get_session_factory()()
     try:
         yield session
         session.commit()
@@ -33,3 +144,32 @@ def session_scope():
         raise e
     finally:
         session.close()
+
+
+async def get_db(request: Request = None,
+                 response: Response = None) -> AsyncIterator[AsyncSession]:
+    """Dependency providing an async session for a single request.
+
+    With read replicas, a write request sets a cookie sending the reads of the
+    client to the primary for SQLALCHEMY_READ_PRIMARY_SECONDS, so it reads its
+    own writes.
+
+    Args:
+        request (Request): the request, given by FastAPI.
+        response (Response): the response, given by FastAPI.
+
+    Yields:
+        sqlalchemy.ext.asyncio.AsyncSession: A local async SQLAlchemy session.
+    """
+    async with get_async_session_factory()() as session:
+        if request is not None and get_replica_set() is not None:
+            if request.method not in ("GET", "HEAD", "OPTIONS"):
+                response.set_cookie(READ_PRIMARY_COOKIE, "1", httponly=True,
+                                    max_age=get_settings().SQLALCHEMY_READ_PRIMARY_SECONDS)
+            elif request.cookies.get(READ_PRIMARY_COOKIE):
+                session.info[READ_PRIMARY] = True
+        try:
+            yield session
+        except Exception as e:
+            await session.rollback()
+            raise e
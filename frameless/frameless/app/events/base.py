@@ -3,20 +3,41 @@
 Please be aware that you can define multiple events and add them to the FastAPI
 instance, and the adding order decides the executing order.
 """
-import logging
-from ..configs import get_settings
-
-settings = get_settings()
-logger = logging.getLogger(settings.PROJECT_SLUG)
+from sqlalchemy.exc import SQLAlchemyError
+from ..configs import get_logger
+from ..db.session import dispose_engines, get_async_engine
+from ..generators import close_content_generator
+from ..services.content_job_service import (close_webhook_client, get_content_job_queue,
+                                            recover_content_jobs)
+from ..services.image_variant_service import shutdown_image_process_pool
+from ..storage import close_storage
+from ..utils.hashing import get_password_hasher
 
 
 async def startup_handler() -> None:
-    """Dummy startup event, it will be executed before the app is ready, such
-    as loading ml model, creating superuser in DB etc."""
-    logger.info("Starting up ...")
+    """Startup event, it will be executed before the app is ready, such as
+    loading ml model, creating superuser in DB etc.
+
+    The shared resources are created on first use, the async engine is created
+    here so the first request does not pay for it. The content generation
+    jobs left behind by a restart are recovered, a worker still starts if the
+    database cannot be reached.
+    """
+    get_logger().info("Starting up ...")
+    try:
+        await recover_content_jobs(get_async_engine())
+    except (SQLAlchemyError, OSError) as e:
+        get_logger().warning("Recovering the content generation jobs failed: %s", e)
 
 
 async def shutdown_handler() -> None:
     """Dummy shutdown event, it will be executed before the app is shutting
     down, such as removing temporary files, close DB connection etc."""
-    logger.info("Shutting down ...")
+    get_logger().info("Shutting down ...")
+    get_password_hasher().shutdown()
+    shutdown_image_process_pool()
+    await get_content_job_queue().shutdown()
+    await close_webhook_client()
+    await close_content_generator()
+    await close_storage()
+    await dispose_engines()
@@ -0,0 +1,75 @@
+"""Content generator interface, provides a function `get_content_generator` to
+get the backend configured by the settings."""
+from functools import lru_cache
+from typing import Optional
+from ..configs import get_settings
+from ..utils.cache import SQLiteCache, TTLCache
+from ..utils.singleflight import SingleFlight
+from .base import ContentGenerator
+from .cache import GenerationCache
+from .openai import OpenAIContentGenerator
+from .placeholder import PlaceholderContentGenerator
+
+
+@lru_cache()
+def get_content_generator() -> ContentGenerator:
+    """Get the content generator backend configured by the current settings.
+
+    Returns:
+        ContentGenerator: the shared content generator instance.
+    """
+    settings = get_settings()
+    if settings.CONTENT_GENERATOR_BACKEND == "openai":
+        return OpenAIContentGenerator(
+            api_url=settings.CONTENT_GENERATOR_API_URL,
+            api_key=settings.CONTENT_GENERATOR_API_KEY,
+            model=settings.CONTENT_GENERATOR_MODEL,
+            timeout=settings.CONTENT_GENERATOR_TIMEOUT_SECONDS,
+            connect_timeout=settings.CONTENT_GENERATOR_CONNECT_TIMEOUT_SECONDS,
+            max_connections=settings.CONTENT_GENERATOR_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.CONTENT_GENERATOR_MAX_KEEPALIVE_CONNECTIONS,
+            max_retries=settings.CONTENT_GENERATOR_MAX_RETRIES,
+            retry_backoff=settings.CONTENT_GENERATOR_RETRY_BACKOFF_SECONDS,
+            max_concurrency=settings.CONTENT_GENERATOR_MAX_CONCURRENCY)
+    return PlaceholderContentGenerator()
+
+
+@lru_cache()
+def get_generation_cache() -> Optional[GenerationCache]:
+    """Get the cache of generated contents configured by the current settings.
+
+    Returns:
+        Optional[GenerationCache]: the shared cache, None if it is disabled.
+    """
+    settings = get_settings()
+    if not settings.CONTENT_CACHE_ENABLED:
+        return None
+    memory = TTLCache(maxsize=settings.CONTENT_CACHE_SIZE, ttl=settings.CONTENT_CACHE_TTL_SECONDS)
+    disk = None
+    if settings.CONTENT_CACHE_DISK_PATH:
+        disk = SQLiteCache(settings.CONTENT_CACHE_DISK_PATH,
+                           max_entries=settings.CONTENT_CACHE_DISK_MAX_ENTRIES,
+                           ttl=settings.CONTENT_CACHE_TTL_SECONDS)
+    return GenerationCache(memory, disk)
+
+
+@lru_cache()
+def get_generation_flights() -> SingleFlight:
+    """Get the generations in flight, shared by the identical requests.
+
+    Returns:
+        SingleFlight: the shared single flight instance.
+    """
+    return SingleFlight()
+
+
+async def close_content_generator() -> None:
+    """Close the content generator and its cache if they were created."""
+    if get_content_generator.cache_info().currsize:
+        await get_content_generator().aclose()
+        get_content_generator.cache_clear()
+    if get_generation_cache.cache_info().currsize:
+        cache = get_generation_cache()
+        if cache is not None:
+            cache.close()
+        get_generation_cache.cache_clear()
@@ -0,0 +1,63 @@
+"""Define the interface of the content generator backends."""
+import asyncio
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict
+from ..schemas.content import ContentGenerate
+
+# number of images, and thus captions, of a generated content
+CAPTION_COUNT = 3
+
+
+class ContentGenerator(ABC):
+    """Base class of the content generator backends.
+
+    A backend generates the single parts of a content, `generate` fetches all
+    of them concurrently, so generating a content takes about as long as the
+    slowest part instead of the sum of all parts.
+    """
+
+    # images are not generated yet, every content uses placeholder images
+    image_urls = tuple(f"https://via.placeholder.com/300x200?text=Image+{i}"
+                       for i in range(1, CAPTION_COUNT + 1))
+
+    async def generate(self, request: ContentGenerate) -> Dict[str, str]:
+        """Generate the title, the text and the captions of a content.
+
+        Args:
+            request (ContentGenerate): the generation request.
+
+        Returns:
+            dict: the generated fields of GeneratedContent.
+        """
+        title, content, *captions = await asyncio.gather(
+            self.generate_title(request),
+            self.generate_text(request),
+            *(self.generate_caption(request, i) for i in range(1, CAPTION_COUNT + 1)))
+        generated = dict(title=title, content=content)
+        for i, (image_url, caption) in enumerate(zip(self.image_urls, captions), start=1):
+            generated[f"image_url_{i}"] = image_url
+            generated[f"caption_{i}"] = caption
+        return generated
+
+    @abstractmethod
+    async def generate_title(self, request: ContentGenerate) -> str:
+        """Generate the title of a content."""
+
+    @abstractmethod
+    async def generate_text(self, request: ContentGenerate) -> str:
+        """Generate the story or text of a content."""
+
+    async def stream_text(self, request: ContentGenerate) -> AsyncIterator[str]:
+        """Generate the story or text of a content piece by piece.
+
+        Backends able to stream the text override it, by default the whole
+        text is yielded at once.
+        """
+        yield await self.generate_text(request)
+
+    @abstractmethod
+    async def generate_caption(self, request: ContentGenerate, index: int) -> str:
+        """Generate the caption of the image with the given 1-based index."""
+
+    async def aclose(self) -> None:
+        """Release the resources held by the backend, e.g. HTTP connections."""
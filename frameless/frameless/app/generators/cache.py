@@ -0,0 +1,71 @@
+"""Define the cache of generated contents, keyed on the normalized request."""
+import asyncio
+import hashlib
+import json
+from typing import Dict, Optional
+from ..schemas.content import ContentGenerate
+from ..utils.cache import SQLiteCache, TTLCache
+
+
+def normalize(text: Optional[str]) -> str:
+    """Normalize a text for the cache key: case and whitespace are ignored.
+
+    Examples:
+
+        >>> normalize("  Space   Pirates ")
+        'space pirates'
+    """
+    return " ".join((text or "").split()).casefold()
+
+
+def generation_cache_key(request: ContentGenerate) -> str:
+    """Hash the fields of the request the generated content depends on."""
+    key = json.dumps([normalize(request.theme), normalize(request.prompt), request.is_story])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class GenerationCache:
+    """Two tier cache of generated contents, an in-process LRU cache in front
+    of an optional SQLite cache shared by the workers on the host.
+
+    Args:
+        memory (TTLCache): the in-process tier.
+        disk (Optional[SQLiteCache]): the persistent tier.
+    """
+
+    def __init__(self, memory: TTLCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.bypasses = 0
+
+    async def get(self, request: ContentGenerate) -> Optional[Dict[str, str]]:
+        """Get the cached content generated for an equivalent request.
+
+        Returns:
+            Optional[dict]: the generated fields, None on a miss.
+        """
+        key = generation_cache_key(request)
+        generated = self.memory.get(key)
+        if generated is None and self.disk is not None:
+            generated = await asyncio.to_thread(self.disk.get, key)
+            if generated is not None:
+                self.memory.set(key, generated)
+        return generated
+
+    async def set(self, request: ContentGenerate, generated: Dict[str, str]) -> None:
+        """Cache the content generated for the request in both tiers."""
+        key = generation_cache_key(request)
+        self.memory.set(key, generated)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, generated)
+
+    def stats(self) -> Dict[str, Optional[Dict[str, int]]]:
+        """Report the usage of the tiers and the number of bypassed lookups."""
+        return dict(memory=self.memory.stats(),
+                    disk=self.disk.stats() if self.disk is not None else None,
+                    bypasses=self.bypasses)
+
+    def close(self) -> None:
+        """Close the persistent tier."""
+        if self.disk is not None:
+            self.disk.close()
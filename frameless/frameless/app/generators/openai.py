@@ -0,0 +1,211 @@
+"""Define the backend generating content with an OpenAI compatible chat API."""
+import asyncio
+import json
+import random
+import weakref
+from typing import AsyncIterator, Optional
+import httpx
+from ..schemas.content import ContentGenerate
+from ..utils.errors import GenerationError
+from .base import ContentGenerator
+
+# responses worth retrying: rate limited, or the API is temporarily unavailable
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class OpenAIContentGenerator(ContentGenerator):
+    """Generate content with the chat completions endpoint of an OpenAI
+    compatible API.
+
+    All requests share one pooled HTTP client keeping connections alive, at
+    most `max_concurrency` requests are sent at the same time. Failed requests
+    are retried with exponential backoff and full jitter.
+
+    Args:
+        api_url (str): base URL of the API, e.g. https://api.openai.com/v1.
+        api_key (Optional[str]): the bearer token of the API.
+        model (str): the model used for the completions.
+        timeout (float): timeout in seconds of reading and writing a request.
+        connect_timeout (float): timeout in seconds of opening a connection.
+        max_connections (int): maximum number of open connections.
+        max_keepalive_connections (int): maximum number of idle connections.
+        max_retries (int): number of retries of a failed request.
+        retry_backoff (float): base delay in seconds between retries.
+        max_concurrency (int): maximum number of requests sent at the same time.
+        transport (Optional[httpx.AsyncBaseTransport]): custom transport, e.g.
+            an ASGI transport serving an app in tests.
+    """
+
+    def __init__(self, api_url: str, api_key: Optional[str] = None,
+                 model: str = "gpt-3.5-turbo", timeout: float = 30.0,
+                 connect_timeout: float = 5.0, max_connections: int = 20,
+                 max_keepalive_connections: int = 10, max_retries: int = 3,
+                 retry_backoff: float = 0.5, max_concurrency: int = 10,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_concurrency = max_concurrency
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        # asyncio primitives are bound to a loop, keep one semaphore per loop
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.retries = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled HTTP client, created on first use."""
+        if self._client is None:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.AsyncClient(base_url=self.api_url, headers=headers,
+                                             timeout=self.timeout, limits=self.limits,
+                                             transport=self.transport)
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def complete(self, prompt: str, max_tokens: int = 256) -> str:
+        """Complete the given prompt.
+
+        Args:
+            prompt (str): the prompt sent as user message.
+            max_tokens (int): maximum number of generated tokens.
+
+        Returns:
+            str: the generated text.
+
+        Raises:
+            GenerationError, if the request still fails after all retries.
+        """
+        payload = dict(model=self.model, max_tokens=max_tokens,
+                       messages=[dict(role="user", content=prompt)])
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._get_semaphore():
+                    response = await self.client.post("/chat/completions", json=payload)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    break
+                error = f"HTTP {response.status_code}"
+            if attempt == self.max_retries:
+                raise GenerationError(f"Generation failed after {attempt + 1} attempts, {error}")
+            self.retries += 1
+            # the slot is given up while waiting, the delay doubles each retry
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2 ** attempt))
+
+        if response.is_error:
+            raise GenerationError(f"Generation failed, HTTP {response.status_code}")
+        try:
+            return response.json()["choices"][0]["message"]["content"].strip()
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise GenerationError("Generation failed, unexpected response")
+
+    async def stream_complete(self, prompt: str, max_tokens: int = 256) -> AsyncIterator[str]:
+        """Complete the given prompt, yielding the text as the API streams it.
+
+        The request is retried like in `complete` as long as nothing has been
+        yielded yet.
+
+        Args:
+            prompt (str): the prompt sent as user message.
+            max_tokens (int): maximum number of generated tokens.
+
+        Yields:
+            str: the pieces of the generated text.
+
+        Raises:
+            GenerationError, if the request still fails after all retries, or
+            if the stream breaks off.
+        """
+        payload = dict(model=self.model, max_tokens=max_tokens, stream=True,
+                       messages=[dict(role="user", content=prompt)])
+        for attempt in range(self.max_retries + 1):
+            streamed = False
+            try:
+                async with self._get_semaphore():
+                    async with self.client.stream("POST", "/chat/completions",
+                                                  json=payload) as response:
+                        if response.status_code not in RETRY_STATUS_CODES:
+                            if response.is_error:
+                                raise GenerationError(
+                                    f"Generation failed, HTTP {response.status_code}")
+                            async for line in response.aiter_lines():
+                                text = _parse_stream_line(line)
+                                if text is None:
+                                    return
+                                if text:
+                                    streamed = True
+                                    yield text
+                            return
+                        error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                if streamed:
+                    raise GenerationError(f"Generation failed, stream broken off, {e}")
+                error = f"{type(e).__name__}: {e}"
+            if attempt == self.max_retries:
+                raise GenerationError(f"Generation failed after {attempt + 1} attempts, {error}")
+            self.retries += 1
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2 ** attempt))
+
+    async def generate_title(self, request: ContentGenerate) -> str:
+        return await self.complete(
+            f"Write a short title for a {_kind(request)} about {request.theme}. "
+            f"{request.prompt or ''}".strip(), max_tokens=32)
+
+    async def generate_text(self, request: ContentGenerate) -> str:
+        return await self.complete(_text_prompt(request), max_tokens=1024)
+
+    async def stream_text(self, request: ContentGenerate) -> AsyncIterator[str]:
+        first = True
+        async for text in self.stream_complete(_text_prompt(request), max_tokens=1024):
+            if first:
+                # stripped like the completed text
+                text = text.lstrip()
+                first = not text
+            if text:
+                yield text
+
+    async def generate_caption(self, request: ContentGenerate, index: int) -> str:
+        return await self.complete(
+            f"Write a one sentence caption for illustration {index} of a "
+            f"{_kind(request)} about {request.theme}.", max_tokens=64)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _parse_stream_line(line: str) -> Optional[str]:
+    """Get the text of a line of a streamed completion, an empty string if the
+    line carries no text and None at the end of the stream."""
+    if not line.startswith("data:"):
+        return ""
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return None
+    try:
+        return json.loads(data)["choices"][0]["delta"].get("content") or ""
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        raise GenerationError("Generation failed, unexpected response")
+
+
+def _text_prompt(request: ContentGenerate) -> str:
+    return f"Write a {_kind(request)} about {request.theme}. {request.prompt or ''}".strip()
+
+
+def _kind(request: ContentGenerate) -> str:
+    return "short story" if request.is_story else "short text"
@@ -0,0 +1,24 @@
+"""Define the placeholder backend returning canned content without any API."""
+import re
+from typing import AsyncIterator
+from ..schemas.content import ContentGenerate
+from .base import ContentGenerator
+
+
+class PlaceholderContentGenerator(ContentGenerator):
+    """Generate canned content from the request, used when no API is set up."""
+
+    async def generate_title(self, request: ContentGenerate) -> str:
+        return f"Generated {request.theme} Story"
+
+    async def generate_text(self, request: ContentGenerate) -> str:
+        prompt = request.prompt or f"Create a {request.theme} story"
+        return f"This is a generated story about {request.theme}. {prompt}"
+
+    async def stream_text(self, request: ContentGenerate) -> AsyncIterator[str]:
+        # word by word, like the tokens of a streaming API
+        for word in re.findall(r"\S+\s*", await self.generate_text(request)):
+            yield word
+
+    async def generate_caption(self, request: ContentGenerate, index: int) -> str:
+        return f"Caption for {request.theme} image {index}"
@@ -1 +1,2 @@
-from .logging import log_time
+from .body_size import BodySizeLimitMiddleware
+from .logging import TimingMiddleware
@@ -0,0 +1,51 @@
+"""Define request body size related middlewares."""
+from typing import Dict
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """Pure ASGI middleware rejecting request bodies larger than the limit of
+    their path with 413, before they are parsed.
+
+    Starlette spools a multipart body to disk while parsing the form, before
+    the endpoint runs, so an endpoint checking the size of the uploaded file
+    only does so once the whole body was received. A body announcing a larger
+    Content-Length is rejected right away, a chunked body as soon as it
+    exceeds the limit.
+
+    Args:
+        app (ASGIApp): the wrapped application.
+        max_sizes (Dict[str, int]): maximum body size in bytes per path, the
+            bodies sent to other paths are not limited.
+    """
+
+    def __init__(self, app: ASGIApp, max_sizes: Dict[str, int]):
+        self.app = app
+        self.max_sizes = max_sizes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        max_size = self.max_sizes.get(scope["path"]) if scope["type"] == "http" else None
+        if max_size is None:
+            await self.app(scope, receive, send)
+            return
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > max_size:
+            response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_with_limit() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_size:
+                    # answered with 413 by the exception middleware of the app
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, receive_with_limit, send)
@@ -1,34 +1,65 @@
-"""Define logging related middleware functions."""
-import logging
+"""Define logging related middlewares."""
+import random
 import time
-from fastapi import Request, Response
-from typing import Callable
-from ..configs import get_settings
+from typing import Dict, Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..configs import get_logger
 from ..utils.logging import request_msg_format, get_request_msg_args
 
-settings = get_settings()
-logger = logging.getLogger(settings.PROJECT_SLUG)
 
+class TimingMiddleware:
+    """Pure ASGI middleware logging the processing time of the HTTP requests.
 
-async def log_time(request: Request, call_next: Callable) -> Response:
-    """Middleware function for logging the processing time of the request.
-
-    It's used as an example for showing people how to define middleware
-    functions and add them to the FastAPI instance.
+    Unlike a BaseHTTPMiddleware, it neither runs the endpoint in a separate
+    task nor wraps the response body in a stream, the messages of the app are
+    passed through as they are, streamed responses included. The status is
+    taken from the http.response.start message, the time covers the whole
+    response, body included.
 
     Args:
-        request (Request): incoming request to API service.
-        call_next (Callable): the corresponding endpoint function
-
-    Returns:
-        Response: a json response returned by the endpoint function.
+        app (ASGIApp): the wrapped application.
+        sample_rates (Optional[Dict[str, float]]): share of the requests logged
+            per path prefix, e.g. {"/api/v1/version": 0.01}, the longest
+            matching prefix applies.
+        default_sample_rate (float): share of the requests logged whose path
+            matches no prefix.
     """
-    start_time = time.time()
 
-    response = await call_next(request)
+    def __init__(self, app: ASGIApp, sample_rates: Optional[Dict[str, float]] = None,
+                 default_sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rates = sorted((sample_rates or {}).items(), key=lambda i: -len(i[0]))
+        self.default_sample_rate = default_sample_rate
+
+    def sample_rate(self, path: str) -> float:
+        """Get the share of the requests to the given path which are logged."""
+        for prefix, rate in self.sample_rates:
+            if path.startswith(prefix):
+                return rate
+        return self.default_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rate = self.sample_rate(scope["path"])
+        if rate < 1 and (rate <= 0 or random.random() >= rate):
+            await self.app(scope, receive, send)
+            return
+
+        # an app failing before it starts the response answers with 500
+        status_code = 500
 
-    process_time = (time.time() - start_time) * 1000
-    args = get_request_msg_args(request, response, process_time)
-    logger.info(request_msg_format, *args)
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
-    return response
+        start = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            process_time = (time.perf_counter_ns() - start) / 1e6
+            args = get_request_msg_args(scope, status_code, process_time)
+            get_logger().info(request_msg_format, *args)
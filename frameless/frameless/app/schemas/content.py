@@ -1,7 +1,9 @@
 """Content schemas for API requests and responses."""
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import AnyHttpUrl, BaseModel, Field, validator
 from datetime import datetime
+from ..constants import JobStatus
+from ..utils.urls import check_public_host
 
 
 class ContentBase(BaseModel):
@@ -31,6 +33,9 @@ class ContentGenerate(BaseModel):
     is_story: bool = True
     is_public: bool = False
     owner_id: int
+    # False skips the lookup in the cache of generated contents, the freshly
+    # generated content is cached nevertheless
+    use_cache: bool = True
 
 
 class ContentUpdate(BaseModel):
@@ -62,4 +67,31 @@ class ContentResponse(ContentBase):
     owner_id: int
 
     class Config:
-        from_attributes = True
+        orm_mode = True
+
+
+class ContentJobCreate(ContentGenerate):
+    """Schema for queueing a content generation job."""
+    # called with the job response once the job is done or failed
+    webhook_url: Optional[AnyHttpUrl] = None
+
+    @validator("webhook_url")
+    def check_webhook_url(cls, v: Optional[AnyHttpUrl]) -> Optional[AnyHttpUrl]:
+        # the host names are checked once resolved, before the webhook is called
+        if v is not None:
+            check_public_host(v.host)
+        return v
+
+
+class ContentJobResponse(BaseModel):
+    """Schema for content generation job response."""
+    id: str
+    status: JobStatus
+    content_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
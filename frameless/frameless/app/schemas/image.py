@@ -1,7 +1,12 @@
 """Image schemas for API requests and responses."""
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, conint, constr, validator
 from datetime import datetime
+from ..storage import get_storage
+
+# hex digest of the content of an uploaded file
+Sha256 = constr(regex=r"^[0-9a-f]{64}$")
+ImageMediaType = constr(regex=r"^image/")
 
 
 class ImageBase(BaseModel):
@@ -16,11 +21,56 @@ class ImageCreate(ImageBase):
     owner_id: int
 
 
+class ImageUploadCreate(BaseModel):
+    """Schema for requesting a direct upload of an image file."""
+    filename: str
+    content_type: ImageMediaType
+    size: conint(gt=0)
+    sha256: Sha256
+
+
+class ImageUploadResponse(BaseModel):
+    """Schema for the pre-signed request uploading an image file, without
+    URL if the same content is stored already."""
+    path: str
+    upload_url: Optional[str] = None
+    headers: Dict[str, str] = {}
+
+
+class ImageUploadComplete(BaseModel):
+    """Schema for recording the image of a file uploaded directly."""
+    filename: str
+    sha256: Sha256
+    description: Optional[str] = None
+    is_public: bool = False
+    owner_id: Optional[int] = None
+
+
+class ImageVariantResponse(BaseModel):
+    """Schema for a downscaled variant of an image, served by the storage at
+    the URL of its path."""
+    path: str = Field(..., exclude=True)
+    url: Optional[str] = None
+    width: int
+    height: int
+    format: str
+
+    @validator("url", always=True)
+    def build_url(cls, v: Optional[str], values: dict) -> Optional[str]:
+        if v is None and "path" in values:
+            return get_storage().url(values["path"])
+        return v
+
+    class Config:
+        orm_mode = True
+
+
 class ImageResponse(ImageBase):
     """Schema for image response."""
     id: int
     created_at: datetime
     owner_id: int
+    variants: List[ImageVariantResponse] = []
 
     class Config:
-        from_attributes = True
+        orm_mode = True
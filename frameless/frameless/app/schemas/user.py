@@ -27,4 +27,4 @@ class UserResponse(UserBase):
     is_active: bool = True
 
     class Config:
-        from_attributes = True
+        orm_mode = True
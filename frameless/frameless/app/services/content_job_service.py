@@ -0,0 +1,253 @@
+"""Content job service running content generation in the background."""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional
+import httpx
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from ..configs import get_logger, get_settings
+from ..constants import JobStatus
+from ..db.models.job import GenerationJob
+from ..schemas.content import ContentGenerate, ContentJobCreate, ContentJobResponse
+from ..utils.errors import UnsafeURLError
+from ..utils.urls import PublicAddressTransport
+from .content_service import ContentService
+
+
+class ContentJobService:
+    """Service class for content generation job operations."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_job(self, job_request: ContentJobCreate) -> GenerationJob:
+        """Record a queued job, it is run once it is put on the job queue."""
+        row = dict(
+            id=uuid.uuid4().hex,
+            status=JobStatus.QUEUED.value,
+            request=ContentGenerate(**job_request.dict()).dict(),
+            webhook_url=job_request.webhook_url,
+        )
+        db_job = await self.db.scalar(insert(GenerationJob).returning(GenerationJob), [row])
+        await self.db.commit()
+        return db_job
+
+    async def get_job_by_id(self, job_id: str) -> Optional[GenerationJob]:
+        """Get job by ID."""
+        return await self.db.get(GenerationJob, job_id)
+
+    async def get_queued_job_ids(self) -> List[str]:
+        """Get the ids of the queued jobs, oldest first."""
+        return list(await self.db.scalars(
+            select(GenerationJob.id).where(GenerationJob.status == JobStatus.QUEUED.value)
+            .order_by(GenerationJob.created_at)))
+
+    async def fail_job(self, job_id: str, error: str) -> Optional[GenerationJob]:
+        """Mark a job failed which is still queued, e.g. when it cannot be put
+        on the job queue."""
+        db_job = await self.db.scalar(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, GenerationJob.status == JobStatus.QUEUED.value)
+            .values(status=JobStatus.FAILED.value, error=error, finished_at=datetime.utcnow())
+            .returning(GenerationJob))
+        await self.db.commit()
+        return db_job
+
+    async def fail_stale_jobs(self, started_before: datetime, error: str) -> List[GenerationJob]:
+        """Mark the jobs failed which are running since before the given time,
+        they were interrupted by a restart."""
+        db_jobs = list(await self.db.scalars(
+            update(GenerationJob)
+            .where(GenerationJob.status == JobStatus.RUNNING.value,
+                   GenerationJob.started_at < started_before)
+            .values(status=JobStatus.FAILED.value, error=error, finished_at=datetime.utcnow())
+            .returning(GenerationJob)))
+        await self.db.commit()
+        return db_jobs
+
+    async def run_job(self, job_id: str) -> Optional[GenerationJob]:
+        """Generate the content of a queued job and record the outcome.
+
+        The job is claimed by a conditional UPDATE, a job queued by several
+        workers, e.g. after a restart, is only run once.
+        """
+        db_job = await self.db.scalar(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, GenerationJob.status == JobStatus.QUEUED.value)
+            .values(status=JobStatus.RUNNING.value, started_at=datetime.utcnow())
+            .returning(GenerationJob))
+        if db_job is None:
+            return None
+        await self.db.commit()
+
+        try:
+            content = await ContentService(self.db).generate_content(
+                ContentGenerate(**db_job.request))
+        except Exception as e:
+            await self.db.rollback()
+            await self.db.refresh(db_job)
+            get_logger().exception("Content generation job %s failed", job_id)
+            db_job.status = JobStatus.FAILED.value
+            db_job.error = str(e) or type(e).__name__
+        else:
+            db_job.status = JobStatus.DONE.value
+            db_job.content_id = content.id
+        db_job.finished_at = datetime.utcnow()
+        await self.db.commit()
+        return db_job
+
+
+async def run_content_job(bind: AsyncEngine, job_id: str) -> None:
+    """Run a content generation job and call its webhook.
+
+    It uses its own session, since the session of the request is closed once
+    the response is sent.
+    """
+    async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+        db_job = await ContentJobService(db).run_job(job_id)
+    if db_job is not None and db_job.webhook_url:
+        await call_webhook(db_job)
+
+
+async def recover_content_jobs(bind: AsyncEngine) -> None:
+    """Recover the jobs left behind by a restart, run on start up.
+
+    The jobs still queued are put on the job queue again, or failed if it is
+    full. The jobs running for longer than CONTENT_JOB_STALE_SECONDS were
+    interrupted and are failed, their webhooks are called.
+    """
+    settings = get_settings()
+    job_queue = get_content_job_queue()
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.CONTENT_JOB_STALE_SECONDS)
+    async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+        job_service = ContentJobService(db)
+        failed = await job_service.fail_stale_jobs(stale_before, "Interrupted by a restart")
+        requeued = 0
+        for job_id in await job_service.get_queued_job_ids():
+            try:
+                job_queue.put(bind, job_id)
+                requeued += 1
+            except asyncio.QueueFull:
+                db_job = await job_service.fail_job(job_id, "Too many queued jobs")
+                if db_job is not None:
+                    failed.append(db_job)
+    if requeued or failed:
+        get_logger().info("Recovered content generation jobs: %d queued again, %d failed",
+                          requeued, len(failed))
+    await asyncio.gather(*(call_webhook(db_job) for db_job in failed if db_job.webhook_url))
+
+
+@lru_cache()
+def get_webhook_client() -> httpx.AsyncClient:
+    """Get the pooled HTTP client calling the webhooks of the jobs, which only
+    connects to public addresses, see PublicAddressTransport.
+
+    Returns:
+        httpx.AsyncClient: the shared webhook client.
+    """
+    return httpx.AsyncClient(timeout=get_settings().CONTENT_JOB_WEBHOOK_TIMEOUT_SECONDS,
+                             transport=PublicAddressTransport())
+
+
+async def close_webhook_client() -> None:
+    """Close the webhook client if it was created."""
+    if get_webhook_client.cache_info().currsize:
+        await get_webhook_client().aclose()
+        get_webhook_client.cache_clear()
+
+
+async def call_webhook(db_job: GenerationJob) -> None:
+    """Post the job response to the webhook of the job, failures are only logged.
+
+    The webhook is not called if its host resolves to a non public address.
+    """
+    payload = ContentJobResponse.from_orm(db_job)
+    try:
+        response = await get_webhook_client().post(
+            db_job.webhook_url, content=payload.json(),
+            headers={"Content-Type": "application/json"})
+        response.raise_for_status()
+    except UnsafeURLError as e:
+        get_logger().warning("Webhook of content generation job %s refused: %s", db_job.id, e)
+    except httpx.HTTPError as e:
+        get_logger().warning("Webhook of content generation job %s failed: %s", db_job.id, e)
+
+
+class ContentJobQueue:
+    """Bounded in-process queue of content generation jobs, worked off by a
+    fixed number of worker tasks.
+
+    The workers are started on the first `put` in the running event loop, so
+    the generation calls never hold the connection of the queueing request.
+
+    Args:
+        workers (int): number of jobs run at the same time.
+        maxsize (int): maximum number of waiting jobs.
+    """
+
+    def __init__(self, workers: int = 4, maxsize: int = 1000):
+        self.workers = workers
+        self.maxsize = maxsize
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _start(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # asyncio primitives are bound to a loop, start over in a new loop
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._tasks = [loop.create_task(self._work(self._queue)) for _ in range(self.workers)]
+        return self._queue
+
+    def full(self) -> bool:
+        """Whether no further job can be queued right now."""
+        return self._queue is not None and self._loop is asyncio.get_running_loop() \
+            and self._queue.full()
+
+    def put(self, bind: AsyncEngine, job_id: str) -> None:
+        """Queue the job with the given id.
+
+        Raises:
+            asyncio.QueueFull, if the queue is full.
+        """
+        self._start().put_nowait((bind, job_id))
+
+    async def join(self) -> None:
+        """Wait until all the queued jobs are done."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        while True:
+            bind, job_id = await queue.get()
+            try:
+                await run_content_job(bind, job_id)
+            except Exception:
+                get_logger().exception("Content generation job %s crashed", job_id)
+            finally:
+                queue.task_done()
+
+    async def shutdown(self) -> None:
+        """Cancel the workers, jobs still queued stay queued in the DB and are
+        queued again on the next start up."""
+        if self._loop is asyncio.get_running_loop():
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._loop, self._queue, self._tasks = None, None, []
+
+
+@lru_cache()
+def get_content_job_queue() -> ContentJobQueue:
+    """Get the content job queue configured by the current settings.
+
+    Returns:
+        ContentJobQueue: the shared job queue instance.
+    """
+    settings = get_settings()
+    return ContentJobQueue(workers=settings.CONTENT_JOB_WORKERS,
+                           maxsize=settings.CONTENT_JOB_QUEUE_SIZE)
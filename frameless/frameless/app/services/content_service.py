@@ -1,47 +1,112 @@
 """Content service for business logic."""
-from typing import List, Optional
-from sqlalchemy.orm import Session
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import delete, false, insert, select, true, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..db.models.contents import GeneratedContent
+from ..generators import (ContentGenerator, get_content_generator, get_generation_cache,
+                          get_generation_flights)
+from ..generators.base import CAPTION_COUNT
+from ..generators.cache import GenerationCache, generation_cache_key
 from ..schemas.content import ContentCreate, ContentUpdate, ContentGenerate
-import requests
-import os
-import uuid
+from ..utils.pagination import paginate
+from ..utils.singleflight import SingleFlight
 
 
 class ContentService:
     """Service class for content operations."""
     
-    def __init__(self, db: Session):
+    sort_key = (GeneratedContent.created_at, GeneratedContent.id)
+    
+    def __init__(self, db: AsyncSession, generator: ContentGenerator = None,
+                 cache: GenerationCache = None, flights: SingleFlight = None):
         self.db = db
+        self.generator = generator or get_content_generator()
+        self.cache = cache or get_generation_cache()
+        self.flights = flights or get_generation_flights()
     
     async def create_content(self, content: ContentCreate) -> GeneratedContent:
-        """Create content manually."""
-        db_content = GeneratedContent(
-            title=content.title,
-            content=content.content,
-            theme=content.theme,
-            is_story=content.is_story,
-            is_public=content.is_public,
-            image_url_1=content.image_url_1,
-            image_url_2=content.image_url_2,
-            image_url_3=content.image_url_3,
-            caption_1=content.caption_1,
-            caption_2=content.caption_2,
-            caption_3=content.caption_3,
-            owner_id=content.owner_id
-        )
-        
-        self.db.add(db_content)
-        self.db.commit()
-        self.db.refresh(db_content)
+        """Create content manually, with a single INSERT ... RETURNING."""
+        db_content = await self.db.scalar(insert(GeneratedContent).returning(GeneratedContent),
+                                          [content.dict()])
+        await self.db.commit()
         return db_content
     
+    async def create_contents(self, contents: List[ContentCreate]) -> List[GeneratedContent]:
+        """Create contents manually in one transaction, with a single multi-row
+        INSERT ... RETURNING.
+
+        Raises:
+            IntegrityError: if a row violates a constraint, e.g. an unknown owner.
+        """
+        try:
+            result = await self.db.scalars(
+                insert(GeneratedContent).returning(GeneratedContent, sort_by_parameter_order=True),
+                [content.dict() for content in contents])
+            db_contents = list(result)
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+        return db_contents
+    
     async def generate_content(self, content_request: ContentGenerate) -> GeneratedContent:
-        """Generate content using AI."""
-        # Generate content using OpenAI API (placeholder implementation)
-        generated_content = await self._call_openai_api(content_request)
+        """Generate content using AI.
+
+        Equivalent requests reuse the cached generated content, or join the
+        generation in flight of an equivalent request, only the new record is
+        inserted then.
+
+        Raises:
+            GenerationError, if the generator backend fails.
+        """
+        generated_content = await self._generate(content_request)
+        return await self._add_generated(content_request, generated_content)
+    
+    async def stream_content(self, content_request: ContentGenerate
+                             ) -> AsyncIterator[Tuple[str, Any]]:
+        """Generate content using AI, yielding the parts as soon as they are
+        generated, the content is inserted once all parts are done.
+
+        The text is streamed by the backend, the title and the captions are
+        generated meanwhile. A cached content is replayed right away, but the
+        stream never joins the generation in flight of an equivalent request.
+
+        Yields:
+            tuple: the event name and its data, `title` with the title,
+            `content` with each piece of the text, `caption` with the index,
+            the image URL and the caption of an image, and at last `done` with
+            the inserted GeneratedContent.
+
+        Raises:
+            GenerationError, if the generator backend fails.
+        """
+        generated_content = None
+        if self.cache is not None:
+            if content_request.use_cache:
+                generated_content = await self.cache.get(content_request)
+            else:
+                self.cache.bypasses += 1
+        
+        if generated_content is None:
+            generated_content = {}
+            async for event in self._stream_uncached(content_request, generated_content):
+                yield event
+            if self.cache is not None:
+                await self.cache.set(content_request, generated_content)
+        else:
+            yield "title", dict(title=generated_content["title"])
+            yield "content", dict(content=generated_content["content"])
+            for i in range(1, CAPTION_COUNT + 1):
+                yield "caption", dict(index=i, image_url=generated_content[f"image_url_{i}"],
+                                      caption=generated_content[f"caption_{i}"])
         
-        db_content = GeneratedContent(
+        yield "done", await self._add_generated(content_request, generated_content)
+    
+    async def _add_generated(self, content_request: ContentGenerate,
+                             generated_content: dict) -> GeneratedContent:
+        row = dict(
             title=generated_content["title"],
             content=generated_content["content"],
             theme=content_request.theme,
@@ -55,65 +120,114 @@ class ContentService:
             caption_3=generated_content["caption_3"],
             owner_id=content_request.owner_id
         )
-        
-        self.db.add(db_content)
-        self.db.commit()
-        self.db.refresh(db_content)
+        db_content = await self.db.scalar(insert(GeneratedContent).returning(GeneratedContent),
+                                          [row])
+        await self.db.commit()
         return db_content
     
+    async def _generate(self, content_request: ContentGenerate) -> dict:
+        if self.cache is not None:
+            if content_request.use_cache:
+                generated_content = await self.cache.get(content_request)
+                if generated_content is not None:
+                    return generated_content
+            else:
+                self.cache.bypasses += 1
+        return await self.flights.do(generation_cache_key(content_request),
+                                     lambda: self._generate_uncached(content_request))
+    
+    async def _generate_uncached(self, content_request: ContentGenerate) -> dict:
+        generated_content = await self.generator.generate(content_request)
+        if self.cache is not None:
+            await self.cache.set(content_request, generated_content)
+        return generated_content
+    
+    async def _stream_uncached(self, content_request: ContentGenerate,
+                               generated_content: dict) -> AsyncIterator[Tuple[str, Any]]:
+        # the parts put their events on the queue as soon as they are generated
+        events: asyncio.Queue = asyncio.Queue()
+        
+        async def title():
+            generated_content["title"] = await self.generator.generate_title(content_request)
+            events.put_nowait(("title", dict(title=generated_content["title"])))
+        
+        async def text():
+            pieces = []
+            async for piece in self.generator.stream_text(content_request):
+                pieces.append(piece)
+                events.put_nowait(("content", dict(content=piece)))
+            generated_content["content"] = "".join(pieces).strip()
+        
+        async def caption(index):
+            caption = await self.generator.generate_caption(content_request, index)
+            generated_content[f"image_url_{index}"] = self.generator.image_urls[index - 1]
+            generated_content[f"caption_{index}"] = caption
+            events.put_nowait(("caption", dict(index=index, caption=caption,
+                                               image_url=generated_content[f"image_url_{index}"])))
+        
+        tasks = [asyncio.ensure_future(part) for part in
+                 (title(), text(), *(caption(i) for i in range(1, CAPTION_COUNT + 1)))]
+        parts = asyncio.gather(*tasks)
+        # None marks the end of the events, also if a part failed
+        parts.add_done_callback(lambda _: events.put_nowait(None))
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+            await parts
+        finally:
+            for task in tasks:
+                task.cancel()
+    
     async def get_content_by_id(self, content_id: int) -> Optional[GeneratedContent]:
         """Get content by ID."""
-        return self.db.query(GeneratedContent).filter(GeneratedContent.id == content_id).first()
+        result = await self.db.execute(
+            select(GeneratedContent).filter(GeneratedContent.id == content_id))
+        return result.scalars().first()
     
-    async def get_content(self, skip: int = 0, limit: int = 100, theme: str = None, is_public: bool = None) -> List[GeneratedContent]:
-        """Get list of content with optional filtering."""
-        query = self.db.query(GeneratedContent)
+    async def get_content(self, skip: int = 0, limit: int = 100, theme: str = None,
+                          is_public: bool = None, cursor: str = None) -> List[GeneratedContent]:
+        """Get list of content with optional filtering, ordered by (created_at, id).
+
+        If a cursor is given, the page starts right after it and skip is ignored.
+        """
+        query = select(GeneratedContent)
         
         if theme:
             query = query.filter(GeneratedContent.theme == theme)
         if is_public is not None:
-            query = query.filter(GeneratedContent.is_public == is_public)
+            # a literal, such that the partial index of the public rows matches
+            query = query.filter(GeneratedContent.is_public == (true() if is_public else false()))
         
-        return query.offset(skip).limit(limit).all()
+        query = paginate(query, self.sort_key, limit, skip=skip, cursor=cursor)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
     
     async def update_content(self, content_id: int, content_update: ContentUpdate) -> Optional[GeneratedContent]:
-        """Update content."""
-        db_content = await self.get_content_by_id(content_id)
+        """Update content with a single UPDATE ... RETURNING."""
+        update_data = content_update.dict(exclude_unset=True)
+        if not update_data:
+            return await self.get_content_by_id(content_id)
+        
+        db_content = await self.db.scalar(
+            update(GeneratedContent).where(GeneratedContent.id == content_id)
+            .values(**update_data).returning(GeneratedContent)
+            .execution_options(populate_existing=True))
         if not db_content:
             return None
         
-        update_data = content_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_content, field, value)
-        
-        self.db.commit()
-        self.db.refresh(db_content)
+        await self.db.commit()
         return db_content
     
     async def delete_content(self, content_id: int) -> bool:
-        """Delete content."""
-        db_content = await self.get_content_by_id(content_id)
-        if not db_content:
+        """Delete content with a single DELETE ... RETURNING."""
+        deleted_id = await self.db.scalar(
+            delete(GeneratedContent).where(GeneratedContent.id == content_id)
+            .returning(GeneratedContent.id))
+        if deleted_id is None:
             return False
         
-        self.db.delete(db_content)
-        self.db.commit()
+        await self.db.commit()
         return True
-    
-    async def _call_openai_api(self, content_request: ContentGenerate) -> dict:
-        """Call OpenAI API to generate content (placeholder implementation)."""
-        # This is a placeholder - you would integrate with actual OpenAI API
-        # For now, return mock data
-        
-        prompt = content_request.prompt or f"Create a {content_request.theme} story"
-        
-        return {
-            "title": f"Generated {content_request.theme} Story",
-            "content": f"This is a generated story about {content_request.theme}. {prompt}",
-            "image_url_1": "https://via.placeholder.com/300x200?text=Image+1",
-            "image_url_2": "https://via.placeholder.com/300x200?text=Image+2", 
-            "image_url_3": "https://via.placeholder.com/300x200?text=Image+3",
-            "caption_1": f"Caption for {content_request.theme} image 1",
-            "caption_2": f"Caption for {content_request.theme} image 2",
-            "caption_3": f"Caption for {content_request.theme} image 3"
-        }
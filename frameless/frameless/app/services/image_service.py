@@ -1,89 +1,299 @@
 """Image service for business logic."""
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from fastapi import UploadFile
-from ..db.models.image import Image
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Insert, delete, false, insert, select, true, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+from fastapi import BackgroundTasks, UploadFile
+from ..db.models.image import Image, ImageBlob
 from ..schemas.image import ImageCreate
+from ..configs import get_settings
+from ..storage import Storage, get_storage
+from ..utils.errors import DirectUploadsNotSupportedError, UploadNotFoundError
+from ..utils.pagination import paginate
+from .image_variant_service import ImageVariantService, generate_image_variants
+from ..utils.uploads import save_upload
 import os
-import uuid
-import aiofiles
+import re
+
+# extensions kept in the path of a stored file, any other name of the upload
+# falls back to jpg
+BLOB_EXTENSION = re.compile(r"[A-Za-z0-9]{1,8}")
 
 
 class ImageService:
     """Service class for image operations."""
     
-    def __init__(self, db: Session):
+    sort_key = (Image.created_at, Image.id)
+    
+    def __init__(self, db: AsyncSession, storage: Optional[Storage] = None):
         self.db = db
-        self.upload_dir = "uploads/images"
-        os.makedirs(self.upload_dir, exist_ok=True)
-    
-    async def upload_image(self, file: UploadFile, description: str = None, is_public: bool = False, owner_id: int = None) -> Image:
-        """Upload and save image file."""
-        # Generate unique filename
-        file_extension = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = os.path.join(self.upload_dir, unique_filename)
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-        
-        # Create image record
-        image_url = f"/uploads/images/{unique_filename}"
-        db_image = Image(
-            url=image_url,
-            description=description,
-            is_public=is_public,
-            owner_id=owner_id
-        )
+        self.storage = storage or get_storage()
+    
+    async def upload_image(self, file: UploadFile, description: str = None,
+                           is_public: bool = False, owner_id: int = None,
+                           background_tasks: BackgroundTasks = None) -> Image:
+        """Upload and save image file.
+
+        Files are stored by content hash, uploading the same content again only
+        adds a new image record referencing the existing file. The downscaled
+        variants of new content are generated by a job added to the given
+        background tasks.
+
+        Raises:
+            UploadTooLargeError: if the file exceeds IMAGE_UPLOAD_MAX_BYTES.
+        """
+        # only the uploads write to the directory, the other requests do not
+        # pay for creating it
+        tmp_path = self.storage.temp_path()
         
-        self.db.add(db_image)
-        self.db.commit()
-        self.db.refresh(db_image)
+        # Stream file to disk with bounded memory
+        settings = get_settings()
+        size, sha256 = await save_upload(file, tmp_path,
+                                         chunk_size=settings.IMAGE_UPLOAD_CHUNK_BYTES,
+                                         max_size=settings.IMAGE_UPLOAD_MAX_BYTES)
+        try:
+            blob_path, created = await self._acquire_blob(
+                sha256, self._blob_path(sha256, file.filename), size=size, source=tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return await self._insert_uploaded_image(blob_path, created, sha256, description,
+                                                 is_public, owner_id, background_tasks)
+    
+    async def create_upload(self, filename: str, content_type: str, size: int,
+                            sha256: str) -> Tuple[str, Optional[str], Dict[str, str]]:
+        """Get the pre-signed URL a client uploads a file to directly, the
+        upload is then recorded by complete_upload.
+
+        Raises:
+            DirectUploadsNotSupportedError: if the storage does not support
+                direct uploads.
+
+        Returns:
+            tuple: the path of the file, the URL and the headers of the upload
+            request, no URL if the same content is stored already.
+        """
+        if not self.storage.direct_uploads:
+            raise DirectUploadsNotSupportedError
+        blob_path = await self.db.scalar(select(ImageBlob.path).where(ImageBlob.sha256 == sha256))
+        if blob_path is not None:
+            return blob_path, None, {}
+        blob_path = self._blob_path(sha256, filename)
+        url, headers = self.storage.upload_request(blob_path, content_type, size, sha256)
+        return blob_path, url, headers
+    
+    async def complete_upload(self, filename: str, sha256: str, description: str = None,
+                              is_public: bool = False, owner_id: int = None,
+                              background_tasks: BackgroundTasks = None) -> Image:
+        """Record the image of a file uploaded directly to the storage, see
+        create_upload.
+
+        Raises:
+            DirectUploadsNotSupportedError: if the storage does not support
+                direct uploads.
+            UploadNotFoundError: if the file is not in the storage.
+        """
+        if not self.storage.direct_uploads:
+            raise DirectUploadsNotSupportedError
+        blob_path, created = await self._acquire_blob(sha256, self._blob_path(sha256, filename))
+        return await self._insert_uploaded_image(blob_path, created, sha256, description,
+                                                 is_public, owner_id, background_tasks)
+    
+    async def _insert_uploaded_image(self, blob_path: str, created: bool, sha256: str,
+                                     description: Optional[str], is_public: bool,
+                                     owner_id: Optional[int],
+                                     background_tasks: Optional[BackgroundTasks]) -> Image:
+        try:
+            # the variants of a newly stored file are not generated yet
+            db_image = await self.db.scalar(self._insert_image(load_variants=not created), [dict(
+                url=self.storage.url(blob_path),
+                description=description,
+                is_public=is_public,
+                owner_id=owner_id,
+                sha256=sha256
+            )])
+            await self.db.commit()
+        except Exception:
+            # the new blob row is rolled back, do not leave its file behind;
+            # deleted first, while the row still locks out uploads of the same content
+            if created:
+                await self.storage.delete([blob_path])
+            await self.db.rollback()
+            raise
+        if created and background_tasks is not None:
+            background_tasks.add_task(generate_image_variants, self.db.bind, sha256, self.storage)
         return db_image
     
+    @staticmethod
+    def _blob_path(sha256: str, filename: str) -> str:
+        """Get the path of the file with the given content hash."""
+        file_extension = filename.split(".")[-1] if "." in filename else ""
+        if not BLOB_EXTENSION.fullmatch(file_extension):
+            file_extension = "jpg"
+        return os.path.join(sha256[:2], f"{sha256}.{file_extension}")
+    
     async def create_image(self, image: ImageCreate) -> Image:
-        """Create image record with URL."""
-        db_image = Image(
-            url=image.url,
-            description=image.description,
-            is_public=image.is_public,
-            owner_id=image.owner_id
-        )
-        
-        self.db.add(db_image)
-        self.db.commit()
-        self.db.refresh(db_image)
+        """Create image record with URL, with a single INSERT ... RETURNING."""
+        db_image = await self.db.scalar(self._insert_image(), [image.dict()])
+        await self.db.commit()
         return db_image
     
+    async def create_images(self, images: List[ImageCreate]) -> List[Image]:
+        """Create image records with URL in one transaction, with a single
+        multi-row INSERT ... RETURNING.
+
+        Raises:
+            IntegrityError: if a row violates a constraint, e.g. an unknown owner.
+        """
+        try:
+            result = await self.db.scalars(
+                self._insert_image(sort_by_parameter_order=True),
+                [image.dict() for image in images])
+            db_images = list(result)
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+        return db_images
+    
+    @staticmethod
+    def _insert_image(load_variants: bool = False, **kwargs: Any) -> Insert:
+        """Build an INSERT ... RETURNING of images, the variants are only loaded
+        if asked for, since images created from a URL never have any."""
+        statement = insert(Image).returning(Image, **kwargs)
+        if not load_variants:
+            statement = statement.options(noload(Image.variants))
+        return statement
+    
+    async def get_download_url(self, image: Image) -> str:
+        """Get a URL to download the file of an image from, pre-signed by the
+        storage if it supports it, the URL of the image if it has no file."""
+        blob_path = None
+        if image.sha256:
+            blob_path = await self.db.scalar(
+                select(ImageBlob.path).where(ImageBlob.sha256 == image.sha256))
+        return image.url if blob_path is None else self.storage.download_url(blob_path)
+    
     async def get_image_by_id(self, image_id: int) -> Optional[Image]:
         """Get image by ID."""
-        return self.db.query(Image).filter(Image.id == image_id).first()
+        result = await self.db.execute(select(Image).filter(Image.id == image_id))
+        return result.scalars().first()
     
-    async def get_images(self, skip: int = 0, limit: int = 100, is_public: bool = None, owner_id: int = None) -> List[Image]:
-        """Get list of images with optional filtering."""
-        query = self.db.query(Image)
+    async def get_images(self, skip: int = 0, limit: int = 100, is_public: bool = None,
+                         owner_id: int = None, cursor: str = None) -> List[Image]:
+        """Get list of images with optional filtering, ordered by (created_at, id).
+
+        If a cursor is given, the page starts right after it and skip is ignored.
+        """
+        query = select(Image)
         
         if is_public is not None:
-            query = query.filter(Image.is_public == is_public)
+            # a literal, such that the partial index of the public rows matches
+            query = query.filter(Image.is_public == (true() if is_public else false()))
         if owner_id is not None:
             query = query.filter(Image.owner_id == owner_id)
         
-        return query.offset(skip).limit(limit).all()
+        query = paginate(query, self.sort_key, limit, skip=skip, cursor=cursor)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
     
     async def delete_image(self, image_id: int) -> bool:
-        """Delete image."""
-        db_image = await self.get_image_by_id(image_id)
+        """Delete image with a DELETE ... RETURNING, the file is released too."""
+        result = await self.db.execute(
+            delete(Image).where(Image.id == image_id).returning(Image.sha256, Image.url))
+        db_image = result.first()
         if not db_image:
             return False
         
-        # Delete file if it exists locally
-        if db_image.url.startswith("/uploads/"):
-            file_path = db_image.url[1:]  # Remove leading slash
+        file_paths = []
+        if db_image.sha256:
+            # Delete the file and its variants with the last image referencing
+            # it, before the commit: the blob row stays locked until then, so a
+            # concurrent upload of the same content waits and stores it again
+            await self.storage.delete(await self._release_blob(db_image.sha256))
+        elif db_image.url.startswith("/uploads/"):
+            file_paths = [db_image.url[1:]]  # Remove leading slash
+        
+        await self.db.commit()
+        for file_path in file_paths:
             if os.path.exists(file_path):
                 os.remove(file_path)
-        
-        self.db.delete(db_image)
-        self.db.commit()
         return True
+    
+    async def _acquire_blob(self, sha256: str, blob_path: str, size: Optional[int] = None,
+                            source: Optional[str] = None) -> Tuple[str, bool]:
+        """Add a reference to the file with the given content hash.
+
+        The uploaded temporary file, the source, is stored at the given path if
+        the content is new, otherwise the existing file is reused. Without a
+        source the file was uploaded directly to the storage.
+
+        Raises:
+            UploadNotFoundError: if the file of a direct upload is not stored.
+
+        Returns:
+            tuple: path of the stored file relative to the storage root and
+            whether the file was newly stored.
+        """
+        for _ in range(2):
+            result = await self.db.execute(
+                update(ImageBlob)
+                .where(ImageBlob.sha256 == sha256)
+                .values(ref_count=ImageBlob.ref_count + 1)
+                .returning(ImageBlob.path)
+                .execution_options(synchronize_session=False))
+            existing_path = result.scalar_one_or_none()
+            if existing_path is not None:
+                return existing_path, False
+            
+            if size is None:
+                size = await self.storage.size(blob_path)
+                if size is None:
+                    raise UploadNotFoundError(blob_path)
+            self.db.add(ImageBlob(sha256=sha256, path=blob_path, size=size, ref_count=1))
+            try:
+                await self.db.flush()
+            except IntegrityError:
+                # the same content was stored concurrently, reference it instead
+                await self.db.rollback()
+                continue
+            if source is not None:
+                try:
+                    await self.storage.store(source, blob_path)
+                except Exception:
+                    # a partially stored file is not referenced by any row
+                    await self.storage.delete([blob_path])
+                    raise
+            return blob_path, True
+        raise RuntimeError(f"Could not store image blob {sha256}")
+    
+    async def _release_blob(self, sha256: str) -> List[str]:
+        """Remove a reference to the file with the given content hash.
+
+        The blob row is deleted only while it is unreferenced, its files
+        must be deleted before the transaction is committed.
+
+        Returns:
+            list: paths relative to the storage root of the file and its
+            variants if it is not referenced anymore and must be deleted.
+        """
+        result = await self.db.execute(
+            update(ImageBlob)
+            .where(ImageBlob.sha256 == sha256)
+            .values(ref_count=ImageBlob.ref_count - 1)
+            .returning(ImageBlob.ref_count, ImageBlob.path)
+            .execution_options(synchronize_session=False))
+        row = result.first()
+        if row is None or row.ref_count > 0:
+            return []
+        variant_paths = await ImageVariantService(self.db, self.storage).delete_variants(sha256)
+        blob_path = await self.db.scalar(
+            delete(ImageBlob)
+            .where(ImageBlob.sha256 == sha256, ImageBlob.ref_count == 0)
+            .returning(ImageBlob.path)
+            # the ref_count of a loaded blob may be stale, match the deleted rows by key
+            .execution_options(synchronize_session="fetch"))
+        if blob_path is None:
+            return []
+        return [blob_path] + variant_paths
@@ -0,0 +1,109 @@
+"""Image variant service generating downscaled images in the background."""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from ..configs import get_logger, get_settings
+from ..db.models.image import ImageBlob, ImageVariant
+from ..storage import Storage, get_storage
+from ..utils.images import generate_variants
+
+
+@lru_cache()
+def get_image_process_pool() -> ProcessPoolExecutor:
+    """Get the process pool resizing images, so the CPU heavy work neither
+    blocks the event loop nor competes for the GIL of the workers.
+
+    Returns:
+        ProcessPoolExecutor: the shared process pool.
+    """
+    return ProcessPoolExecutor(max_workers=get_settings().IMAGE_VARIANT_WORKERS)
+
+
+def shutdown_image_process_pool() -> None:
+    """Shut down the image process pool if it was started."""
+    if get_image_process_pool.cache_info().currsize:
+        get_image_process_pool().shutdown(wait=True)
+        get_image_process_pool.cache_clear()
+
+
+class ImageVariantService:
+    """Service class for image variant operations."""
+
+    def __init__(self, db: AsyncSession, storage: Optional[Storage] = None):
+        self.db = db
+        self.storage = storage or get_storage()
+
+    async def generate_variants(self, sha256: str) -> List[ImageVariant]:
+        """Generate and record the variants of the stored file with the given hash.
+
+        The variants are written next to a local copy of the file, then moved
+        into the storage.
+        """
+        blob = await self.db.get(ImageBlob, sha256)
+        if blob is None:
+            return []
+
+        settings = get_settings()
+        blob_dir, blob_name = os.path.split(blob.path)
+        loop = asyncio.get_running_loop()
+        async with self.storage.local_copy(blob.path) as source_path:
+            try:
+                results = await loop.run_in_executor(
+                    get_image_process_pool(),
+                    partial(generate_variants,
+                            source_path,
+                            os.path.dirname(source_path),
+                            os.path.splitext(blob_name)[0],
+                            settings.IMAGE_VARIANT_WIDTHS,
+                            settings.IMAGE_VARIANT_FORMATS,
+                            settings.IMAGE_VARIANT_QUALITY))
+            except OSError as e:
+                # e.g. the uploaded file is not an image Pillow can read
+                get_logger().warning(
+                    "Cannot generate variants of image %s: %s", sha256, e)
+                return []
+
+            variants = [ImageVariant(sha256=sha256, width=width, height=height, format=fmt,
+                                     path=os.path.join(blob_dir, file_name))
+                        for width, height, fmt, file_name in results]
+            for variant in variants:
+                await self.storage.store(
+                    os.path.join(os.path.dirname(source_path), os.path.basename(variant.path)),
+                    variant.path)
+
+        # the last image referencing the file may be deleted in the meantime
+        if await self.db.get(ImageBlob, sha256, populate_existing=True) is None:
+            await self.storage.delete([variant.path for variant in variants])
+            return []
+
+        self.db.add_all(variants)
+        await self.db.commit()
+        return variants
+
+    async def delete_variants(self, sha256: str) -> List[str]:
+        """Delete the variant records of the given hash.
+
+        Returns:
+            list: paths of the variant files relative to the storage root.
+        """
+        result = await self.db.execute(select(ImageVariant).filter(ImageVariant.sha256 == sha256))
+        variants = list(result.scalars().all())
+        for variant in variants:
+            await self.db.delete(variant)
+        await self.db.flush()
+        return [variant.path for variant in variants]
+
+
+async def generate_image_variants(bind: AsyncEngine, sha256: str,
+                                  storage: Optional[Storage] = None) -> None:
+    """Background job generating the variants of a newly stored image file.
+
+    It uses its own session, since the session of the request is closed once
+    the response is sent.
+    """
+    async with AsyncSession(bind=bind, expire_on_commit=False) as db:
+        await ImageVariantService(db, storage).generate_variants(sha256)
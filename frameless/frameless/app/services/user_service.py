@@ -1,83 +1,140 @@
 """User service for business logic."""
+import asyncio
+from functools import lru_cache
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..db.models.user import User
 from ..schemas.user import UserCreate, UserUpdate
-from passlib.context import CryptContext
+from ..configs import get_settings
+from ..utils.cache import TTLCache
+from ..utils.hashing import get_password_hasher
+from ..utils.pagination import paginate
 import secrets
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache()
+def get_token_cache() -> TTLCache:
+    """Get the cache of authenticated users keyed by access token, the
+    entries are tagged with the user id.
+
+    The cache lives in the worker process, the invalidations of a user are
+    local to it: the other workers serve their entries until they expire
+    after TOKEN_CACHE_TTL_SECONDS.
+
+    Returns:
+        TTLCache: the shared token cache instance.
+    """
+    settings = get_settings()
+    return TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS)
 
 
 class UserService:
     """Service class for user operations."""
     
-    def __init__(self, db: Session):
+    sort_key = (User.id,)
+    
+    def __init__(self, db: AsyncSession):
         self.db = db
+        self.password_hasher = get_password_hasher()
     
     async def create_user(self, user: UserCreate) -> User:
-        """Create a new user."""
+        """Create a new user with a single INSERT ... RETURNING."""
         # Hash password
-        hashed_password = pwd_context.hash(user.password)
+        hashed_password = await self.password_hasher.hash(user.password)
         
         # Create user
-        db_user = User(
+        db_user = await self.db.scalar(insert(User).returning(User), [dict(
             username=user.username,
             email=user.email,
             password=user.password,  # Store plain password for now
             hashed_password=hashed_password
-        )
-        
-        self.db.add(db_user)
-        self.db.commit()
-        self.db.refresh(db_user)
+        )])
+        await self.db.commit()
         return db_user
     
+    async def create_users(self, users: List[UserCreate]) -> List[User]:
+        """Create users in one transaction, all or none of them are created.
+
+        The passwords are hashed concurrently in the worker pool, the rows are
+        inserted with a single multi-row INSERT ... RETURNING.
+
+        Raises:
+            IntegrityError: if a username or email is already taken.
+        """
+        hashed_passwords = await asyncio.gather(
+            *(self.password_hasher.hash(user.password) for user in users))
+        rows = [dict(username=user.username, email=user.email, password=user.password,
+                     hashed_password=hashed_password)
+                for user, hashed_password in zip(users, hashed_passwords)]
+        try:
+            result = await self.db.scalars(
+                insert(User).returning(User, sort_by_parameter_order=True), rows)
+            db_users = list(result)
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+        return db_users
+    
     async def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Get user by ID."""
-        return self.db.query(User).filter(User.id == user_id).first()
+        result = await self.db.execute(select(User).filter(User.id == user_id))
+        return result.scalars().first()
     
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email."""
-        return self.db.query(User).filter(User.email == email).first()
+        result = await self.db.execute(select(User).filter(User.email == email))
+        return result.scalars().first()
     
     async def get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username."""
-        return self.db.query(User).filter(User.username == username).first()
+        result = await self.db.execute(select(User).filter(User.username == username))
+        return result.scalars().first()
     
-    async def get_users(self, skip: int = 0, limit: int = 100) -> List[User]:
-        """Get list of users."""
-        return self.db.query(User).offset(skip).limit(limit).all()
+    async def get_users(self, skip: int = 0, limit: int = 100, cursor: str = None) -> List[User]:
+        """Get list of users ordered by id.
+
+        If a cursor is given, the page starts right after it and skip is ignored.
+        """
+        query = paginate(select(User), self.sort_key, limit, skip=skip, cursor=cursor)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
     
     async def update_user(self, user_id: int, user_update: UserUpdate) -> Optional[User]:
-        """Update user information."""
-        db_user = await self.get_user_by_id(user_id)
-        if not db_user:
-            return None
-        
+        """Update user information with a single UPDATE ... RETURNING."""
         update_data = user_update.dict(exclude_unset=True)
         
         # Hash password if provided
         if "password" in update_data:
-            update_data["hashed_password"] = pwd_context.hash(update_data["password"])
+            update_data["hashed_password"] = await self.password_hasher.hash(
+                update_data["password"])
         
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
+        if not update_data:
+            return await self.get_user_by_id(user_id)
+        db_user = await self.db.scalar(
+            update(User).where(User.id == user_id).values(**update_data).returning(User)
+            .execution_options(populate_existing=True))
+        if not db_user:
+            return None
         
-        self.db.commit()
-        self.db.refresh(db_user)
+        await self.db.commit()
+        get_token_cache().invalidate_tag(user_id)
         return db_user
     
     async def delete_user(self, user_id: int) -> bool:
-        """Delete user."""
-        db_user = await self.get_user_by_id(user_id)
-        if not db_user:
+        """Delete user with a single DELETE ... RETURNING, the images and
+        contents of the user are kept without owner by their foreign keys."""
+        deleted_id = await self.db.scalar(
+            delete(User).where(User.id == user_id).returning(User.id))
+        if deleted_id is None:
             return False
         
-        self.db.delete(db_user)
-        self.db.commit()
+        await self.db.commit()
+        get_token_cache().invalidate_tag(user_id)
         return True
     
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify password."""
-        return pwd_context.verify(plain_password, hashed_password)
+        return await self.password_hasher.verify(plain_password, hashed_password)
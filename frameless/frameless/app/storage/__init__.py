@@ -0,0 +1,33 @@
+"""Storage of the uploaded image files, provides a function `get_storage` to
+get the backend configured by the settings."""
+from functools import lru_cache
+from ..configs import get_settings
+from ..constants import IMAGE_UPLOAD_DIR, IMAGE_UPLOAD_URL
+from .base import Storage
+from .local import LocalStorage
+from .s3 import S3Storage
+
+
+@lru_cache()
+def get_storage() -> Storage:
+    """Get the storage backend configured by the current settings.
+
+    Returns:
+        Storage: the shared storage instance.
+    """
+    settings = get_settings()
+    if settings.IMAGE_STORAGE_BACKEND == "s3":
+        return S3Storage(bucket_url=settings.IMAGE_STORAGE_S3_URL,
+                         access_key=settings.IMAGE_STORAGE_S3_ACCESS_KEY,
+                         secret_key=settings.IMAGE_STORAGE_S3_SECRET_KEY,
+                         region=settings.IMAGE_STORAGE_S3_REGION,
+                         public_url=settings.IMAGE_STORAGE_S3_PUBLIC_URL,
+                         expires=settings.IMAGE_STORAGE_PRESIGN_SECONDS)
+    return LocalStorage(IMAGE_UPLOAD_DIR, IMAGE_UPLOAD_URL)
+
+
+async def close_storage() -> None:
+    """Close the storage backend if it was created."""
+    if get_storage.cache_info().currsize:
+        await get_storage().aclose()
+        get_storage.cache_clear()
@@ -0,0 +1,72 @@
+"""Define the interface of the storage backends of the uploaded image files."""
+from abc import ABC, abstractmethod
+from typing import AsyncContextManager, Dict, Optional, Sequence, Tuple
+
+
+class Storage(ABC):
+    """Base class of the storage backends.
+
+    Files are addressed by their path relative to the root of the storage,
+    e.g. ab/ab12...ef.png. A backend supporting direct transfers issues
+    pre-signed URLs, the clients then upload and download the files from the
+    storage themselves and the bytes never pass through the workers.
+    """
+
+    # whether the clients can upload with a pre-signed URL, see upload_request
+    direct_uploads = False
+
+    @abstractmethod
+    def url(self, path: str) -> str:
+        """Get the URL of a public file."""
+
+    def download_url(self, path: str) -> str:
+        """Get a URL to download a file from, pre-signed if the backend
+        supports it, thus valid for private files too."""
+        return self.url(path)
+
+    def upload_request(self, path: str, content_type: str, size: int,
+                       sha256: str) -> Tuple[str, Dict[str, str]]:
+        """Get the pre-signed URL a client uploads a file to with PUT.
+
+        Args:
+            path (str): the path of the file.
+            content_type (str): the media type of the file.
+            size (int): the size of the file in bytes.
+            sha256 (str): the hex digest of the content of the file.
+
+        Returns:
+            tuple: the URL and the headers the request must be sent with, the
+            storage rejects a body of another size or content.
+
+        Raises:
+            NotImplementedError: if the backend does not support direct uploads.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def temp_path(self) -> str:
+        """Get the path of a new local file, later moved into the storage by
+        `store`."""
+
+    @abstractmethod
+    async def store(self, local_path: str, path: str) -> None:
+        """Move a local file into the storage."""
+
+    @abstractmethod
+    async def size(self, path: str) -> Optional[int]:
+        """Get the size of a file in bytes, None if it does not exist."""
+
+    @abstractmethod
+    async def delete(self, paths: Sequence[str]) -> None:
+        """Delete files, the missing ones are skipped."""
+
+    @abstractmethod
+    def local_copy(self, path: str) -> AsyncContextManager[str]:
+        """Get a local copy of a file, e.g. to process it.
+
+        The files written in the directory of the copy are only kept once
+        moved into the storage by `store`.
+        """
+
+    async def aclose(self) -> None:
+        """Release the resources held by the backend, e.g. HTTP connections."""
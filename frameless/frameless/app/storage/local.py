@@ -0,0 +1,52 @@
+"""Define the backend storing the files on the local filesystem."""
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Sequence
+from .base import Storage
+
+
+class LocalStorage(Storage):
+    """Store the files in a local directory, served by the app under the
+    given URL, see MediaFiles.
+
+    Args:
+        directory (str): the directory of the files, relative to the working
+            directory or absolute.
+        base_url (str): the URL the directory is served at.
+    """
+
+    def __init__(self, directory: str, base_url: str):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path}"
+
+    def temp_path(self) -> str:
+        # in the directory of the files, so storing it is a rename
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{uuid.uuid4()}.upload")
+
+    async def store(self, local_path: str, path: str) -> None:
+        target = os.path.join(self.directory, path)
+        if os.path.abspath(local_path) != os.path.abspath(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(local_path, target)
+
+    async def size(self, path: str) -> Optional[int]:
+        try:
+            return os.stat(os.path.join(self.directory, path)).st_size
+        except FileNotFoundError:
+            return None
+
+    async def delete(self, paths: Sequence[str]) -> None:
+        for path in paths:
+            file_path = os.path.join(self.directory, path)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    @asynccontextmanager
+    async def local_copy(self, path: str) -> AsyncIterator[str]:
+        # the file itself, the files written next to it are stored already
+        yield os.path.join(self.directory, path)
@@ -0,0 +1,277 @@
+"""Define an in-process LRU cache with per entry expiration, and a persistent
+SQLite cache for JSON values."""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+
+class TTLCache:
+    """Least recently used cache whose entries expire after a time to live.
+
+    Entries can be tagged, such that all the entries related to e.g. one user
+    can be invalidated at once.
+
+    Args:
+        maxsize (int): maximum number of entries, the least recently used entry
+            is evicted when it is exceeded.
+        ttl (float): default time to live of the entries in seconds.
+        timer (Callable): monotonic clock returning seconds.
+
+    Examples:
+
+        >>> cache = TTLCache(maxsize=2, ttl=60)
+        >>> cache.set("token", "alice", tags=("user:1",))
+        >>> cache.get("token")
+        'alice'
+        >>> cache.invalidate_tag("user:1")
+        1
+        >>> cache.get("token") is None
+        True
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0,
+                 timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._data: "OrderedDict[Hashable, Tuple[float, Any, Tuple]]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > self.timer()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get the cached value of the key.
+
+        Args:
+            key (Hashable): key of the entry.
+            default (Any): value returned if the key is missing or expired.
+
+        Returns:
+            Any: the cached value or the default value.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value, _ = entry
+        if expires_at <= self.timer():
+            self.delete(key)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            tags: Iterable[Hashable] = ()) -> None:
+        """Cache the value of the key.
+
+        Args:
+            key (Hashable): key of the entry.
+            value (Any): value to cache.
+            ttl (Optional[float]): time to live in seconds, the default time to
+                live of the cache is used if it is not given.
+            tags (Iterable[Hashable]): tags for invalidating the entry.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        if key in self._data:
+            self.delete(key)
+        tags = tuple(tags)
+        self._data[key] = (self.timer() + ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._data) > self.maxsize:
+            self.delete(next(iter(self._data)))
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove the entry of the key.
+
+        Args:
+            key (Hashable): key of the entry.
+
+        Returns:
+            bool: True if the entry existed.
+        """
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        """Remove all the entries with the given tag.
+
+        Args:
+            tag (Hashable): tag of the entries.
+
+        Returns:
+            int: number of removed entries.
+        """
+        keys = list(self._tags.get(tag, ()))
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Remove all the entries and reset the counters."""
+        self._data.clear()
+        self._tags.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Report the usage of the cache.
+
+        Returns:
+            dict: number of entries, maximum size, hits and misses.
+        """
+        return dict(size=len(self._data), maxsize=self.maxsize,
+                    hits=self.hits, misses=self.misses)
+
+
+class SQLiteCache:
+    """Persistent cache of JSON serializable values in a SQLite file, shared by
+    all the workers on a host and surviving restarts.
+
+    Entries expire after a time to live by the wall clock. The access time of
+    an entry is refreshed at most every `touch_interval` seconds, and every
+    `evict_interval` writes the expired entries are removed and the least
+    recently used ones are evicted if there are more than `max_entries`, so
+    that the hits and most writes are a single statement. A database locked by
+    another worker counts as a miss and skips the write. The calls block on
+    disk I/O, run them outside of the event loop.
+
+    Args:
+        path (str): path of the SQLite file.
+        max_entries (int): maximum number of entries, exceeded by at most
+            `evict_interval` entries between two evictions.
+        ttl (float): time to live of the entries in seconds.
+        touch_interval (float): minimum seconds between two updates of the
+            access time of an entry.
+        evict_interval (int): number of writes between two evictions.
+        timeout (float): seconds waiting for a lock held by another worker.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, ttl: float = 3600.0,
+                 touch_interval: float = 60.0, evict_interval: int = 100,
+                 timeout: float = 0.05):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self.evict_interval = evict_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, "
+                           "value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                           "accessed_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed_at "
+                           "ON cache (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)")
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.skipped_writes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM cache").fetchone()[0]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get the cached value of the key, see TTLCache.get."""
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT value, expires_at, accessed_at FROM cache "
+                                         "WHERE key = ?", (key,)).fetchone()
+            except sqlite3.OperationalError as e:
+                if not _is_locked(e):
+                    raise
+                row = None
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return default
+            if row[2] <= now - self.touch_interval:
+                self._write(self._conn.execute, "UPDATE cache SET accessed_at = ? WHERE key = ?",
+                            (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache the value of the key, every `evict_interval` writes evicting
+        expired and least recently used entries beyond the maximum number of
+        entries."""
+        now = time.time()
+        with self._lock:
+            if not self._write(self._conn.execute,
+                               "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                               (key, json.dumps(value), now + self.ttl, now)):
+                return
+            self._writes += 1
+            if self._writes % self.evict_interval == 0:
+                self._write(self._evict, now)
+
+    def _write(self, function: Callable[..., Any], *args: Any) -> bool:
+        """Call a function writing to the database, skipped if another worker
+        locks the database.
+
+        Returns:
+            bool: False if the write was skipped.
+        """
+        try:
+            function(*args)
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e):
+                raise
+            self.skipped_writes += 1
+            return False
+        return True
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        excess = self._conn.execute("SELECT count(*) FROM cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute("DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                               "ORDER BY accessed_at LIMIT ?)", (excess,))
+
+    def clear(self) -> None:
+        """Remove all the entries and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+        self.hits = 0
+        self.misses = 0
+        self.skipped_writes = 0
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        self._conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Report the usage of the cache, see TTLCache.stats, and the number of
+        writes skipped while the database was locked."""
+        return dict(size=len(self), maxsize=self.max_entries,
+                    hits=self.hits, misses=self.misses, skipped_writes=self.skipped_writes)
+
+
+def _is_locked(error: sqlite3.OperationalError) -> bool:
+    """Whether the error is raised because another connection holds a lock."""
+    return "locked" in str(error) or "busy" in str(error)
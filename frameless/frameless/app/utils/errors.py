@@ -1 +1,29 @@
 """Define customized Exception classes"""
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an uploaded file exceeds the maximum allowed size."""
+
+
+class GenerationError(RuntimeError):
+    """Raised when the content generator backend fails to generate content."""
+
+
+class StorageError(RuntimeError):
+    """Raised when the storage backend of the uploaded files fails."""
+
+
+class DirectUploadsNotSupportedError(NotImplementedError):
+    """Raised when a direct upload is requested but the storage does not support them."""
+
+
+class UploadNotFoundError(LookupError):
+    """Raised when a direct upload is completed before the file is stored."""
+
+
+class UnsafeURLError(ValueError):
+    """Raised when a URL given by a client points at a private or reserved address."""
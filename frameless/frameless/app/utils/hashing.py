@@ -0,0 +1,153 @@
+"""Define password hashing helpers running bcrypt off the event loop."""
+import asyncio
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+from passlib.context import CryptContext
+from ..configs import get_settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    """Hash the given password with bcrypt.
+
+    Args:
+        password (str): plain password.
+
+    Returns:
+        str: the bcrypt hash of the password.
+    """
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify the plain password against the bcrypt hash.
+
+    Args:
+        plain_password (str): plain password.
+        hashed_password (str): bcrypt hash to verify against.
+
+    Returns:
+        bool: True if the password matches the hash.
+    """
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Run bcrypt hashing and verification in a bounded worker pool.
+
+    At most `max_concurrency` calls are submitted to the pool at the same time,
+    further calls wait for a free slot, so a burst of logins queues up here
+    instead of occupying the event loop.
+
+    Args:
+        executor_type (str): "thread" or "process".
+        workers (int): number of workers in the pool.
+        max_concurrency (int): maximum number of calls submitted to the pool.
+    """
+
+    def __init__(self, executor_type: str = "thread", workers: int = 2,
+                 max_concurrency: int = 4):
+        self.executor_type = executor_type
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self._executor: Optional[Executor] = None
+        # asyncio primitives are bound to a loop, keep one semaphore per loop
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+
+    @property
+    def executor(self) -> Executor:
+        """The worker pool, created on first use."""
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="password-hasher")
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def _run(self, func: Callable, *args: Any) -> Any:
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+            try:
+                await semaphore.acquire()
+            finally:
+                self.queued -= 1
+        else:
+            await semaphore.acquire()
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash the given password in the worker pool.
+
+        Args:
+            password (str): plain password.
+
+        Returns:
+            str: the bcrypt hash of the password.
+        """
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify the plain password against the bcrypt hash in the worker pool.
+
+        Args:
+            plain_password (str): plain password.
+            hashed_password (str): bcrypt hash to verify against.
+
+        Returns:
+            bool: True if the password matches the hash.
+        """
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, int]:
+        """Report the usage of the worker pool.
+
+        Returns:
+            dict: calls running in the pool, calls waiting for a slot, the
+            highest number of waiting calls seen and the finished calls.
+        """
+        return dict(in_flight=self.in_flight, queued=self.queued,
+                    max_queue_depth=self.max_queue_depth, completed=self.completed)
+
+    def shutdown(self) -> None:
+        """Shut down the worker pool, it is recreated on the next call."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+@lru_cache()
+def get_password_hasher() -> PasswordHasher:
+    """Get the password hasher configured by the current settings.
+
+    Returns:
+        PasswordHasher: the shared password hasher instance.
+    """
+    settings = get_settings()
+    return PasswordHasher(executor_type=settings.PASSWORD_HASH_EXECUTOR,
+                          workers=settings.PASSWORD_HASH_WORKERS,
+                          max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY)
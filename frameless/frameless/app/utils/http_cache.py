@@ -0,0 +1,108 @@
+"""Define helpers for HTTP caching with ETags.
+
+The ETag of a response is the digest of the fields its response model reads
+from the rows, so it is computed without serializing the body, and a request
+whose If-None-Match matches it is answered with an empty 304 response.
+"""
+import hashlib
+from typing import Any, List, Optional, Sequence, Type
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+from ..configs import get_settings
+
+
+def _field_values(schema: Type[BaseModel], row: Any) -> List[Any]:
+    values = []
+    for name, field in schema.__fields__.items():
+        value = getattr(row, name, field.default)
+        if isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+            if isinstance(value, (list, tuple)):
+                value = [_field_values(field.type_, v) for v in value]
+            elif value is not None:
+                value = _field_values(field.type_, value)
+        values.append(value)
+    return values
+
+
+def compute_etag(schema: Type[BaseModel], rows: Sequence[Any]) -> str:
+    """Compute the weak ETag of the response of the given rows.
+
+    Only the fields of the response model are hashed, those the response
+    would expose, e.g. id, created_at and the content of the row.
+
+    Args:
+        schema (Type[BaseModel]): the response model of the rows.
+        rows (Sequence[Any]): the rows of the response, a single row for an
+            item endpoint.
+
+    Returns:
+        str: the weak ETag.
+
+    Examples:
+
+        >>> class Item(BaseModel):
+        ...     id: int
+        >>> class Row:
+        ...     id, secret = 1, "ignored"
+        >>> compute_etag(Item, [Row()]) == compute_etag(Item, [Item(id=1)])
+        True
+    """
+    values = [_field_values(schema, row) for row in rows]
+    digest = hashlib.blake2b(repr(values).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def cache_control(public: bool) -> str:
+    """Get the Cache-Control policy of a response.
+
+    Args:
+        public (bool): whether the response only contains public rows, those
+            can be stored by shared caches such as a CDN.
+
+    Returns:
+        str: the value of the Cache-Control header.
+    """
+    if public:
+        return f"public, max-age={get_settings().HTTP_CACHE_PUBLIC_MAX_AGE_SECONDS}"
+    return "private, no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag, by weak comparison.
+
+    Examples:
+
+        >>> etag_matches('"a", W/"b"', 'W/"b"')
+        True
+        >>> etag_matches('*', 'W/"b"'), etag_matches(None, 'W/"b"')
+        (True, False)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag[2:] if etag.startswith("W/") else etag
+    return any((tag[2:] if tag.startswith("W/") else tag) == opaque_tag
+               for tag in (t.strip() for t in if_none_match.split(",")))
+
+
+def not_modified(request: Request, response: Response, etag: str,
+                 public: bool = False) -> Optional[Response]:
+    """Set the ETag and Cache-Control headers of a response, and answer the
+    request with 304 if the client already has the representation.
+
+    Args:
+        request (Request): the request.
+        response (Response): the response whose headers are set.
+        etag (str): the ETag of the response, see compute_etag.
+        public (bool): whether the response only contains public rows.
+
+    Returns:
+        Optional[Response]: an empty 304 response with the headers of the
+        response, None if the full response must be sent.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control(public)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=dict(response.headers))
+    return None
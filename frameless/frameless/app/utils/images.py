@@ -0,0 +1,49 @@
+"""Define image processing helpers.
+
+The functions are executed in a process pool, therefore they only take and
+return plain picklable values.
+"""
+import os
+from typing import List, Sequence, Tuple
+from PIL import Image as PILImage, ImageOps
+
+# Pillow format names of the supported variant formats
+VARIANT_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+
+
+def generate_variants(source_path: str, output_dir: str, name: str,
+                      widths: Sequence[int], formats: Sequence[str],
+                      quality: int = 80) -> List[Tuple[int, int, str, str]]:
+    """Generate downscaled variants of an image.
+
+    Widths larger than the original image are skipped, the image is never
+    upscaled.
+
+    Args:
+        source_path (str): path of the original image.
+        output_dir (str): directory the variants are written to.
+        name (str): base file name of the variants.
+        widths (Sequence[int]): target widths in pixels.
+        formats (Sequence[str]): target formats, keys of VARIANT_FORMATS.
+        quality (int): encoder quality of the variants.
+
+    Returns:
+        list: (width, height, format, file name) of the written variants.
+    """
+    variants = []
+    with PILImage.open(source_path) as original:
+        original = ImageOps.exif_transpose(original)
+        for width in sorted(set(widths)):
+            if width >= original.width:
+                continue
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), PILImage.LANCZOS)
+            for fmt in formats:
+                image = resized
+                if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+                file_name = f"{name}_{width}.{fmt}"
+                image.save(os.path.join(output_dir, file_name), VARIANT_FORMATS[fmt],
+                           quality=quality)
+                variants.append((width, height, fmt, file_name))
+    return variants
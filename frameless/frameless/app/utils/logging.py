@@ -1,8 +1,14 @@
 """Define logging related utility functions and classes."""
+import copy
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Any, Dict, List, Mapping, Optional, TextIO
 import click
 from http import HTTPStatus
-from fastapi import Request, Response
+from starlette.types import Scope
 
 status_code_colors = {
     1: lambda code: click.style(str(code), fg="bright_white"),
@@ -12,28 +18,33 @@ status_code_colors = {
     5: lambda code: click.style(str(code), fg="bright_red"),
 }
 request_msg_format = "%s:%d - \"%s\" %s - %.2fms"
+# the styles rendered once as str.format templates, click.style is not called
+# per record
+status_code_templates = {key: color("{}") for key, color in status_code_colors.items()}
+bold_template = click.style("{}", bold=True)
 
 
-def get_request_msg_args(request: Request, response: Response,
+def get_request_msg_args(scope: Scope, status_code: int,
                          process_time: float) -> tuple:
     """Format the message for processing a http request.
 
     Args:
-        request (Request): http request.
-        response (Response): the corresponding response to the request.
+        scope (Scope): the ASGI scope of the http request.
+        status_code (int): the status code of the response to the request.
         process_time (float): process time for the http request.
 
     Returns:
         tuple: the requisite args to format the message
     """
     try:
-        response_status = HTTPStatus(response.status_code)
+        response_status = HTTPStatus(status_code)
         status = f"{response_status.value} {response_status.phrase}"
     except ValueError:
-        status = f"{response.status_code} Unknown Error"
-    method_path = f"{request.method} {request.url.path} HTTP/{request.scope['http_version']}"
-    args = (request.client.host, request.client.port,  # type: ignore
-            method_path, status, process_time)
+        status = f"{status_code} Unknown Error"
+    method_path = f"{scope['method']} {scope['path']} HTTP/{scope['http_version']}"
+    # no client address e.g. over a unix socket
+    host, port = scope.get("client") or ("-", 0)
+    args = (host, port, method_path, status, process_time)
     return args
 
 
@@ -42,6 +53,11 @@ class StandardFormatter(logging.Formatter):
     msg_format = "%(asctime)-22.19s %(name)-21s [%(levelname)s]:    " \
                  "%(message)s    (%(filename)s:%(lineno)d)"
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # the formatter of each level, compiled by the first record of the level
+        self._formatters: Dict[int, logging.Formatter] = {}
+
     def build_msg_format(self, *args, **kwargs) -> str:
         """Wrapper function for building message customized format.
 
@@ -59,8 +75,10 @@ class StandardFormatter(logging.Formatter):
         Returns:
             str: formatted log message.
         """
-        log_fmt = self.build_msg_format(record)
-        formatter = logging.Formatter(log_fmt)
+        formatter = self._formatters.get(record.levelno)
+        if formatter is None:
+            formatter = logging.Formatter(self.build_msg_format(record))
+            self._formatters[record.levelno] = formatter
         return formatter.format(record)
 
 
@@ -102,10 +120,9 @@ class ColorFormatter(StandardFormatter):
             str: the formatted message, containing process time and http request and
             response related information
         """
-        method_path = click.style(method_path, bold=True)
+        method_path = bold_template.format(method_path)
         status_code = int(status.split(" ")[0])
-        status_func = status_code_colors[status_code // 100]
-        status = status_func(status)
+        status = status_code_templates.get(status_code // 100, "{}").format(status)
         return msg % (host, port, method_path, status, process_time)
 
     def build_msg_format(self, record: logging.LogRecord) -> str:  # type: ignore
@@ -137,3 +154,147 @@ class ColorFormatter(StandardFormatter):
             record.msg = message
             record.args = ()
         return super(ColorFormatter, self).format(record)
+
+
+class QueueStreamHandler(logging.handlers.QueueHandler):
+    """Handler writing the records to a stream from a listener thread, so the
+    event loop never blocks on a slow stream, e.g. the pipe of a docker log
+    driver.
+
+    The records are put in a bounded queue, a record arriving while the queue
+    is full is dropped and counted, the number of dropped records is written
+    to the stream once there is room again. The listener writes the records
+    by batches of up to `batch_size`, with one write and one flush per batch.
+    The records are formatted by the listener, not by the logging thread.
+
+    Args:
+        stream (Optional[TextIO]): the stream, stderr by default.
+        maxsize (int): maximum number of queued records.
+        batch_size (int): maximum number of records written at once.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, maxsize: int = 10000,
+                 batch_size: int = 100):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream)
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.written = 0
+        self._reported_dropped = 0
+        self._listener: Optional[threading.Thread] = None
+        self._listener_pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt: Optional[logging.Formatter]) -> None:  # noqa: N802
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # formatted by the listener
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # a forked worker does not inherit the listener thread
+        if self._listener_pid != os.getpid():
+            self._start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start_listener(self) -> None:
+        with self._start_lock:
+            if self._listener_pid != os.getpid():
+                self._listener = threading.Thread(target=self._listen, daemon=True,
+                                                  name="QueueStreamHandler")
+                self._listener.start()
+                self._listener_pid = os.getpid()
+
+    def _listen(self) -> None:
+        stop = False
+        while not stop:
+            records = [self.queue.get()]
+            while len(records) < self.batch_size:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if records[-1] is None:
+                records.pop()
+                stop = True
+            self._write(records)
+
+    def _write(self, records: List[logging.LogRecord]) -> None:
+        lines = []
+        dropped = self.dropped - self._reported_dropped
+        if dropped:
+            self._reported_dropped += dropped
+            lines.append(f"QueueStreamHandler dropped {dropped} log records, the queue was full")
+        for record in records:
+            try:
+                lines.append(self.target.format(record))
+            except Exception:
+                self.target.handleError(record)
+        if not lines:
+            return
+        terminator = self.target.terminator
+        try:
+            self.target.acquire()
+            try:
+                self.target.stream.write(terminator.join(lines) + terminator)
+                self.target.flush()
+            finally:
+                self.target.release()
+            self.written += len(records)
+        except Exception:
+            if records:
+                self.target.handleError(records[0])
+
+    def stats(self) -> Dict[str, int]:
+        """Report the records queued, written and dropped since the start.
+
+        Returns:
+            dict: the counters of the handler.
+        """
+        return dict(queued=self.queue.qsize(), written=self.written, dropped=self.dropped)
+
+    def close(self) -> None:
+        """Write the queued records and stop the listener."""
+        if self._listener is not None and self._listener_pid == os.getpid():
+            self.queue.put(None)
+            self._listener.join()
+            self._listener = None
+            self._listener_pid = None
+        self.target.close()
+        super().close()
+
+
+def queue_stream_handlers(config: Mapping[str, Any], maxsize: int,
+                          batch_size: int) -> Dict[str, Any]:
+    """Replace the stream handlers of a logging configuration by queued ones.
+
+    Args:
+        config (Mapping[str, Any]): a logging configuration, see dictConfig.
+        maxsize (int): maximum number of records queued per handler.
+        batch_size (int): maximum number of records written at once.
+
+    Returns:
+        Dict[str, Any]: a copy of the configuration with QueueStreamHandler
+        in place of each logging.StreamHandler.
+
+    Examples:
+
+        >>> config = dict(handlers=dict(console={'class': 'logging.StreamHandler',
+        ...                                      'stream': 'ext://sys.stdout'}))
+        >>> handlers = queue_stream_handlers(config, 100, 10)['handlers']
+        >>> handlers['console']['()'] is QueueStreamHandler
+        True
+    """
+    # the settings hold a LoggingConfig model, a mapping of its fields
+    config = copy.deepcopy(dict(config))
+    for handler in config.get("handlers", {}).values():
+        if handler.get("class") == "logging.StreamHandler":
+            del handler["class"]
+            handler.update({"()": QueueStreamHandler, "maxsize": maxsize,
+                            "batch_size": batch_size})
+    return config
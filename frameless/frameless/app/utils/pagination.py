@@ -0,0 +1,112 @@
+"""Define helpers for keyset (cursor) pagination.
+
+A cursor is the opaque, url-safe encoding of the sort key of the last row of a
+page. The next page continues right after that key, so it is found with an
+index range scan instead of skipping all the previous rows.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import Select, tuple_
+from .errors import InvalidCursorError
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of a row to an opaque cursor.
+
+    Args:
+        *values (Any): the values of the sort key columns.
+
+    Returns:
+        str: the url-safe cursor.
+
+    Examples:
+
+        >>> decode_cursor(encode_cursor(datetime(2023, 1, 1), 42))
+        (datetime.datetime(2023, 1, 1, 0, 0), 42)
+    """
+    data = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple:
+    """Decode a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (str): the url-safe cursor.
+
+    Returns:
+        tuple: the values of the sort key columns.
+
+    Raises:
+        InvalidCursorError: if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list):
+            raise TypeError(values)
+        return tuple(_decode_value(v) for v in values)
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError(cursor) from e
+
+
+def paginate(query: Select, columns: Sequence, limit: int, skip: int = 0,
+             cursor: Optional[str] = None) -> Select:
+    """Order the query by the sort key columns and select one page.
+
+    Args:
+        query (Select): the query to paginate.
+        columns (Sequence): the unique sort key columns, e.g. (created_at, id).
+        limit (int): the page size.
+        skip (int): number of rows to skip, only used without cursor.
+        cursor (Optional[str]): cursor of the last row of the previous page.
+
+    Returns:
+        Select: the query selecting the page.
+
+    Raises:
+        InvalidCursorError: if the cursor is malformed.
+    """
+    query = query.order_by(*columns)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(columns):
+            raise InvalidCursorError(cursor)
+        if len(columns) == 1:
+            query = query.filter(columns[0] > values[0])
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def next_cursor(rows: List[Any], limit: int, *attrs: str) -> Optional[str]:
+    """Build the cursor of the page following the given rows.
+
+    Args:
+        rows (List[Any]): the rows of the current page.
+        limit (int): the page size.
+        *attrs (str): names of the sort key attributes.
+
+    Returns:
+        Optional[str]: the cursor, None if the page is the last one.
+    """
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(*(getattr(last, attr) for attr in attrs))
@@ -0,0 +1,73 @@
+"""Define a helper coalescing concurrent identical calls into one."""
+import asyncio
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Run at most one call per key at a time, concurrent calls with the same
+    key wait for the call in flight and share its result or exception.
+
+    The shared call is shielded, a cancelled caller does not cancel it for the
+    other callers.
+
+    Examples:
+
+        >>> async def main():
+        ...     flights = SingleFlight()
+        ...     async def fetch():
+        ...         await asyncio.sleep(0.01)
+        ...         return "result"
+        ...     results = await asyncio.gather(*(flights.do("key", fetch) for _ in range(3)))
+        ...     return results, flights.stats()
+        >>> asyncio.run(main())
+        (['result', 'result', 'result'], {'calls': 3, 'coalesced': 2, 'in_flight': 0})
+    """
+
+    def __init__(self):
+        # futures are bound to a loop, keep the calls in flight per loop
+        self._flights: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.calls = 0
+        self.coalesced = 0
+
+    def _get_flights(self) -> Dict[Hashable, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        flights = self._flights.get(loop)
+        if flights is None:
+            flights = self._flights[loop] = {}
+        return flights
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Call func, unless a call with the same key is already in flight.
+
+        Args:
+            key (Hashable): identifies equivalent calls.
+            func (Callable): coroutine function making the call.
+
+        Returns:
+            Any: the result of the call in flight.
+        """
+        flights = self._get_flights()
+        self.calls += 1
+        future = flights.get(key)
+        if future is None:
+            future = flights[key] = asyncio.ensure_future(func())
+            future.add_done_callback(lambda f: self._done(flights, key, f))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    @staticmethod
+    def _done(flights: Dict[Hashable, asyncio.Future], key: Hashable,
+              future: asyncio.Future) -> None:
+        if flights.get(key) is future:
+            del flights[key]
+        if not future.cancelled():
+            # mark the exception as retrieved, even if every caller is gone
+            future.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Report the calls, the calls that joined a call in flight and the
+        number of calls in flight."""
+        in_flight = sum(len(flights) for flights in self._flights.values())
+        return dict(calls=self.calls, coalesced=self.coalesced, in_flight=in_flight)
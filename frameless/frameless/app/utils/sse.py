@@ -0,0 +1,24 @@
+"""Define helpers for server-sent events (SSE) responses."""
+import json
+from typing import Any
+
+# headers of an event stream, proxies must neither cache nor buffer it
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format a server-sent event, its data is encoded as JSON on one line.
+
+    Args:
+        event (str): the name of the event.
+        data (Any): the JSON serializable data of the event.
+
+    Returns:
+        str: the event, terminated by a blank line.
+
+    Examples:
+
+        >>> format_sse("title", dict(title="Hello"))
+        'event: title\\ndata: {"title": "Hello"}\\n\\n'
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,260 @@
+"""Define the serving of the static files of the web interface and of the
+uploaded images.
+
+Files whose name carries a content hash, e.g. the uploads named by their
+sha256 or a build asset such as app.3f2a9c1d.js, never change and are cached
+as immutable, the others are revalidated with their ETag. The uploads include
+private images, they are only cached by the clients, never by shared caches. Precompressed .br
+and .gz variants written at build time by `precompress` are served to the
+clients accepting them, and single byte ranges are supported.
+
+Write the precompressed variants of the static files with:
+
+    python -m app.utils.static static
+"""
+import gzip
+import os
+import re
+import sys
+from mimetypes import guess_type
+from typing import List, Optional, Tuple
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# a hex digest of 8 to 64 characters delimited in the file name
+FINGERPRINT = re.compile(r"(?:^|[._-])[0-9a-f]{8,64}(?:[._-]|$)")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+PRIVATE_IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# content encodings of the precompressed variants, by preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".svg", ".txt", ".map")
+CHUNK_SIZE = 64 * 1024
+
+
+def accepted_encodings(header: Optional[str]) -> List[str]:
+    """Get the content encodings accepted by an Accept-Encoding header.
+
+    Examples:
+
+        >>> accepted_encodings("gzip, deflate, br;q=0")
+        ['gzip', 'deflate']
+    """
+    encodings = []
+    for item in (header or "").split(","):
+        encoding, _, params = item.strip().partition(";")
+        if encoding and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.append(encoding.strip())
+    return encodings
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse the Range header of a request for a file of the given size.
+
+    Only a single range is supported, a header with several ranges or a
+    malformed one is ignored, the whole file is sent then.
+
+    Args:
+        header (Optional[str]): the Range header.
+        size (int): the size of the file.
+
+    Returns:
+        Optional[Tuple[int, int]]: the first and last byte of the range.
+
+    Raises:
+        ValueError: if the range is not satisfiable.
+
+    Examples:
+
+        >>> parse_range("bytes=0-99", 1000), parse_range("bytes=900-", 1000)
+        ((0, 99), (900, 999))
+        >>> parse_range("bytes=-100", 1000), parse_range("bytes=0-1,5-6", 1000)
+        ((900, 999), None)
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, separator, end = header[len("bytes="):].strip().partition("-")
+    if not separator or not (start or end) or not all(v.isdigit() for v in (start, end) if v):
+        return None
+    if not start:
+        if int(end) == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - int(end), 0), size - 1
+    if int(start) >= size or (end and int(end) < int(start)):
+        raise ValueError(header)
+    return int(start), min(int(end), size - 1) if end else size - 1
+
+
+class RangeFileResponse(FileResponse):
+    """File response sending the given range of the file only.
+
+    The body is sent zero-copy when the server supports the ASGI pathsend or
+    zerocopysend extension, else read by chunks in a worker thread.
+    """
+
+    def __init__(self, *args, offset: int = 0, count: Optional[int] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.offset = offset
+        self.count = count
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code,
+                    "headers": self.raw_headers})
+        extensions = scope.get("extensions") or {}
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.pathsend" in extensions and self.count is None:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+        elif "http.response.zerocopysend" in extensions:
+            file = await anyio.to_thread.run_sync(open, self.path, "rb")
+            try:
+                message = {"type": "http.response.zerocopysend", "file": file,
+                           "offset": self.offset}
+                if self.count is not None:
+                    message["count"] = self.count
+                await send(message)
+            finally:
+                await anyio.to_thread.run_sync(file.close)
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.offset)
+                remaining = self.count
+                more_body = True
+                while more_body:
+                    size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+                    chunk = await file.read(size)
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    more_body = len(chunk) == size and remaining != 0
+                    await send({"type": "http.response.body", "body": chunk,
+                                "more_body": more_body})
+        if self.background is not None:
+            await self.background()
+
+
+class MediaFiles(StaticFiles):
+    """Static files with immutable caching of fingerprinted files,
+    precompressed variants and range requests.
+
+    Args:
+        public (bool): whether shared caches, e.g. CDNs, may store the
+            fingerprinted files, else only the clients do.
+    """
+
+    def __init__(self, *args, public: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.public = public
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope,
+                      status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        file_name = os.path.basename(full_path)
+        media_type = guess_type(file_name)[0] or "text/plain"
+        if not FINGERPRINT.search(file_name):
+            cache_control = REVALIDATE_CACHE_CONTROL
+        elif self.public:
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            cache_control = PRIVATE_IMMUTABLE_CACHE_CONTROL
+        headers = {"Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+        path = full_path
+
+        variants = self._encoded_variants(full_path, stat_result)
+        if variants:
+            headers["Vary"] = "Accept-Encoding"
+        range_header = request_headers.get("range")
+        if variants and not range_header:
+            accepted = accepted_encodings(request_headers.get("accept-encoding"))
+            for encoding, variant_path, variant_stat in variants:
+                if encoding in accepted:
+                    headers["Content-Encoding"] = encoding
+                    path, stat_result = variant_path, variant_stat
+                    break
+
+        response = RangeFileResponse(path, status_code=status_code, headers=headers,
+                                     media_type=media_type, stat_result=stat_result,
+                                     method=scope["method"])
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        if_range = request_headers.get("if-range")
+        if status_code != 200 or (range_header and if_range not in (
+                None, response.headers["etag"], response.headers["last-modified"])):
+            return response
+        size = stat_result.st_size
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        if byte_range is None:
+            return response
+        start, end = byte_range
+        headers.update({"Content-Range": f"bytes {start}-{end}/{size}",
+                        "Content-Length": str(end - start + 1)})
+        return RangeFileResponse(path, status_code=206, headers=headers, media_type=media_type,
+                                 stat_result=stat_result, method=scope["method"],
+                                 offset=start, count=end - start + 1)
+
+    async def check_config(self) -> None:
+        # the upload directory only exists after the first upload, until then
+        # its files are not found rather than the mount failing
+        if self.directory is not None and not await anyio.to_thread.run_sync(
+                os.path.exists, self.directory):
+            return
+        await super().check_config()
+
+    @staticmethod
+    def _encoded_variants(full_path, stat_result: os.stat_result) -> List[Tuple]:
+        # a variant older than the file is stale and never served
+        variants = []
+        for encoding, suffix in ENCODINGS:
+            try:
+                variant_stat = os.stat(f"{full_path}{suffix}")
+            except FileNotFoundError:
+                continue
+            if variant_stat.st_mtime >= stat_result.st_mtime:
+                variants.append((encoding, f"{full_path}{suffix}", variant_stat))
+        return variants
+
+
+def precompress(directory: str, min_size: int = 1024) -> List[str]:
+    """Write the gzip and, if brotli is installed, brotli variants next to the
+    compressible files of a directory, at build time.
+
+    Args:
+        directory (str): the directory, searched recursively.
+        min_size (int): smaller files are not worth compressing.
+
+    Returns:
+        list: the paths of the written variants.
+    """
+    written = []
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            path = os.path.join(root, file_name)
+            if not file_name.endswith(COMPRESSIBLE_EXTENSIONS) or os.path.getsize(path) < min_size:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            compressed = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                compressed.append((".br", brotli.compress(data, quality=11)))
+            for suffix, body in compressed:
+                if len(body) < len(data):
+                    with open(f"{path}{suffix}", "wb") as f:
+                        f.write(body)
+                    written.append(f"{path}{suffix}")
+    return written
+
+
+if __name__ == "__main__":
+    for variant in precompress(sys.argv[1]):
+        print(variant)
@@ -0,0 +1,54 @@
+"""Define helpers for storing uploaded files."""
+import hashlib
+import os
+from typing import Tuple
+import aiofiles
+from fastapi import UploadFile
+from .errors import UploadTooLargeError
+
+
+async def save_upload(file: UploadFile, path: str, chunk_size: int = 64 * 1024,
+                      max_size: int = None) -> Tuple[int, str]:
+    """Stream the uploaded file to disk in fixed-size chunks.
+
+    At most one chunk is held in memory, the sha256 digest and the size are
+    computed on the fly. The data is written to a temporary file next to the
+    target, which is renamed once the upload is complete, so a failed upload
+    never leaves a partial file behind.
+
+    The file was spooled by Starlette while the form was parsed already, the
+    size of the whole request body is limited before, by the
+    BodySizeLimitMiddleware.
+
+    Args:
+        file (UploadFile): the uploaded file.
+        path (str): the target path.
+        chunk_size (int): number of bytes read per chunk.
+        max_size (int): maximum allowed size in bytes, unlimited if None.
+
+    Returns:
+        tuple: the size in bytes and the hex sha256 digest of the content.
+
+    Raises:
+        UploadTooLargeError: if the file is larger than max_size.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = f"{path}.part"
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise UploadTooLargeError(max_size)
+                digest.update(chunk)
+                await f.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size, digest.hexdigest()
@@ -0,0 +1,103 @@
+"""Checks of the URLs given by clients which the server sends requests to,
+e.g. webhooks, so they cannot reach the loopback, link-local (cloud metadata)
+or private addresses of the server network."""
+import asyncio
+import ipaddress
+import socket
+from typing import Any, List, Optional
+from urllib.parse import urlsplit
+import httpx
+from .errors import UnsafeURLError
+
+LOCAL_HOSTNAMES = {"localhost", "localhost.localdomain", "ip6-localhost", "ip6-loopback"}
+
+
+def is_public_address(address: str) -> bool:
+    """Whether the IP address is globally reachable.
+
+    >>> is_public_address("93.184.216.34")
+    True
+    >>> [is_public_address(a) for a in ("127.0.0.1", "169.254.169.254", "10.0.0.1",
+    ...                                 "::1", "::ffff:10.0.0.1")]
+    [False, False, False, False, False]
+    """
+    ip = ipaddress.ip_address(address)
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_public_host(host: str) -> None:
+    """Check the host of a URL is not a local name nor a non public IP address,
+    without resolving it.
+
+    Raises:
+        UnsafeURLError: if the host is local.
+    """
+    host = host.strip("[]").rstrip(".").lower()
+    if host in LOCAL_HOSTNAMES or host.endswith(".localhost"):
+        raise UnsafeURLError(f"Local host {host}")
+    try:
+        public = is_public_address(host)
+    except ValueError:
+        # a host name, checked once it is resolved
+        return
+    if not public:
+        raise UnsafeURLError(f"Non public address {host}")
+
+
+async def resolve_public_url(url: str) -> List[str]:
+    """Resolve the host of the URL and check all its addresses are public.
+
+    Returns:
+        List[str]: the addresses of the host.
+
+    Raises:
+        UnsafeURLError: if the URL is not http(s), or its host is local or
+            resolves to a non public address.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeURLError(f"Invalid URL {url}")
+    check_public_host(parts.hostname)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            parts.hostname, parts.port or (443 if parts.scheme == "https" else 80),
+            type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise UnsafeURLError(f"Unresolvable host {parts.hostname}") from e
+    addresses = [info[4][0] for info in infos]
+    for address in addresses:
+        if not is_public_address(address.split("%", 1)[0]):
+            raise UnsafeURLError(
+                f"Host {parts.hostname} resolves to non public address {address}")
+    return addresses
+
+
+class PublicAddressTransport(httpx.AsyncBaseTransport):
+    """HTTP transport sending requests to public addresses only.
+
+    The host of each request is resolved and checked by `resolve_public_url`,
+    and the request is sent to the checked address, so that the host cannot
+    resolve to another address in between (DNS rebinding). The request keeps
+    its Host header, and the host name is sent as TLS SNI and verified against
+    the certificate.
+
+    Args:
+        transport (Optional[httpx.AsyncBaseTransport]): the transport sending
+            the requests to the addresses, a pooled AsyncHTTPTransport created
+            with the other arguments by default.
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None, **kwargs: Any):
+        self.transport = transport or httpx.AsyncHTTPTransport(**kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        addresses = await resolve_public_url(str(request.url))
+        request.url = request.url.copy_with(host=addresses[0].split("%", 1)[0])
+        request.extensions = dict(request.extensions, sni_hostname=host)
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,12 @@
+#! /usr/bin/env sh
+# Apply the database migrations once, before the app workers are started. The
+# tiangolo/uvicorn-gunicorn image runs /app/prestart.sh on start up.
+set -e
+
+cd "$(dirname "$0")"
+# the app package is next to this script in the image, in the repository it
+# is in the frameless folder
+if [ ! -f app/db/queries/init_db.py ]; then
+    cd ../frameless
+fi
+python -m app.db.queries.init_db
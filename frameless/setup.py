@@ -56,7 +56,8 @@ setup(name=NAME,
       url=URL,
       packages=find_packages(include=["frameless*"],
                              exclude=["tests*", "scripts*", "docs*"]),
-      package_data={NAME: ["data/*", ], },
+      package_data={NAME: ["data/*", "alembic.ini", "app/db/migrations/*",
+                           "app/db/migrations/versions/*.py"], },
       install_requires=INSTALL_REQUIRED,
       test_requires=DEV_REQUIRED,
       extras_require=EXTRAS,
@@ -1,8 +1,16 @@
+import httpx
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from frameless.app.application import create_application
-from frameless.app.db.session import engine, SessionLocal
+from frameless.app.db.session import get_engine, get_session_factory, get_db
 from frameless.app.db.base import Base
+from frameless.app.db import models  # noqa: F401, register all tables
+from fake_s3_server import FAKE_ACCESS_KEY, FAKE_SECRET_KEY, create_fake_app
+from frameless.app.storage.s3 import S3Storage
 @pytest.fixture
 def test_client():
     app = create_application()
@@ -12,10 +20,71 @@ def test_client():
 
 @pytest.fixture
 def db_session():
+    engine = get_engine()
     Base.metadata.create_all(engine)
-    session = SessionLocal()
+    session = get_session_factory()()
     yield session
     session.close()
     Base.metadata.drop_all(engine)
     engine.dispose()
 
+
+@pytest_asyncio.fixture
+async def async_db_session():
+    # aiosqlite is used as an in-memory stand-in for the async postgres engine
+    async_engine = create_async_engine("sqlite+aiosqlite://")
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=async_engine, autoflush=False,
+                                         expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def db_statements(async_db_session):
+    # the statements sent by async_db_session, each one is a round-trip
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    sync_engine = async_db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def api_client(tmp_path, monkeypatch):
+    # the endpoints run on a sqlite file, TestClient runs the app in its own
+    # event loop, thus connections are not pooled across requests
+    db_path = tmp_path / "frameless.db"
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    session_factory = async_sessionmaker(bind=async_engine, autoflush=False,
+                                         expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app = create_application()
+    app.dependency_overrides[get_db] = override_get_db
+    # the start up recovers the content jobs of the same database
+    monkeypatch.setattr("frameless.app.events.base.get_async_engine", lambda: async_engine)
+    return TestClient(app)
+
+
+@pytest.fixture
+def s3_storage(monkeypatch):
+    # an S3 storage backed by the fake object store, `storage.transport.app`
+    storage = S3Storage("http://s3.test/images", FAKE_ACCESS_KEY, FAKE_SECRET_KEY,
+                        transport=httpx.ASGITransport(app=create_fake_app()))
+    for module in ("services.image_service", "services.image_variant_service",
+                   "schemas.image"):
+        monkeypatch.setattr(f"frameless.app.{module}.get_storage", lambda: storage)
+    return storage
@@ -0,0 +1,62 @@
+"""A local stand-in of the chat completions endpoint of an OpenAI compatible
+API, answering with canned text after a fixed latency, word by word if the
+request asks for a stream.
+
+It is used by the tests and benchmarks, and can serve as the API in
+development, e.g. with CONTENT_GENERATOR_API_URL=http://localhost:8001/v1, run
+from the tests folder:
+
+    FAKE_GENERATOR_LATENCY_SECONDS=0.5 uvicorn fake_generator_server:app --port 8001
+"""
+import asyncio
+import json
+import os
+import re
+from typing import Any
+from fastapi import FastAPI, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+
+def create_fake_app(latency: float = 0.0, failures: int = 0) -> FastAPI:
+    """Create the fake API app.
+
+    Args:
+        latency (float): seconds each completion takes.
+        failures (int): number of first requests answered with 503, to
+            exercise the retries of the client.
+
+    Returns:
+        FastAPI: the fake API app, its `state.requests` counts the requests.
+    """
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request, response: Response) -> Any:
+        app.state.requests += 1
+        if app.state.requests <= failures:
+            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+            return dict(error=dict(message="Service unavailable"))
+        payload = await request.json()
+        await asyncio.sleep(latency)
+        prompt = payload["messages"][-1]["content"]
+        if payload.get("stream"):
+            return StreamingResponse(_stream_chunks(f"Fake: {prompt}", payload.get("model")),
+                                     media_type="text/event-stream")
+        return dict(object="chat.completion", model=payload.get("model"),
+                    choices=[dict(index=0, finish_reason="stop",
+                                  message=dict(role="assistant", content=f"Fake: {prompt}"))])
+
+    return app
+
+
+async def _stream_chunks(text: str, model: str):
+    # one chunk per word, in the format of the streamed chat completions
+    for word in re.findall(r"\S+\s*", text):
+        chunk = dict(object="chat.completion.chunk", model=model,
+                     choices=[dict(index=0, finish_reason=None, delta=dict(content=word))])
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+app = create_fake_app(latency=float(os.getenv("FAKE_GENERATOR_LATENCY_SECONDS", "0.2")))
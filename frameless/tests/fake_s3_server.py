@@ -0,0 +1,84 @@
+"""A local stand-in of an S3 compatible object store such as MinIO, keeping
+the objects in memory and only accepting requests pre-signed with its keys.
+
+It is used by the tests, and can serve as the bucket in development, e.g.
+with IMAGE_STORAGE_BACKEND=s3, IMAGE_STORAGE_S3_URL=http://localhost:9000/images
+and the keys below as IMAGE_STORAGE_S3_ACCESS_KEY and _SECRET_KEY, run from
+the tests folder:
+
+    uvicorn fake_s3_server:app --port 9000
+"""
+import base64
+import hashlib
+import hmac
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI, Request, Response, status
+from frameless.app.storage.s3 import presign
+
+FAKE_ACCESS_KEY = "fake-access-key"
+FAKE_SECRET_KEY = "fake-secret-key"
+
+
+def create_fake_app(access_key: str = FAKE_ACCESS_KEY, secret_key: str = FAKE_SECRET_KEY,
+                    region: str = "us-east-1") -> FastAPI:
+    """Create the fake object store app.
+
+    Args:
+        access_key (str): the access key id the requests must be signed with.
+        secret_key (str): the secret access key.
+        region (str): the region of the bucket.
+
+    Returns:
+        FastAPI: the fake object store app, its `state.objects` maps the paths
+        to the content and media type of the objects, `state.requests` counts
+        the requests by method.
+    """
+    app = FastAPI()
+    app.state.objects = {}
+    app.state.requests = {}
+
+    @app.api_route("/{path:path}", methods=["GET", "HEAD", "PUT", "DELETE"])
+    async def handle(path: str, request: Request) -> Response:
+        app.state.requests[request.method] = app.state.requests.get(request.method, 0) + 1
+        if not _is_signed(request, access_key, secret_key, region):
+            return Response(status_code=status.HTTP_403_FORBIDDEN)
+        if request.method == "PUT":
+            body = await request.body()
+            checksum = request.headers.get("x-amz-checksum-sha256")
+            if checksum and base64.b64decode(checksum) != hashlib.sha256(body).digest():
+                return Response(status_code=status.HTTP_400_BAD_REQUEST)
+            app.state.objects[path] = (body, request.headers.get("content-type"))
+            return Response()
+        if request.method == "DELETE":
+            app.state.objects.pop(path, None)
+            return Response(status_code=status.HTTP_204_NO_CONTENT)
+        if path not in app.state.objects:
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+        body, media_type = app.state.objects[path]
+        if request.method == "HEAD":
+            return Response(headers={"content-length": str(len(body))}, media_type=media_type)
+        return Response(body, media_type=media_type)
+
+    return app
+
+
+def _is_signed(request: Request, access_key: str, secret_key: str, region: str) -> bool:
+    # sign the request again with the signed headers it carries and compare
+    query = request.query_params
+    try:
+        signed_at = datetime.strptime(query["X-Amz-Date"], "%Y%m%dT%H%M%SZ")
+        expires = int(query["X-Amz-Expires"])
+        headers = {name: request.headers.get(name, "")
+                   for name in query["X-Amz-SignedHeaders"].split(";") if name != "host"}
+    except (KeyError, ValueError):
+        return False
+    signed_at = signed_at.replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) > signed_at + timedelta(seconds=expires):
+        return False
+    url = f"{request.url.scheme}://{request.headers['host']}{request.url.path}"
+    expected = presign(request.method, url, access_key, secret_key, region, expires,
+                       headers=headers, now=signed_at)
+    return hmac.compare_digest(expected.rsplit("=", 1)[1], query.get("X-Amz-Signature", ""))
+
+
+app = create_fake_app()
@@ -0,0 +1,48 @@
+import unittest.mock as mock
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from frameless.app.api.auth import create_access_token, get_current_user
+from frameless.app.schemas.user import UserCreate, UserUpdate
+from frameless.app.services.user_service import UserService, get_token_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    get_token_cache().clear()
+    yield
+    get_token_cache().clear()
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_cached(async_db_session):
+    user_service = UserService(async_db_session)
+    user = await user_service.create_user(UserCreate(username="dummy",
+                                                     email="dummy@example.com",
+                                                     password="dummy_password"))
+    token = create_access_token({"sub": "dummy"})
+    current_user = await get_current_user(token, async_db_session)
+    assert current_user.id == user.id
+
+    # the second call must be served without touching the database
+    unused_db = mock.MagicMock()
+    assert await get_current_user(token, unused_db) == current_user
+    assert unused_db.mock_calls == []
+
+    await user_service.update_user(user.id, UserUpdate(email="new@example.com"))
+    current_user = await get_current_user(token, async_db_session)
+    assert current_user.email == "new@example.com"
+
+    await user_service.delete_user(user.id)
+    with pytest.raises(HTTPException) as e:
+        await get_current_user(token, async_db_session)
+    assert e.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_expired_token(async_db_session):
+    token = create_access_token({"sub": "dummy"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(HTTPException) as e:
+        await get_current_user(token, async_db_session)
+    assert e.value.status_code == 401
+    assert len(get_token_cache()) == 0
@@ -5,3 +5,12 @@ def test_get_version(test_client):
     response = test_client.get("/api/v1/version")
     assert response.status_code == 200
     assert response.json() == {"version": __version__}
+
+
+def test_get_pool_stats(test_client):
+    response = test_client.get("/api/v1/db/pool")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["pool"] == "TimedAsyncAdaptedQueuePool"
+    assert {"pid", "size", "checked_out", "overflow", "avg_wait_seconds"} <= stats.keys()
+    assert stats["replicas"] == []
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from frameless.app.db.models.job import GenerationJob
+from frameless.app.events import base as events
+from frameless.app.services.content_job_service import ContentJobQueue
+
+
+def dummy_content(i):
+    return dict(title=f"title {i}", theme="adventure", content=f"content {i}",
+                image_url_1="https://example.com/1.png",
+                image_url_2="https://example.com/2.png",
+                image_url_3="https://example.com/3.png",
+                caption_1="caption 1", caption_2="caption 2", caption_3="caption 3",
+                owner_id=1)
+
+
+def test_list_content_with_cursor(api_client):
+    ids = [api_client.post("/api/v1/content/content", json=dummy_content(i)).json()["id"]
+           for i in range(5)]
+    pages, cursor = [], None
+    while True:
+        params = dict(limit=2, cursor=cursor) if cursor else dict(limit=2)
+        response = api_client.get("/api/v1/content/content", params=params)
+        assert response.status_code == 200
+        pages.append([c["id"] for c in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert pages == [ids[0:2], ids[2:4], ids[4:]]
+
+    response = api_client.get("/api/v1/content/content", params=dict(skip=1, limit=2))
+    assert [c["id"] for c in response.json()] == ids[1:3]
+
+
+def test_list_content_invalid_cursor(api_client):
+    response = api_client.get("/api/v1/content/content", params=dict(cursor="invalid"))
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+def test_content_job(api_client):
+    with api_client:
+        response = api_client.post("/api/v1/content/content/generate/jobs",
+                                   json=dict(theme="adventure", owner_id=1))
+        assert response.status_code == 202
+        assert response.json()["status"] in {"queued", "running", "done"}
+        job_url = response.headers["Location"]
+        assert job_url.endswith(f"/api/v1/content/content/jobs/{response.json()['id']}")
+        for _ in range(100):
+            job = api_client.get(job_url).json()
+            if job["status"] == "done":
+                break
+            time.sleep(0.01)
+        assert job["status"] == "done"
+        response = api_client.get(f"/api/v1/content/content/{job['content_id']}")
+        assert response.json()["theme"] == "adventure"
+
+
+def test_content_job_queue_full(api_client, monkeypatch):
+    def put(*args):
+        raise asyncio.QueueFull()
+
+    monkeypatch.setattr(ContentJobQueue, "put", put)
+    with api_client:
+        response = api_client.post("/api/v1/content/content/generate/jobs",
+                                   json=dict(theme="adventure", owner_id=1))
+        assert response.status_code == 503
+    # the rejected job is not left queued
+    assert asyncio.run(job_statuses()) == ["failed"]
+
+
+def test_content_job_recovered(api_client):
+    # jobs left behind by a restart, the running one is stale
+    rows = [dict(id="queued", status="queued", request=dict(theme="adventure", owner_id=1)),
+            dict(id="running", status="running", request=dict(theme="adventure", owner_id=1),
+                 started_at=datetime.utcnow() - timedelta(hours=1))]
+    asyncio.run(insert_jobs(rows))
+    with api_client:
+        for _ in range(100):
+            job = api_client.get("/api/v1/content/content/jobs/queued").json()
+            if job["status"] == "done":
+                break
+            time.sleep(0.01)
+        assert job["status"] == "done"
+        job = api_client.get("/api/v1/content/content/jobs/running").json()
+        assert job["status"] == "failed"
+        assert job["error"] == "Interrupted by a restart"
+
+
+async def insert_jobs(rows):
+    async with AsyncSession(events.get_async_engine()) as db:
+        await db.execute(insert(GenerationJob), rows)
+        await db.commit()
+
+
+async def job_statuses():
+    # the database of the api client, see conftest
+    async with AsyncSession(events.get_async_engine()) as db:
+        return list(await db.scalars(select(GenerationJob.status)))
+
+
+def test_content_job_not_found(api_client):
+    response = api_client.get("/api/v1/content/content/jobs/dummy")
+    assert response.status_code == 404
+
+
+def test_generation_stats(api_client):
+    response = api_client.get("/api/v1/content/content/generate/stats")
+    assert response.status_code == 200
+    assert set(response.json()["cache"]) == {"memory", "disk", "bypasses"}
+    assert set(response.json()["coalescing"]) == {"calls", "coalesced", "in_flight"}
+
+
+def test_stream_generated_content(api_client):
+    response = api_client.post("/api/v1/content/content/generate/stream",
+                               json=dict(theme="adventure", owner_id=1))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    assert events[0] == ("title", {"title": "Generated adventure Story"})
+    event, content = events[-1]
+    assert event == "done"
+    assert content["content"] == "".join(data["content"] for name, data in events
+                                         if name == "content")
+    response = api_client.get(f"/api/v1/content/content/{content['id']}")
+    assert response.json()["caption_3"] == "Caption for adventure image 3"
+
+
+def test_create_contents_bulk(api_client):
+    response = api_client.post("/api/v1/content/content/bulk",
+                               json=[dummy_content(i) for i in range(3)])
+    assert response.status_code == 201
+    assert [c["title"] for c in response.json()] == ["title 0", "title 1", "title 2"]
+    # every invalid row is reported
+    response = api_client.post("/api/v1/content/content/bulk",
+                               json=[dict(dummy_content(i), title="") for i in range(2)])
+    assert response.status_code == 422
+    assert [e["loc"][:2] for e in response.json()["detail"]] == [["body", 0], ["body", 1]]
+
+
+def test_get_content_not_modified(api_client):
+    content_id = api_client.post("/api/v1/content/content",
+                                 json=dict(dummy_content(0), is_public=True)).json()["id"]
+    url = f"/api/v1/content/content/{content_id}"
+    response = api_client.get(url)
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "public, max-age=60"
+    response = api_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b"" and response.headers["ETag"] == etag
+    api_client.put(url, json=dict(title="updated", is_public=False))
+    response = api_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_list_content_not_modified(api_client):
+    api_client.post("/api/v1/content/content/bulk", json=[dummy_content(i) for i in range(2)])
+    response = api_client.get("/api/v1/content/content", params=dict(is_public=False))
+    etag = response.headers["ETag"]
+    response = api_client.get("/api/v1/content/content", params=dict(is_public=False),
+                              headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    api_client.post("/api/v1/content/content", json=dummy_content(2))
+    response = api_client.get("/api/v1/content/content", params=dict(is_public=False),
+                              headers={"If-None-Match": etag})
+    assert response.status_code == 200 and len(response.json()) == 3
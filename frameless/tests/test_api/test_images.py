@@ -0,0 +1,114 @@
+import hashlib
+import io
+import os
+import anyio
+import httpx
+from PIL import Image as PILImage
+from frameless.app.configs import get_settings
+from frameless.app.services.image_variant_service import shutdown_image_process_pool
+
+
+def test_list_images_next_cursor(api_client):
+    for i in range(3):
+        api_client.post("/api/v1/images/images",
+                        json=dict(url=f"https://example.com/{i}.png", owner_id=1))
+    response = api_client.get("/api/v1/images/images", params=dict(limit=2))
+    assert len(response.json()) == 2
+    assert "X-Next-Cursor" in response.headers
+    response = api_client.get("/api/v1/images/images", params=dict(limit=3))
+    assert len(response.json()) == 3
+    assert "X-Next-Cursor" in response.headers
+    response = api_client.get("/api/v1/images/images", params=dict(limit=4))
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_list_images_invalid_cursor(api_client):
+    response = api_client.get("/api/v1/images/images", params=dict(cursor="invalid"))
+    assert response.status_code == 400
+
+
+def test_upload_image_too_large(api_client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(get_settings(), "IMAGE_UPLOAD_MAX_BYTES", 10)
+    response = api_client.post("/api/v1/images/images/upload",
+                               files=dict(file=("dummy.png", b"x" * 11, "image/png")))
+    assert response.status_code == 413
+    assert os.listdir(tmp_path / "uploads" / "images") == []
+
+
+def test_upload_image_variants(api_client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (600, 400)).save(buffer, "PNG")
+    response = api_client.post("/api/v1/images/images/upload", params=dict(owner_id=1),
+                               files=dict(file=("dummy.png", buffer.getvalue(), "image/png")))
+    shutdown_image_process_pool()
+    assert response.status_code == 201
+    assert response.json()["variants"] == []
+    # the variants are generated in the background once the response is sent
+    response = api_client.get(f"/api/v1/images/images/{response.json()['id']}")
+    assert [(v["width"], v["format"]) for v in response.json()["variants"]] == [
+        (128, "jpeg"), (128, "webp"), (512, "jpeg"), (512, "webp")]
+
+
+def test_get_image_not_modified(api_client):
+    image_id = api_client.post("/api/v1/images/images",
+                               json=dict(url="https://example.com/1.png", owner_id=1)).json()["id"]
+    response = api_client.get(f"/api/v1/images/images/{image_id}")
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    response = api_client.get(f"/api/v1/images/images/{image_id}",
+                              headers={"If-None-Match": f'"x", {response.headers["ETag"]}'})
+    assert response.status_code == 304
+
+
+def test_direct_upload(api_client, s3_storage):
+    data = b"direct image"
+    upload = dict(filename="a.png", content_type="image/png", size=len(data),
+                  sha256=hashlib.sha256(data).hexdigest())
+    complete = dict(filename="a.png", sha256=upload["sha256"], owner_id=1)
+    response = api_client.post("/api/v1/images/images/uploads/complete", json=complete)
+    assert response.status_code == 409
+    response = api_client.post("/api/v1/images/images/uploads", json=upload)
+    assert response.status_code == 200
+    ticket = response.json()
+
+    async def put():
+        # the client uploads to the storage, not to the app
+        async with httpx.AsyncClient(transport=s3_storage.transport) as client:
+            return await client.put(ticket["upload_url"], content=data, headers=ticket["headers"])
+
+    assert anyio.run(put).status_code == 200
+
+    response = api_client.post("/api/v1/images/images/uploads/complete", json=complete)
+    assert response.status_code == 201
+    response = api_client.get(f"/api/v1/images/images/{response.json()['id']}/download",
+                              follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"].startswith(f"http://s3.test/images/{ticket['path']}?")
+
+
+def test_direct_upload_errors(api_client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    upload = dict(filename="a.png", content_type="image/png", size=10, sha256="0" * 64)
+    response = api_client.post("/api/v1/images/images/uploads", json=upload)
+    assert response.status_code == 501
+    monkeypatch.setattr(get_settings(), "IMAGE_UPLOAD_MAX_BYTES", 5)
+    response = api_client.post("/api/v1/images/images/uploads", json=upload)
+    assert response.status_code == 413
+    response = api_client.post("/api/v1/images/images/uploads/complete",
+                               json=dict(filename="a.png", sha256="0" * 64))
+    assert response.status_code == 501
+
+
+def test_download_image(api_client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    response = api_client.post("/api/v1/images/images/upload", params=dict(owner_id=1),
+                               files=dict(file=("dummy.png", b"dummy", "image/png")))
+    image = response.json()
+    response = api_client.get(f"/api/v1/images/images/{image['id']}/download",
+                              follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == image["url"]
+    response = api_client.get(f"/api/v1/images/images/{image['id']}/download")
+    assert response.content == b"dummy"
+    assert api_client.get("/api/v1/images/images/0/download").status_code == 404
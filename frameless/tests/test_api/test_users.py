@@ -0,0 +1,44 @@
+def test_list_users_with_cursor(api_client):
+    ids = [api_client.post("/api/v1/users/users",
+                           json=dict(username=f"dummy{i}", email=f"dummy{i}@example.com",
+                                     password=f"dummy_password{i}")).json()["id"]
+           for i in range(3)]
+    response = api_client.get("/api/v1/users/users", params=dict(limit=2))
+    assert [u["id"] for u in response.json()] == ids[:2]
+    cursor = response.headers["X-Next-Cursor"]
+    response = api_client.get("/api/v1/users/users", params=dict(limit=2, cursor=cursor))
+    assert [u["id"] for u in response.json()] == ids[2:]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_list_users_invalid_cursor(api_client):
+    response = api_client.get("/api/v1/users/users", params=dict(cursor="invalid"))
+    assert response.status_code == 400
+
+
+def test_create_users_bulk(api_client):
+    users = [dict(username=f"dummy{i}", email=f"dummy{i}@example.com",
+                  password=f"dummy_password{i}") for i in range(3)]
+    response = api_client.post("/api/v1/users/users/bulk", json=users)
+    assert response.status_code == 201
+    assert [u["username"] for u in response.json()] == ["dummy0", "dummy1", "dummy2"]
+
+    response = api_client.post("/api/v1/users/users/bulk", json=users[:1])
+    assert response.status_code == 409
+    response = api_client.post("/api/v1/users/users/bulk", json=[
+        dict(users[0], username="other"), dict(users[0], username="another")])
+    assert response.status_code == 422
+    assert response.json() == {"detail": "Duplicate email in the batch"}
+    response = api_client.post("/api/v1/users/users/bulk", json=[])
+    assert response.status_code == 422
+
+
+def test_list_users_not_modified(api_client):
+    api_client.post("/api/v1/users/users/bulk",
+                    json=[dict(username=f"user{i}", email=f"user{i}@example.com",
+                               password=f"password{i}") for i in range(2)])
+    response = api_client.get("/api/v1/users/users")
+    response = api_client.get("/api/v1/users/users",
+                              headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    assert response.headers["Cache-Control"] == "private, no-cache"
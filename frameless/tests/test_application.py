@@ -1,3 +1,4 @@
+import os
 import unittest.mock as mock
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
@@ -22,3 +23,17 @@ def test_create_application_with_cors_origins(mocked_get_settings):
                                  'allow_credentials': True,
                                  'allow_methods': ['GET'],
                                  'allow_headers': []}
+
+
+def test_static_and_uploads_mounted(test_client, tmp_path, monkeypatch):
+    response = test_client.get("/static/index.html")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    # the upload directory is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    assert test_client.get("/uploads/images/missing.png").status_code == 404
+    os.makedirs("uploads/images")
+    (tmp_path / "uploads/images/0f343b0931126a20.png").write_bytes(b"png")
+    response = test_client.get("/uploads/images/0f343b0931126a20.png")
+    assert response.content == b"png"
+    assert response.headers["cache-control"] == "private, max-age=31536000, immutable"
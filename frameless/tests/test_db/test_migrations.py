@@ -0,0 +1,210 @@
+from pathlib import Path
+import pytest
+import pytest_asyncio
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import (Boolean, Column, DateTime, ForeignKey, Integer, MetaData, String, Table,
+                        Text, create_engine, event, func, inspect, text)
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import frameless
+from frameless.app.db.base import Base
+from frameless.app.db.queries.init_db import migrate_db
+from frameless.app.services.content_service import ContentService
+from frameless.app.services.image_service import ImageService
+
+ALEMBIC_INI = Path(frameless.__file__).parent / "alembic.ini"
+
+
+def migrate(connection, revision="head", downgrade=False):
+    config = Config(str(ALEMBIC_INI))
+    config.attributes.update(connection=connection, configure_logger=False)
+    if downgrade:
+        command.downgrade(config, revision)
+    else:
+        command.upgrade(config, revision)
+
+
+def create_baseline_schema(connection):
+    """Create the tables as create_all built them before the migrations."""
+    metadata = MetaData()
+    Table("users", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("username", String, nullable=False, index=True, unique=True),
+          Column("email", String, nullable=False, unique=True, index=True),
+          Column("password", String, nullable=False, unique=True),
+          Column("hashed_password", String, nullable=False))
+    Table("images", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("is_public", Boolean, default=False),
+          Column("url", String, nullable=False),
+          Column("description", Text, nullable=True),
+          Column("created_at", DateTime(timezone=True), server_default=func.now()),
+          Column("owner_id", Integer, ForeignKey("users.id")))
+    Table("generated_content", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("is_story", Boolean, default=True),
+          Column("content", Text, nullable=False),
+          Column("title", Text, nullable=False),
+          Column("theme", String, nullable=False),
+          Column("is_public", Boolean, default=False),
+          Column("created_at", DateTime),
+          *[Column(f"{name}_{i}", String, nullable=False)
+            for name in ("image_url", "caption") for i in (1, 2, 3)],
+          Column("owner_id", Integer, ForeignKey("users.id")))
+    metadata.create_all(connection)
+    connection.execute(text("INSERT INTO users (id, username, email, password, hashed_password) "
+                            "VALUES (1, 'jane', 'jane@example.com', 'secret', 'hashed')"))
+    connection.execute(text("INSERT INTO images (id, is_public, url, owner_id) "
+                            "VALUES (1, 1, 'https://example.com/1.png', 1)"))
+
+
+def assert_matches_models(connection):
+    tables = set(inspect(connection).get_table_names()) - {"alembic_version"}
+    diffs = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    # tables defined by the tests are not migrated
+    assert [diff for diff in diffs if diff[0] != "add_table" or diff[1].name in tables] == []
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    db_path = tmp_path / "frameless.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as connection:
+        migrate(connection)
+    engine.dispose()
+    return db_path
+
+
+@pytest_asyncio.fixture
+async def migrated_db_session(db_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
+def test_migrations_match_models(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as connection:
+        assert_matches_models(connection)
+
+    with engine.connect() as connection:
+        migrate(connection, "base", downgrade=True)
+        assert set(inspect(connection).get_table_names()) == {"alembic_version"}
+    engine.dispose()
+
+
+def test_migrations_upgrade_baseline_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'frameless.db'}")
+    with engine.begin() as connection:
+        create_baseline_schema(connection)
+    with engine.connect() as connection:
+        config = Config(str(ALEMBIC_INI))
+        config.attributes.update(connection=connection, configure_logger=False)
+        command.stamp(config, "0001")
+        migrate(connection)
+    with engine.connect() as connection:
+        assert_matches_models(connection)
+        # the existing rows are kept, without content hash
+        rows = connection.execute(text("SELECT id, url, sha256 FROM images")).all()
+    engine.dispose()
+    assert rows == [(1, "https://example.com/1.png", None)]
+
+
+async def query_plan(session, run_query):
+    """Run the query and return the SQLite plan of its statement."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    sync_engine = session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        await run_query()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+    statement, parameters = statements[-1]
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return " ".join(row[-1] for row in result)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("filters, index", [
+    (dict(theme="adventure", is_public=False),
+     "ix_generated_content_theme_is_public_created_at_id"),
+    (dict(is_public=True), "ix_generated_content_public_created_at_id"),
+    (dict(), "ix_generated_content_created_at_id"),
+])
+async def test_content_list_query_plan(migrated_db_session, filters, index):
+    content_service = ContentService(migrated_db_session)
+    plan = await query_plan(migrated_db_session,
+                            lambda: content_service.get_content(limit=10, **filters))
+    assert f"USING INDEX {index}" in plan
+    # the index delivers the rows in the order of the sort key
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("filters, index", [
+    (dict(owner_id=1, is_public=False), "ix_images_owner_id_is_public_created_at_id"),
+    (dict(is_public=True), "ix_images_public_created_at_id"),
+    (dict(), "ix_images_created_at_id"),
+])
+async def test_image_list_query_plan(migrated_db_session, filters, index):
+    image_service = ImageService(migrated_db_session)
+    plan = await query_plan(migrated_db_session,
+                            lambda: image_service.get_images(limit=10, **filters))
+    assert f"USING INDEX {index}" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_migrated_owner_on_delete_set_null(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'frameless.db'}")
+    with engine.begin() as connection:
+        create_baseline_schema(connection)
+    migrate_db(engine)
+    with engine.begin() as connection:
+        connection.execute(text("PRAGMA foreign_keys = ON"))
+        connection.execute(text("DELETE FROM users WHERE id = 1"))
+        assert connection.execute(text("SELECT id, owner_id FROM images")).all() == [(1, None)]
+    engine.dispose()
+
+
+def test_migrate_db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'frameless.db'}")
+    migrate_db(engine)
+    with engine.connect() as connection:
+        assert MigrationContext.configure(connection).get_current_revision() == "0007"
+    engine.dispose()
+
+
+def test_migrate_db_created_by_create_all(tmp_path):
+    # the tables created by create_all before the migrations, without version
+    engine = create_engine(f"sqlite:///{tmp_path / 'frameless.db'}")
+    with engine.begin() as connection:
+        create_baseline_schema(connection)
+    migrate_db(engine)
+    with engine.connect() as connection:
+        assert MigrationContext.configure(connection).get_current_revision() == "0007"
+        assert_matches_models(connection)
+        assert {"image_blobs", "image_variants", "generation_jobs"} <= set(
+            inspect(connection).get_table_names())
+        assert connection.execute(text("SELECT sha256 FROM images")).all() == [(None,)]
+    engine.dispose()
+
+
+def test_migrate_db_unknown_tables(tmp_path):
+    # e.g. tables created by create_all of a later version, their revision is unknown
+    engine = create_engine(f"sqlite:///{tmp_path / 'frameless.db'}")
+    migrate_db(engine, "0003")
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+    with pytest.raises(RuntimeError, match="stamp"):
+        migrate_db(engine)
+    with engine.connect() as connection:
+        assert "alembic_version" not in inspect(connection).get_table_names()
+    engine.dispose()
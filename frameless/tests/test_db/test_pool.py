@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import NullPool
+from frameless.app.configs import Settings
+from frameless.app.db.pool import TimedNullPool, TimedQueuePool, pool_stats
+from frameless.app.db.session import pool_options
+
+
+def test_pool_stats(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'frameless.db'}", poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=1, pool_timeout=0.01)
+    first, second = engine.connect(), engine.connect()
+    stats = pool_stats(engine.pool)
+    assert stats["pool"] == "TimedQueuePool"
+    assert stats["size"] == 1
+    assert (stats["checked_in"], stats["checked_out"], stats["overflow"]) == (0, 2, 1)
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    first.close()
+    second.close()
+    stats = pool_stats(engine.pool)
+    assert (stats["checked_in"], stats["checked_out"], stats["overflow"]) == (1, 0, 0)
+    assert (stats["checkouts"], stats["timeouts"]) == (3, 1)
+    assert stats["max_wait_seconds"] >= 0.01
+    assert stats["avg_wait_seconds"] == pytest.approx(stats["wait_seconds"] / 3)
+    engine.dispose()
+
+
+def test_null_pool_stats(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'frameless.db'}", poolclass=TimedNullPool)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    stats = pool_stats(engine.pool)
+    assert stats["pool"] == "TimedNullPool" and "size" not in stats
+    assert (stats["checkouts"], stats["timeouts"]) == (1, 0)
+    engine.dispose()
+
+
+def test_pool_options(monkeypatch):
+    settings = Settings(SQLALCHEMY_POOL_SIZE=3, SQLALCHEMY_POOL_PRE_PING=True)
+    monkeypatch.setattr("frameless.app.db.session.get_settings", lambda: settings)
+    options = pool_options(is_async=True)
+    assert options["poolclass"].__name__ == "TimedAsyncAdaptedQueuePool"
+    assert options["pool_size"] == 3 and options["pool_pre_ping"]
+    assert pool_options()["poolclass"] is TimedQueuePool
+    monkeypatch.setattr(settings, "SQLALCHEMY_POOL_CLASS", "null")
+    assert pool_options() == dict(poolclass=TimedNullPool)
+    assert issubclass(TimedNullPool, NullPool)
@@ -0,0 +1,73 @@
+import time
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from frameless.app.db.base import Base
+from frameless.app.db.models.user import User
+from frameless.app.db.pool import TimedAsyncAdaptedQueuePool
+from frameless.app.db.routing import READ_PRIMARY, ReplicaSet, RoutingSession
+
+
+def test_replica_set_round_robin():
+    engines = [create_async_engine(f"sqlite+aiosqlite:///replica{i}.db",
+                                   poolclass=TimedAsyncAdaptedQueuePool) for i in range(3)]
+    replicas = ReplicaSet(engines, retry_seconds=30)
+    assert [replicas.choose() for _ in range(4)] == [*engines, engines[0]]
+    engines[1].pool.failed_at = time.monotonic()
+    assert [replicas.choose() for _ in range(3)] == [engines[2], engines[0], engines[2]]
+    engines[1].pool.failed_at -= 30
+    assert replicas.choose() is engines[0] and replicas.choose() is engines[1]
+    for engine in engines:
+        engine.pool.failed_at = time.monotonic()
+    assert replicas.choose() is None
+
+
+@pytest.mark.asyncio
+async def test_routing_session(tmp_path):
+    paths = [tmp_path / "primary.db", tmp_path / "replica.db"]
+    for path in paths:
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        engine.dispose()
+    primary, replica = [create_async_engine(f"sqlite+aiosqlite:///{path}") for path in paths]
+    session_factory = async_sessionmaker(bind=primary, expire_on_commit=False,
+                                         sync_session_class=RoutingSession,
+                                         replicas=ReplicaSet([replica], retry_seconds=30))
+    query = select(User.username)
+
+    async with session_factory() as session:
+        assert (await session.scalars(query)).all() == []
+        assert session.info["replica"] is replica
+        session.add(User(username="user", email="user@example.com", password="pw",
+                         hashed_password="hashed"))
+        await session.commit()
+        # the writing session reads its own writes
+        assert (await session.scalars(query)).all() == ["user"]
+    async with session_factory() as session:
+        assert (await session.scalars(query)).all() == []
+    async with session_factory(info={READ_PRIMARY: True}) as session:
+        assert (await session.scalars(query)).all() == ["user"]
+    await primary.dispose()
+    await replica.dispose()
+
+
+@pytest.mark.asyncio
+async def test_routing_session_replica_down(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    # the directory of the replica does not exist, connecting to it fails
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'down' / 'replica.db'}",
+                                  poolclass=TimedAsyncAdaptedQueuePool)
+    replicas = ReplicaSet([replica], retry_seconds=30)
+    session_factory = async_sessionmaker(bind=primary, expire_on_commit=False,
+                                         sync_session_class=RoutingSession, replicas=replicas)
+
+    async with session_factory() as session:
+        assert (await session.scalars(select(User.username))).all() == []
+        assert session.info[READ_PRIMARY]
+    assert replica.pool.failed_at is not None
+    assert replicas.choose() is None
+    await primary.dispose()
+    await replica.dispose()
@@ -1,7 +1,10 @@
 import pytest
 import unittest.mock as mock
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.session import Session
-from frameless.app.db.session import session_scope
+from frameless.app.db.routing import READ_PRIMARY, ReplicaSet
+from frameless.app.db.session import session_scope, get_db
 
 
 def test_session_scope():
@@ -9,13 +12,56 @@ def test_session_scope():
         assert isinstance(session, Session)
 
 
-@mock.patch("frameless.app.db.session.SessionLocal")
-def test_session_scope_fail(mocked_session_local_cls):
-    mocked_session_local_cls.return_value.commit.side_effect = Exception("dummy")
+@mock.patch("frameless.app.db.session.get_session_factory")
+def test_session_scope_fail(mocked_get_session_factory):
+    session = mocked_get_session_factory.return_value.return_value
+    session.commit.side_effect = Exception("dummy")
     with pytest.raises(Exception) as e:
         with session_scope():
             pass
-    mocked_session_local_cls.return_value.commit.assert_called_once()
-    mocked_session_local_cls.return_value.rollback.assert_called_once()
-    mocked_session_local_cls.return_value.close.assert_called_once()
+    session.commit.assert_called_once()
+    session.rollback.assert_called_once()
+    session.close.assert_called_once()
     assert str(e.value) == "dummy"
+
+
+@pytest.mark.asyncio
+async def test_get_db():
+    db_gen = get_db()
+    session = await db_gen.__anext__()
+    assert isinstance(session, AsyncSession)
+    with pytest.raises(StopAsyncIteration):
+        await db_gen.__anext__()
+
+
+@pytest.mark.asyncio
+@mock.patch("frameless.app.db.session.get_async_session_factory")
+async def test_get_db_fail(mocked_get_async_session_factory):
+    session = mocked_get_async_session_factory.return_value.return_value.__aenter__.return_value
+    session.rollback = mock.AsyncMock()
+    db_gen = get_db()
+    await db_gen.__anext__()
+    with pytest.raises(Exception) as e:
+        await db_gen.athrow(Exception("dummy"))
+    session.rollback.assert_awaited_once()
+    assert str(e.value) == "dummy"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method, cookie, set_cookie, read_primary",
+                         [("POST", "", True, False),
+                          ("DELETE", "", True, False),
+                          ("GET", "", False, False),
+                          ("GET", "read_primary=1", False, True)])
+async def test_get_db_read_primary(monkeypatch, method, cookie, set_cookie, read_primary):
+    monkeypatch.setattr("frameless.app.db.session.get_replica_set",
+                        lambda: ReplicaSet([], retry_seconds=30))
+    request = Request({"type": "http", "method": method,
+                       "headers": [(b"cookie", cookie.encode())]})
+    response = Response()
+    db_gen = get_db(request, response)
+    session = await db_gen.__anext__()
+    assert ("read_primary=1" in response.headers.get("set-cookie", "")) == set_cookie
+    assert session.info.get(READ_PRIMARY, False) == read_primary
+    with pytest.raises(StopAsyncIteration):
+        await db_gen.__anext__()
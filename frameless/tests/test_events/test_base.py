@@ -1,10 +1,12 @@
 from unittest import TestCase
+from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 from frameless.app.application import create_application
 
 
 class TestBaseEventHandler(TestCase):
-    def test_startup_handler(self):
+    @patch("frameless.app.events.base.recover_content_jobs", new_callable=AsyncMock)
+    def test_startup_handler(self, recover_content_jobs):
         app = create_application()
         with self.assertLogs('frameless', level='INFO') as cm:
 
@@ -13,3 +15,4 @@ class TestBaseEventHandler(TestCase):
             self.assertEqual(cm.output,
                              ['INFO:frameless:Starting up ...',
                               'INFO:frameless:Shutting down ...'])
+            recover_content_jobs.assert_awaited_once()
@@ -0,0 +1,31 @@
+import pytest
+from frameless.app.generators.cache import GenerationCache, generation_cache_key
+from frameless.app.schemas.content import ContentGenerate
+from frameless.app.utils.cache import SQLiteCache, TTLCache
+
+
+def test_generation_cache_key():
+    key = generation_cache_key(ContentGenerate(theme="Space  Pirates", owner_id=1))
+    assert key == generation_cache_key(ContentGenerate(theme="space pirates ", owner_id=2,
+                                                       is_public=True))
+    assert key != generation_cache_key(ContentGenerate(theme="space pirates", owner_id=1,
+                                                       is_story=False))
+    assert key != generation_cache_key(ContentGenerate(theme="space pirates", owner_id=1,
+                                                       prompt="a heist"))
+
+
+@pytest.mark.asyncio
+async def test_disk_tier(tmp_path):
+    request = ContentGenerate(theme="adventure", owner_id=1)
+    disk = SQLiteCache(str(tmp_path / "cache.db"))
+    cache = GenerationCache(TTLCache(), disk)
+    assert await cache.get(request) is None
+    await cache.set(request, dict(title="title"))
+    # a restarted worker finds the content on disk only
+    restarted = GenerationCache(TTLCache(), SQLiteCache(str(tmp_path / "cache.db")))
+    assert await restarted.get(request) == dict(title="title")
+    assert await restarted.get(request) == dict(title="title")
+    stats = restarted.stats()
+    assert stats["memory"]["hits"] == 1 and stats["disk"]["hits"] == 1
+    cache.close()
+    restarted.close()
@@ -0,0 +1,57 @@
+import time
+import httpx
+import pytest
+from fake_generator_server import create_fake_app
+from frameless.app.generators.openai import OpenAIContentGenerator
+from frameless.app.schemas.content import ContentGenerate
+from frameless.app.utils.errors import GenerationError
+
+
+def fake_generator(app, **kwargs):
+    return OpenAIContentGenerator(api_url="http://fake/v1", retry_backoff=0,
+                                  transport=httpx.ASGITransport(app=app), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_generate_concurrently():
+    app = create_fake_app(latency=0.2)
+    generator = fake_generator(app)
+    start = time.perf_counter()
+    generated = await generator.generate(ContentGenerate(theme="adventure", owner_id=1))
+    # the five parts are fetched at the same time
+    assert time.perf_counter() - start < 0.5
+    await generator.aclose()
+    assert app.state.requests == 5
+    assert generated["title"].startswith("Fake: Write a short title")
+    assert generated["caption_3"].startswith(
+        "Fake: Write a one sentence caption for illustration 3")
+    assert generated["image_url_1"].startswith("https://")
+
+
+@pytest.mark.asyncio
+async def test_complete_retries():
+    app = create_fake_app(failures=2)
+    generator = fake_generator(app, max_retries=2)
+    assert await generator.complete("hello") == "Fake: hello"
+    await generator.aclose()
+    assert generator.retries == 2
+    assert app.state.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_complete_fails_after_retries():
+    generator = fake_generator(create_fake_app(failures=3), max_retries=1)
+    with pytest.raises(GenerationError):
+        await generator.complete("hello")
+    await generator.aclose()
+    assert generator.retries == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_complete_retries():
+    app = create_fake_app(failures=1)
+    generator = fake_generator(app, max_retries=1)
+    pieces = [piece async for piece in generator.stream_complete("hello streamed world")]
+    await generator.aclose()
+    assert pieces == ["Fake: ", "hello ", "streamed ", "world"]
+    assert generator.retries == 1
@@ -0,0 +1,52 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from frameless.app.middlewares import BodySizeLimitMiddleware
+
+
+def create_app(calls):
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        calls.append(file.filename)
+        return {"size": len(await file.read())}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(BodySizeLimitMiddleware, max_sizes={"/upload": 1024})
+    return app
+
+
+def test_body_size_limit():
+    calls = []
+    client = TestClient(create_app(calls))
+    response = client.post("/upload", files=dict(file=("small.png", b"x" * 100, "image/png")))
+    assert response.status_code == 200
+    # rejected on the Content-Length, the form is never parsed
+    response = client.post("/upload", files=dict(file=("large.png", b"x" * 2048, "image/png")))
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body too large"}
+    assert calls == ["small.png"]
+    # other paths are not limited
+    response = client.post("/other", files=dict(file=("large.png", b"x" * 2048, "image/png")))
+    assert response.json() == {"size": 2048}
+
+
+def test_body_size_limit_chunked():
+    calls = []
+    client = TestClient(create_app(calls))
+
+    def body():
+        yield b"--boundary\r\nContent-Disposition: form-data; name=\"file\"; "
+        yield b"filename=\"large.png\"\r\nContent-Type: image/png\r\n\r\n"
+        for _ in range(4):
+            yield b"x" * 512
+        yield b"\r\n--boundary--\r\n"
+
+    # without Content-Length, the body is cut off once it exceeds the limit
+    response = client.post("/upload", content=body(),
+                           headers={"Content-Type": "multipart/form-data; boundary=boundary"})
+    assert response.status_code == 413
+    assert calls == []
@@ -1,17 +1,20 @@
 import unittest.mock as mock
 from unittest import TestCase
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
 from fastapi.testclient import TestClient
 from frameless.app.application import create_application
+from frameless.app.middlewares import TimingMiddleware
 
 
-class TestLogTime(TestCase):
+class TestTimingMiddleware(TestCase):
     def setUp(self):
         app = create_application()
         self.test_client = TestClient(app)
 
     @mock.patch("frameless.app.middlewares.logging.time")
     def test_log_time(self, mocked_time):
-        mocked_time.time.side_effect = [1, 2, 1, 2, 1, 2]
+        mocked_time.perf_counter_ns.side_effect = [10 ** 9, 2 * 10 ** 9] * 3
         with self.assertLogs('frameless', level='INFO') as cm:
             version_response = self.test_client.get("/api/v1/version")
             error_response = self.test_client.get("/api/v1/not_exist_page")
@@ -25,3 +28,35 @@ class TestLogTime(TestCase):
                               '"GET /api/v1/not_exist_page HTTP/1.1'
                               '" 404 Not Found - '
                               '1000.00ms'])
+
+    def test_streaming_response(self):
+        app = FastAPI()
+
+        @app.get("/stream")
+        async def stream():
+            async def chunks():
+                for i in range(3):
+                    yield f"{i}\n"
+            return StreamingResponse(chunks(), status_code=202)
+
+        app.add_middleware(TimingMiddleware)
+        with self.assertLogs('frameless', level='INFO') as cm:
+            response = TestClient(app).get("/stream")
+        self.assertEqual(response.text, "0\n1\n2\n")
+        self.assertIn('"GET /stream HTTP/1.1" 202 Accepted', cm.output[0])
+
+    def test_sample_rates(self):
+        middleware = TimingMiddleware(None, sample_rates={"/api": 0.5, "/api/v1/version": 0},
+                                      default_sample_rate=0.1)
+        self.assertEqual(middleware.sample_rate("/api/v1/version"), 0)
+        self.assertEqual(middleware.sample_rate("/api/v1/users"), 0.5)
+        self.assertEqual(middleware.sample_rate("/static/index.html"), 0.1)
+
+        app = FastAPI()
+        app.add_middleware(TimingMiddleware, sample_rates={"/skipped": 0})
+        test_client = TestClient(app)
+        with self.assertLogs('frameless', level='INFO') as cm:
+            test_client.get("/skipped")
+            test_client.get("/logged")
+        self.assertEqual(len(cm.output), 1)
+        self.assertIn("/logged", cm.output[0])
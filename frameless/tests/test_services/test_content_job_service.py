@@ -0,0 +1,65 @@
+import pytest
+from frameless.app.constants import JobStatus
+from frameless.app.generators.placeholder import PlaceholderContentGenerator
+from frameless.app.schemas.content import ContentJobCreate
+from frameless.app.services.content_job_service import ContentJobQueue, ContentJobService
+from frameless.app.utils.errors import GenerationError
+
+
+@pytest.mark.asyncio
+async def test_run_job(async_db_session):
+    job_service = ContentJobService(async_db_session)
+    job = await job_service.create_job(ContentJobCreate(theme="adventure", owner_id=1))
+    assert job.status == JobStatus.QUEUED
+    assert job.request["theme"] == "adventure"
+    job = await job_service.run_job(job.id)
+    assert job.status == JobStatus.DONE
+    assert job.content_id is not None and job.finished_at is not None
+    # a job is run only once
+    assert await job_service.run_job(job.id) is None
+
+
+@pytest.mark.asyncio
+async def test_run_job_failed(async_db_session, monkeypatch):
+    async def fail(*args):
+        raise GenerationError("model unavailable")
+
+    monkeypatch.setattr(PlaceholderContentGenerator, "generate_title", fail)
+    job_service = ContentJobService(async_db_session)
+    job = await job_service.create_job(ContentJobCreate(theme="adventure", owner_id=1,
+                                                        use_cache=False))
+    job = await job_service.run_job(job.id)
+    assert job.status == JobStatus.FAILED
+    assert job.error == "model unavailable"
+    assert job.content_id is None
+
+
+@pytest.mark.asyncio
+async def test_job_queue(async_db_session):
+    job_service = ContentJobService(async_db_session)
+    jobs = [await job_service.create_job(ContentJobCreate(theme="adventure", owner_id=1))
+            for _ in range(3)]
+    job_queue = ContentJobQueue(workers=1, maxsize=2)
+    job_queue.put(async_db_session.bind, jobs[0].id)
+    job_queue.put(async_db_session.bind, jobs[1].id)
+    assert job_queue.full()
+    await job_queue.join()
+    job_queue.put(async_db_session.bind, jobs[2].id)
+    await job_queue.join()
+    await job_queue.shutdown()
+    for job in jobs:
+        await async_db_session.refresh(job)
+        assert job.status == JobStatus.DONE
+
+
+@pytest.mark.asyncio
+async def test_fail_job(async_db_session):
+    job_service = ContentJobService(async_db_session)
+    job = await job_service.create_job(ContentJobCreate(theme="adventure", owner_id=1))
+    assert await job_service.get_queued_job_ids() == [job.id]
+    job = await job_service.fail_job(job.id, "Too many queued jobs")
+    assert job.status == JobStatus.FAILED and job.finished_at is not None
+    # a failed job is neither run nor failed again
+    assert await job_service.run_job(job.id) is None
+    assert await job_service.fail_job(job.id, "Too many queued jobs") is None
+    assert await job_service.get_queued_job_ids() == []
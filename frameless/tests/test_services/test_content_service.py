@@ -0,0 +1,171 @@
+import asyncio
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from fake_generator_server import create_fake_app
+from frameless.app.db.base import Base
+from frameless.app.generators.cache import GenerationCache
+from frameless.app.generators.openai import OpenAIContentGenerator
+from frameless.app.schemas.content import ContentCreate, ContentGenerate, ContentUpdate
+from frameless.app.services.content_service import ContentService
+from frameless.app.utils.cache import TTLCache
+from frameless.app.utils.singleflight import SingleFlight
+
+
+def dummy_content(**kwargs):
+    values = dict(title="dummy title", theme="adventure", content="dummy content",
+                  image_url_1="https://example.com/1.png",
+                  image_url_2="https://example.com/2.png",
+                  image_url_3="https://example.com/3.png",
+                  caption_1="caption 1", caption_2="caption 2", caption_3="caption 3",
+                  owner_id=1)
+    values.update(kwargs)
+    return ContentCreate(**values)
+
+
+@pytest.mark.asyncio
+async def test_create_and_list_content(async_db_session):
+    content_service = ContentService(async_db_session)
+    public = await content_service.create_content(dummy_content(is_public=True))
+    private = await content_service.create_content(dummy_content(theme="mystery"))
+    assert (await content_service.get_content_by_id(public.id)).title == "dummy title"
+    assert [c.id for c in await content_service.get_content()] == [public.id, private.id]
+    assert [c.id for c in await content_service.get_content(theme="mystery")] == [private.id]
+    assert [c.id for c in await content_service.get_content(is_public=True)] == [public.id]
+    assert [c.id for c in await content_service.get_content(skip=1, limit=1)] == [private.id]
+
+
+@pytest.mark.asyncio
+async def test_create_contents(async_db_session):
+    content_service = ContentService(async_db_session)
+    contents = await content_service.create_contents(
+        [dummy_content(title=f"title {i}") for i in range(3)])
+    assert [c.title for c in contents] == ["title 0", "title 1", "title 2"]
+    assert [c.id for c in await content_service.get_content()] == [c.id for c in contents]
+
+
+@pytest.mark.asyncio
+async def test_generate_content(async_db_session):
+    content_service = ContentService(async_db_session)
+    content = await content_service.generate_content(ContentGenerate(theme="adventure",
+                                                                     owner_id=1))
+    assert content.id is not None
+    assert content.theme == "adventure"
+    assert content.title == "Generated adventure Story"
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_content(async_db_session):
+    content_service = ContentService(async_db_session)
+    content = await content_service.create_content(dummy_content())
+    updated = await content_service.update_content(content.id, ContentUpdate(title="new"))
+    assert updated.title == "new"
+    assert await content_service.update_content(content.id + 1, ContentUpdate()) is None
+    assert await content_service.delete_content(content.id)
+    assert not await content_service.delete_content(content.id)
+
+
+@pytest.mark.asyncio
+async def test_generate_content_with_backend(async_db_session):
+    generator = OpenAIContentGenerator(api_url="http://fake/v1",
+                                       transport=httpx.ASGITransport(app=create_fake_app()))
+    content_service = ContentService(async_db_session, generator=generator,
+                                     cache=GenerationCache(TTLCache()))
+    content = await content_service.generate_content(ContentGenerate(theme="mystery",
+                                                                     owner_id=1))
+    await generator.aclose()
+    assert content.title == "Fake: Write a short title for a short story about mystery."
+    assert content.caption_2.startswith("Fake: Write a one sentence caption for illustration 2")
+
+
+@pytest.mark.asyncio
+async def test_generate_content_cached(async_db_session):
+    app = create_fake_app()
+    generator = OpenAIContentGenerator(api_url="http://fake/v1",
+                                       transport=httpx.ASGITransport(app=app))
+    cache = GenerationCache(TTLCache())
+    content_service = ContentService(async_db_session, generator=generator, cache=cache)
+    first = await content_service.generate_content(
+        ContentGenerate(theme="Space Pirates", prompt="A heist", owner_id=1))
+    second = await content_service.generate_content(
+        ContentGenerate(theme=" space  pirates", prompt="a heist ", owner_id=2))
+    # the equivalent request costs a new record, not new completions
+    assert app.state.requests == 5
+    assert second.id != first.id and second.owner_id == 2
+    assert second.title == first.title
+    await content_service.generate_content(
+        ContentGenerate(theme="space pirates", prompt="a heist", owner_id=1, use_cache=False))
+    await generator.aclose()
+    assert app.state.requests == 10
+    assert cache.stats() == dict(memory=dict(size=1, maxsize=1024, hits=1, misses=1),
+                                 disk=None, bypasses=1)
+
+
+@pytest.mark.asyncio
+async def test_generate_content_coalesced(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'frameless.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    app = create_fake_app(latency=0.05)
+    generator = OpenAIContentGenerator(api_url="http://fake/v1",
+                                       transport=httpx.ASGITransport(app=app))
+    flights = SingleFlight()
+
+    async def generate(owner_id):
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            content_service = ContentService(session, generator=generator,
+                                             cache=GenerationCache(TTLCache()), flights=flights)
+            return await content_service.generate_content(
+                ContentGenerate(theme="trending", owner_id=owner_id))
+
+    contents = await asyncio.gather(*(generate(owner_id) for owner_id in range(1, 6)))
+    await generator.aclose()
+    await engine.dispose()
+    # one generation, but a record for each request
+    assert app.state.requests == 5
+    assert len({c.id for c in contents}) == 5
+    assert {c.title for c in contents} == {contents[0].title}
+    assert flights.stats() == dict(calls=5, coalesced=4, in_flight=0)
+
+
+@pytest.mark.asyncio
+async def test_stream_content(async_db_session):
+    app = create_fake_app()
+    generator = OpenAIContentGenerator(api_url="http://fake/v1",
+                                       transport=httpx.ASGITransport(app=app))
+    content_service = ContentService(async_db_session, generator=generator,
+                                     cache=GenerationCache(TTLCache()))
+    request = ContentGenerate(theme="mystery", owner_id=1)
+    events = [event async for event in content_service.stream_content(request)]
+    names = [name for name, _ in events]
+    assert names.count("title") == 1 and names.count("caption") == 3
+    assert names.count("content") > 1
+    event, content = events[-1]
+    assert event == "done" and content.id is not None
+    assert content.content == "".join(data["content"] for name, data in events
+                                      if name == "content")
+    assert content.content == "Fake: Write a short story about mystery."
+
+    # the cached content is replayed, no more completions are requested
+    events = [event async for event in content_service.stream_content(request)]
+    await generator.aclose()
+    assert app.state.requests == 5
+    assert [name for name, _ in events] == ["title", "content"] + ["caption"] * 3 + ["done"]
+    assert events[-1][1].id != content.id and events[-1][1].title == content.title
+
+
+@pytest.mark.asyncio
+async def test_content_writes_round_trips(async_db_session, db_statements):
+    content_service = ContentService(async_db_session)
+    content = await content_service.create_content(dummy_content())
+    await content_service.generate_content(ContentGenerate(theme="adventure", owner_id=1,
+                                                           use_cache=False))
+    assert db_statements == ["INSERT", "INSERT"]
+    db_statements.clear()
+    updated = await content_service.update_content(content.id, ContentUpdate(title="new"))
+    assert db_statements == ["UPDATE"]
+    assert updated.title == "new" and updated.content == "dummy content"
+    db_statements.clear()
+    assert await content_service.delete_content(content.id)
+    assert not await content_service.delete_content(content.id)
+    assert db_statements == ["DELETE", "DELETE"]
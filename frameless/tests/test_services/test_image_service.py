@@ -0,0 +1,205 @@
+import hashlib
+import io
+import os
+import httpx
+import pytest
+from datetime import datetime
+from fastapi import UploadFile
+from frameless.app.db.models.image import Image, ImageBlob
+from frameless.app.schemas.image import ImageCreate
+from frameless.app.services.image_service import ImageService
+from frameless.app.utils.errors import (DirectUploadsNotSupportedError, StorageError,
+                                        UploadNotFoundError)
+from frameless.app.utils.pagination import next_cursor
+
+
+@pytest.mark.asyncio
+async def test_create_and_list_images(async_db_session):
+    image_service = ImageService(async_db_session)
+    public = await image_service.create_image(ImageCreate(url="https://example.com/1.png",
+                                                          is_public=True, owner_id=1))
+    private = await image_service.create_image(ImageCreate(url="https://example.com/2.png",
+                                                           owner_id=2))
+    assert (await image_service.get_image_by_id(public.id)).url == "https://example.com/1.png"
+    assert [i.id for i in await image_service.get_images()] == [public.id, private.id]
+    assert [i.id for i in await image_service.get_images(is_public=True)] == [public.id]
+    assert [i.id for i in await image_service.get_images(owner_id=2)] == [private.id]
+    assert await image_service.delete_image(public.id)
+    assert not await image_service.delete_image(public.id)
+
+
+@pytest.mark.asyncio
+async def test_upload_and_delete_image(async_db_session, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    image_service = ImageService(async_db_session)
+    upload = UploadFile(file=io.BytesIO(b"dummy image"), filename="dummy.png")
+    image = await image_service.upload_image(upload, description="dummy", owner_id=1)
+    assert image.url.startswith("/uploads/images/") and image.url.endswith(".png")
+    file_path = image.url[1:]
+    with open(file_path, "rb") as f:
+        assert f.read() == b"dummy image"
+    assert await image_service.delete_image(image.id)
+    assert not os.path.exists(file_path)
+
+
+@pytest.mark.asyncio
+async def test_get_images_with_cursor(async_db_session):
+    image_service = ImageService(async_db_session)
+    created_at = [datetime(2023, 1, 2), datetime(2023, 1, 1), datetime(2023, 1, 2)]
+    images = [Image(url=f"https://example.com/{i}.png", owner_id=1, created_at=c)
+              for i, c in enumerate(created_at)]
+    async_db_session.add_all(images)
+    await async_db_session.commit()
+    expected = [images[1].id, images[0].id, images[2].id]
+    first_page = await image_service.get_images(limit=2)
+    assert [i.id for i in first_page] == expected[:2]
+    cursor = next_cursor(first_page, 2, "created_at", "id")
+    assert [i.id for i in await image_service.get_images(limit=2, cursor=cursor)] == expected[2:]
+
+
+@pytest.mark.asyncio
+async def test_upload_image_deduplication(async_db_session, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    image_service = ImageService(async_db_session)
+    images = [await image_service.upload_image(UploadFile(file=io.BytesIO(data), filename=name),
+                                               owner_id=1)
+              for data, name in ((b"same", "a.png"), (b"same", "b.jpg"), (b"other", "c.png"))]
+    first, duplicate, other = images
+    sha256 = hashlib.sha256(b"same").hexdigest()
+    assert first.sha256 == duplicate.sha256 == sha256
+    assert first.url == duplicate.url == f"/uploads/images/{sha256[:2]}/{sha256}.png"
+    assert other.url != first.url
+    stored = [f for _, _, files in os.walk("uploads/images") for f in files]
+    assert sorted(stored) == sorted([os.path.basename(first.url), os.path.basename(other.url)])
+    blob = await async_db_session.get(ImageBlob, sha256)
+    assert blob.ref_count == 2 and blob.size == 4
+
+    assert await image_service.delete_image(first.id)
+    assert os.path.exists(duplicate.url[1:])
+    await async_db_session.refresh(blob)
+    assert blob.ref_count == 1
+    assert await image_service.delete_image(duplicate.id)
+    assert not os.path.exists(duplicate.url[1:])
+    assert await async_db_session.get(ImageBlob, sha256) is None
+    assert os.path.exists(other.url[1:])
+
+
+@pytest.mark.asyncio
+async def test_delete_image_file_before_commit(async_db_session, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    image_service = ImageService(async_db_session)
+    image = await image_service.upload_image(
+        UploadFile(file=io.BytesIO(b"dummy image"), filename="dummy.png"), owner_id=1)
+    image_id, sha256 = image.id, image.sha256
+
+    async def delete(paths):
+        # the blob row is still locked by the deleting transaction
+        assert async_db_session.in_transaction()
+        assert paths == [image.url[len("/uploads/images/"):]]
+        raise StorageError("unavailable")
+
+    monkeypatch.setattr(image_service.storage, "delete", delete)
+    with pytest.raises(StorageError):
+        await image_service.delete_image(image_id)
+    # a failed deletion is rolled back
+    await async_db_session.rollback()
+    assert await image_service.get_image_by_id(image_id) is not None
+    assert (await async_db_session.get(ImageBlob, sha256)).ref_count == 1
+    assert os.path.exists(f"uploads/images/{sha256[:2]}/{sha256}.png")
+
+
+@pytest.mark.asyncio
+async def test_upload_image_sanitizes_extension(async_db_session, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    image_service = ImageService(async_db_session)
+    for name, data in (("dummy.PNG", b"a"), ("x.png/../../evil", b"b"), ("x.p?hp", b"c"),
+                       ("noextension", b"d")):
+        image = await image_service.upload_image(
+            UploadFile(file=io.BytesIO(data), filename=name), owner_id=1)
+        sha256 = hashlib.sha256(data).hexdigest()
+        extension = "PNG" if name == "dummy.PNG" else "jpg"
+        assert image.url == f"/uploads/images/{sha256[:2]}/{sha256}.{extension}"
+
+
+@pytest.mark.asyncio
+async def test_upload_image_failed_commit_deletes_file(async_db_session, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    image_service = ImageService(async_db_session)
+    sha256 = hashlib.sha256(b"dummy image").hexdigest()
+
+    async def commit():
+        assert os.path.exists(f"uploads/images/{sha256[:2]}/{sha256}.png")
+        raise RuntimeError("commit failed")
+
+    monkeypatch.setattr(async_db_session, "commit", commit)
+    with pytest.raises(RuntimeError):
+        await image_service.upload_image(
+            UploadFile(file=io.BytesIO(b"dummy image"), filename="dummy.png"), owner_id=1)
+    assert not os.path.exists(f"uploads/images/{sha256[:2]}/{sha256}.png")
+    assert await async_db_session.get(ImageBlob, sha256) is None
+
+
+@pytest.mark.asyncio
+async def test_create_images(async_db_session):
+    image_service = ImageService(async_db_session)
+    images = await image_service.create_images(
+        [ImageCreate(url=f"https://example.com/{i}.png", owner_id=1) for i in range(3)])
+    assert [i.url for i in images] == [f"https://example.com/{i}.png" for i in range(3)]
+    assert [i.id for i in await image_service.get_images()] == [i.id for i in images]
+    assert images[0].created_at is not None and images[0].variants == []
+
+
+@pytest.mark.asyncio
+async def test_image_writes_round_trips(async_db_session, db_statements):
+    image_service = ImageService(async_db_session)
+    image = await image_service.create_image(ImageCreate(url="https://example.com/1.png",
+                                                         owner_id=1))
+    assert db_statements == ["INSERT"]
+    assert image.created_at is not None
+    db_statements.clear()
+    assert await image_service.delete_image(image.id)
+    assert db_statements == ["DELETE"]
+
+
+@pytest.mark.asyncio
+async def test_image_service_creates_no_directory(async_db_session, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    image_service = ImageService(async_db_session)
+    await image_service.get_images()
+    assert not os.path.exists("uploads")
+
+
+@pytest.mark.asyncio
+async def test_direct_upload(async_db_session, s3_storage):
+    image_service = ImageService(async_db_session)
+    data = b"direct image"
+    sha256 = hashlib.sha256(data).hexdigest()
+    with pytest.raises(UploadNotFoundError):
+        await image_service.complete_upload("a.png", sha256, owner_id=1)
+
+    path, url, headers = await image_service.create_upload("a.png", "image/png", len(data), sha256)
+    assert path == f"{sha256[:2]}/{sha256}.png"
+    async with httpx.AsyncClient(transport=s3_storage.transport) as client:
+        assert (await client.put(url, content=data, headers=headers)).status_code == 200
+    image = await image_service.complete_upload("a.png", sha256, owner_id=1)
+    assert image.url == f"http://s3.test/images/{path}"
+    assert (await async_db_session.get(ImageBlob, sha256)).size == len(data)
+    # the same content is not uploaded again
+    assert await image_service.create_upload("b.png", "image/png", len(data), sha256) == (
+        path, None, {})
+    duplicate = await image_service.complete_upload("b.png", sha256, owner_id=1)
+    assert duplicate.url == image.url
+    assert "X-Amz-Signature" in await image_service.get_download_url(image)
+
+    assert await image_service.delete_image(image.id)
+    assert await image_service.delete_image(duplicate.id)
+    assert s3_storage.transport.app.state.objects == {}
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_unsupported(async_db_session):
+    image_service = ImageService(async_db_session)
+    with pytest.raises(DirectUploadsNotSupportedError):
+        await image_service.create_upload("a.png", "image/png", 1, "0" * 64)
+    with pytest.raises(DirectUploadsNotSupportedError):
+        await image_service.complete_upload("a.png", "0" * 64, owner_id=1)
@@ -0,0 +1,84 @@
+import io
+import os
+import pytest
+from fastapi import BackgroundTasks, UploadFile
+from PIL import Image as PILImage
+from frameless.app.schemas.image import ImageVariantResponse
+from frameless.app.services.image_service import ImageService
+from frameless.app.services.image_variant_service import (
+    ImageVariantService, generate_image_variants, shutdown_image_process_pool)
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (width, height)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def image_process_pool():
+    yield
+    shutdown_image_process_pool()
+
+
+@pytest.mark.asyncio
+async def test_upload_schedules_variants(async_db_session, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    image_service = ImageService(async_db_session)
+    background_tasks = BackgroundTasks()
+    content = png(600, 400)
+    await image_service.upload_image(UploadFile(file=io.BytesIO(content), filename="a.png"),
+                                     background_tasks=background_tasks)
+    await image_service.upload_image(UploadFile(file=io.BytesIO(content), filename="b.png"),
+                                     background_tasks=background_tasks)
+    # the variants are generated once per stored file
+    assert len(background_tasks.tasks) == 1
+    assert background_tasks.tasks[0].func is generate_image_variants
+
+
+@pytest.mark.asyncio
+async def test_generate_and_delete_variants(async_db_session, tmp_path, monkeypatch,
+                                            image_process_pool):
+    monkeypatch.chdir(tmp_path)
+    image_service = ImageService(async_db_session)
+    image = await image_service.upload_image(
+        UploadFile(file=io.BytesIO(png(600, 400)), filename="a.png"))
+    variants = await ImageVariantService(async_db_session).generate_variants(image.sha256)
+    assert sorted((v.width, v.height, v.format) for v in variants) == [
+        (128, 85, "jpeg"), (128, 85, "webp"), (512, 341, "jpeg"), (512, 341, "webp")]
+    variant_files = [os.path.join("uploads/images", v.path) for v in variants]
+    assert all(os.path.exists(f) for f in variant_files)
+
+    # the request session of a later read starts afresh
+    image_id = image.id
+    async_db_session.expire_all()
+    image = await image_service.get_image_by_id(image_id)
+    assert [v.width for v in image.variants] == [128, 128, 512, 512]
+    url = ImageVariantResponse.from_orm(image.variants[0]).url
+    assert url.startswith("/uploads/images/")
+
+    # the variants are deleted with the last image referencing the file
+    assert await image_service.delete_image(image.id)
+    assert not any(os.path.exists(f) for f in variant_files)
+
+
+@pytest.mark.asyncio
+async def test_generate_variants_of_invalid_image(async_db_session, tmp_path, monkeypatch,
+                                                  image_process_pool):
+    monkeypatch.chdir(tmp_path)
+    image = await ImageService(async_db_session).upload_image(
+        UploadFile(file=io.BytesIO(b"not an image"), filename="a.png"))
+    assert await ImageVariantService(async_db_session).generate_variants(image.sha256) == []
+
+
+@pytest.mark.asyncio
+async def test_generate_variants_in_s3(async_db_session, s3_storage, image_process_pool):
+    image = await ImageService(async_db_session).upload_image(
+        UploadFile(file=io.BytesIO(png(600, 400)), filename="a.png"))
+    variants = await ImageVariantService(async_db_session).generate_variants(image.sha256)
+    assert len(variants) == 4
+    objects = s3_storage.transport.app.state.objects
+    paths = [f"{image.sha256[:2]}/{image.sha256}.png"] + [v.path for v in variants]
+    assert sorted(objects) == sorted(f"images/{path}" for path in paths)
+    url = ImageVariantResponse.from_orm(variants[0]).url
+    assert url.startswith("http://s3.test/images/")
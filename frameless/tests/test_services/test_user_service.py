@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from frameless.app.schemas.user import UserCreate, UserUpdate
+from frameless.app.services.user_service import UserService
+
+
+@pytest.mark.asyncio
+async def test_create_and_get_user(async_db_session):
+    user_service = UserService(async_db_session)
+    user = await user_service.create_user(UserCreate(username="dummy",
+                                                     email="dummy@example.com",
+                                                     password="dummy_password"))
+    assert user.id is not None
+    assert user.hashed_password != "dummy_password"
+    assert (await user_service.get_user_by_id(user.id)).username == "dummy"
+    assert (await user_service.get_user_by_email("dummy@example.com")).id == user.id
+    assert (await user_service.get_user_by_username("dummy")).id == user.id
+    assert [u.id for u in await user_service.get_users()] == [user.id]
+    assert await user_service.verify_password("dummy_password", user.hashed_password)
+    assert not await user_service.verify_password("wrong_password", user.hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_user(async_db_session):
+    user_service = UserService(async_db_session)
+    user = await user_service.create_user(UserCreate(username="dummy",
+                                                     email="dummy@example.com",
+                                                     password="dummy_password"))
+    updated = await user_service.update_user(user.id, UserUpdate(username="renamed"))
+    assert updated.username == "renamed"
+    assert await user_service.update_user(user.id + 1, UserUpdate(username="x" * 3)) is None
+    assert await user_service.delete_user(user.id)
+    assert not await user_service.delete_user(user.id)
+    assert await user_service.get_user_by_id(user.id) is None
+
+
+@pytest.mark.asyncio
+async def test_create_users(async_db_session):
+    user_service = UserService(async_db_session)
+    users = await user_service.create_users(
+        [UserCreate(username=f"dummy{i}", email=f"dummy{i}@example.com",
+                    password=f"dummy_password{i}") for i in range(3)])
+    assert [u.username for u in users] == ["dummy0", "dummy1", "dummy2"]
+    assert [u.id for u in await user_service.get_users()] == [u.id for u in users]
+    assert await user_service.verify_password("dummy_password2", users[2].hashed_password)
+
+    # a taken username fails the whole batch
+    with pytest.raises(IntegrityError):
+        await user_service.create_users(
+            [UserCreate(username="dummy3", email="dummy3@example.com", password="password3"),
+             UserCreate(username="dummy0", email="other@example.com", password="password4")])
+    assert len(await user_service.get_users()) == 3
+
+
+@pytest.mark.asyncio
+async def test_user_writes_round_trips(async_db_session, db_statements):
+    user_service = UserService(async_db_session)
+    user = await user_service.create_user(UserCreate(username="dummy",
+                                                     email="dummy@example.com",
+                                                     password="dummy_password"))
+    assert db_statements == ["INSERT"]
+    db_statements.clear()
+    updated = await user_service.update_user(user.id, UserUpdate(username="renamed"))
+    assert db_statements == ["UPDATE"]
+    assert updated.username == "renamed" and updated.email == "dummy@example.com"
+    db_statements.clear()
+    assert await user_service.delete_user(user.id)
+    # the images and contents of the user lose their owner by their foreign keys
+    assert db_statements == ["DELETE"]
+    db_statements.clear()
+    assert not await user_service.delete_user(user.id)
+    assert db_statements == ["DELETE"]
@@ -0,0 +1,45 @@
+import json
+import subprocess  # nosec
+import sys
+from pathlib import Path
+
+# upper bounds of a cold start, a worker started by the autoscaler pays both
+IMPORT_BUDGET_SECONDS = 5.0
+FIRST_REQUEST_BUDGET_SECONDS = 5.0
+
+# measured in a fresh interpreter, the modules imported by the test session
+# would hide the cost of the imports
+STARTUP_SCRIPT = """
+import json, time
+from fastapi.testclient import TestClient
+start = time.perf_counter()
+from frameless.app.application import create_application
+imported = time.perf_counter()
+from frameless.app.configs import get_settings
+from frameless.app.db.session import get_async_engine, get_engine
+created_on_import = [f.__name__ for f in (get_settings, get_engine, get_async_engine)
+                     if f.cache_info().currsize]
+app = create_application()
+with TestClient(app) as client:
+    status_code = client.get("/api/v1/version").status_code
+first_request = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_request": first_request - imported,
+                  "created_on_import": created_on_import, "status_code": status_code}))
+"""
+
+
+def run_startup() -> dict:
+    output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT],  # nosec
+                            cwd=Path(__file__).resolve().parents[1],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_startup_time(record_property):
+    startup = run_startup()
+    record_property("import_seconds", startup["import"])
+    record_property("first_request_seconds", startup["first_request"])
+    assert startup["status_code"] == 200
+    assert startup["created_on_import"] == []
+    assert startup["import"] < IMPORT_BUDGET_SECONDS
+    assert startup["first_request"] < FIRST_REQUEST_BUDGET_SECONDS
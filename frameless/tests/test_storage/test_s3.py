@@ -0,0 +1,68 @@
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+import httpx
+import pytest
+from fake_s3_server import FAKE_ACCESS_KEY, create_fake_app
+from frameless.app.storage.s3 import S3Storage, presign
+from frameless.app.utils.errors import StorageError
+
+
+@pytest.mark.asyncio
+async def test_store_and_delete(s3_storage, tmp_path):
+    objects = s3_storage.transport.app.state.objects
+    local_path = tmp_path / "a.png"
+    local_path.write_bytes(b"image")
+    await s3_storage.store(str(local_path), "ab/a.png")
+    assert not local_path.exists()
+    assert objects["images/ab/a.png"] == (b"image", "image/png")
+    assert await s3_storage.size("ab/a.png") == 5
+    assert await s3_storage.size("ab/missing.png") is None
+
+    async with s3_storage.local_copy("ab/a.png") as copy_path:
+        with open(copy_path, "rb") as f:
+            assert f.read() == b"image"
+    assert not os.path.exists(copy_path)
+
+    await s3_storage.delete(["ab/a.png", "ab/missing.png"])
+    assert objects == {}
+    await s3_storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_direct_upload(s3_storage):
+    data = b"uploaded by the client"
+    sha256 = hashlib.sha256(data).hexdigest()
+    url, headers = s3_storage.upload_request("ab/b.png", "image/png", len(data), sha256)
+    assert s3_storage.url("ab/b.png") == "http://s3.test/images/ab/b.png"
+    async with httpx.AsyncClient(transport=s3_storage.transport) as client:
+        # the signed headers and the checksum must match
+        response = await client.put(url, content=data, headers={**headers, "Content-Type": "a/b"})
+        assert response.status_code == 403
+        response = await client.put(url, content=data[::-1], headers=headers)
+        assert response.status_code == 400
+        response = await client.put(url, content=data, headers=headers)
+        assert response.status_code == 200
+        response = await client.get(s3_storage.download_url("ab/b.png"))
+        assert response.content == data
+        # the URL of a public file is not signed
+        response = await client.get(s3_storage.url("ab/b.png"))
+        assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_expired_and_wrong_key():
+    transport = httpx.ASGITransport(app=create_fake_app())
+    url = "http://s3.test/images/a.png"
+    expired = presign("GET", url, FAKE_ACCESS_KEY, "fake-secret-key", "us-east-1", 60,
+                      now=datetime.now(timezone.utc) - timedelta(minutes=2))
+    wrong_key = presign("GET", url, FAKE_ACCESS_KEY, "wrong-secret-key", "us-east-1", 60)
+    async with httpx.AsyncClient(transport=transport) as client:
+        assert (await client.get(expired)).status_code == 403
+        assert (await client.get(wrong_key)).status_code == 403
+
+    storage = S3Storage("http://s3.test/images", FAKE_ACCESS_KEY, "wrong-secret-key",
+                        transport=transport)
+    with pytest.raises(StorageError):
+        await storage.size("a.png")
+    await storage.aclose()
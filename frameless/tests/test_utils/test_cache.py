@@ -0,0 +1,120 @@
+import sqlite3
+import pytest
+from frameless.app.utils.cache import SQLiteCache, TTLCache
+
+
+class DummyTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_and_set():
+    cache = TTLCache(maxsize=2, ttl=10)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert "a" in cache and "b" not in cache
+    assert cache.stats() == dict(size=1, maxsize=2, hits=1, misses=1)
+
+
+def test_expiration():
+    timer = DummyTimer()
+    cache = TTLCache(ttl=10, timer=timer)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=20)
+    cache.set("c", 3, ttl=0)
+    timer.now = 10
+    assert cache.get("a", "expired") == "expired"
+    assert cache.get("b") == 2
+    assert cache.get("c") is None
+    assert len(cache) == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_invalidate_tag():
+    cache = TTLCache()
+    cache.set("a", 1, tags=("user:1",))
+    cache.set("b", 2, tags=("user:1", "user:2"))
+    cache.set("c", 3, tags=("user:2",))
+    assert cache.invalidate_tag("user:1") == 2
+    assert cache.invalidate_tag("user:1") == 0
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") == 3
+    cache.set("c", 4)
+    assert cache.invalidate_tag("user:2") == 0
+    cache.clear()
+    assert cache.stats() == dict(size=0, maxsize=1024, hits=0, misses=0)
+
+
+def test_sqlite_cache(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("frameless.app.utils.cache.time.time", lambda: now[0])
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=2, ttl=10, touch_interval=0,
+                        evict_interval=1)
+    cache.set("a", {"title": "a"})
+    cache.set("b", [1, 2])
+    now[0] += 1
+    assert cache.get("a") == {"title": "a"}
+    now[0] += 1
+    # b is the least recently used entry
+    cache.set("c", "c")
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    now[0] += 10
+    assert cache.get("a", "expired") == "expired"
+    assert cache.stats() == dict(size=2, maxsize=2, hits=1, misses=2, skipped_writes=0)
+    cache.clear()
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_sqlite_cache_batches_writes(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("frameless.app.utils.cache.time.time", lambda: now[0])
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=2, ttl=10, touch_interval=5,
+                        evict_interval=3)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    cache.set("a", "a")
+    cache.set("b", "b")
+    assert len(statements) == 2
+    now[0] += 1
+    # a hit within the touch interval does not write
+    assert cache.get("a") == "a"
+    assert [s for s in statements if s.startswith("UPDATE")] == []
+    now[0] += 5
+    assert cache.get("a") == "a"
+    assert [s for s in statements if s.startswith("UPDATE")] != []
+    # the third write evicts b, the least recently used entry
+    cache.set("c", "c")
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    cache.close()
+
+
+def test_sqlite_cache_locked(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), touch_interval=0, timeout=0)
+    cache.set("a", "a")
+    other = sqlite3.connect(str(tmp_path / "cache.db"), isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    # the writes are skipped while another worker holds the lock, the reads go on
+    cache.set("b", "b")
+    assert cache.get("a") == "a"
+    other.execute("ROLLBACK")
+    other.close()
+    assert cache.get("b") is None
+    assert cache.stats()["skipped_writes"] == 2
+    cache.close()
@@ -0,0 +1,31 @@
+import asyncio
+import time
+import pytest
+from frameless.app.utils.hashing import PasswordHasher, get_password_hasher
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("executor_type", ["thread", "process"])
+async def test_hash_and_verify(executor_type):
+    hasher = PasswordHasher(executor_type=executor_type, workers=1)
+    hashed_password = await hasher.hash("dummy_password")
+    assert hashed_password != "dummy_password"
+    assert await hasher.verify("dummy_password", hashed_password)
+    assert not await hasher.verify("wrong_password", hashed_password)
+    assert hasher.stats() == dict(in_flight=0, queued=0, max_queue_depth=0, completed=3)
+    hasher.shutdown()
+    assert hasher._executor is None
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency():
+    hasher = PasswordHasher(workers=4, max_concurrency=1)
+    await asyncio.gather(*(hasher._run(time.sleep, 0.01) for _ in range(3)))
+    assert hasher.stats() == dict(in_flight=0, queued=0, max_queue_depth=2, completed=3)
+    hasher.shutdown()
+
+
+def test_get_password_hasher():
+    hasher = get_password_hasher()
+    assert hasher is get_password_hasher()
+    assert hasher.executor_type == "thread"
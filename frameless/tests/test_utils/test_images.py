@@ -0,0 +1,17 @@
+from PIL import Image as PILImage
+from frameless.app.utils.images import generate_variants
+
+
+def test_generate_variants(tmp_path):
+    source = tmp_path / "original.png"
+    PILImage.new("RGBA", (600, 300), (255, 0, 0, 128)).save(source)
+    variants = generate_variants(str(source), str(tmp_path), "original",
+                                 widths=[1024, 128, 512], formats=["webp", "jpeg"])
+    # the 1024 width is skipped, the image is never upscaled
+    assert [v[:3] for v in variants] == [(128, 64, "webp"), (128, 64, "jpeg"),
+                                         (512, 256, "webp"), (512, 256, "jpeg")]
+    with PILImage.open(tmp_path / "original_128.jpeg") as variant:
+        assert variant.format == "JPEG" and variant.mode == "RGB"
+        assert variant.size == (128, 64)
+    with PILImage.open(tmp_path / "original_512.webp") as variant:
+        assert variant.format == "WEBP"
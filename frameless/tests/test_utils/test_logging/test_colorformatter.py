@@ -1,3 +1,4 @@
+import copy
 import pytest
 import unittest.mock as mock
 import click
@@ -77,4 +78,23 @@ class TestColorFormatter:
                   f'%(message)s    (%(filename)s:%(lineno)d)'
         mocked_formatter.assert_called_with(log_fmt)
         mocked_formatter.return_value.format.assert_called_with(record)
-        assert output == "dummy return"
\ No newline at end of file
+        assert output == "dummy return"
+
+    def test_formatters_cached(self):
+        formatter = ColorFormatter()
+        records = [logging.LogRecord("dummy_logger", level, __file__, 1, request_msg_format,
+                                     ("0.0.0.0", 80, "GET /dummy/path HTTP/1.1", "200 OK", 0.32),
+                                     None)
+                   for level in (logging.INFO, logging.INFO, logging.ERROR)]
+        with mock.patch("frameless.app.utils.logging.logging.Formatter",
+                        wraps=logging.Formatter) as mocked_formatter:
+            messages = [formatter.format(copy.copy(record)) for record in records]
+        # one formatter per level
+        assert mocked_formatter.call_count == 2
+        assert '"\x1b[1mGET /dummy/path HTTP/1.1\x1b[0m" \x1b[32m200 OK\x1b[0m' in messages[0]
+        assert "[\x1b[31mERROR\x1b[0m]" in messages[2]
+        # the known levels and status classes are not styled again
+        with mock.patch("frameless.app.utils.logging.click.style",
+                        side_effect=click.style) as mocked_click_style:
+            assert [formatter.format(copy.copy(record)) for record in records] == messages
+        mocked_click_style.assert_not_called()
@@ -1,7 +1,6 @@
 import pytest
 import unittest.mock as mock
 import click
-from fastapi import Request, Response
 from frameless.app.utils.logging import status_code_colors, get_request_msg_args
 
 
@@ -30,15 +29,16 @@ def test_status_code_colours(mocked_click_style, key, color, expected_output):
 def test_get_request_msg_args(response_status_code, expected_status):
     expected_result_format = '0.0.0.0:80 - "\x1b[1mGET /dummy/path ' \
                              'HTTP/1.1\x1b[0m" {} - 0.32ms'
-    request = mock.MagicMock(spec=Request,
-                             method="GET",
-                             url=mock.MagicMock(path="/dummy/path"),
-                             scope=dict(http_version="1.1"),
-                             client=mock.MagicMock(host="0.0.0.0", port=80))
-    response = mock.MagicMock(spec=Response, status_code=response_status_code)
-    host, port, method_path, status, process_time = get_request_msg_args(request, response, 0.32)
+    scope = dict(method="GET", path="/dummy/path", http_version="1.1", client=("0.0.0.0", 80))
+    host, port, method_path, status, process_time = get_request_msg_args(
+        scope, response_status_code, 0.32)
     assert host == "0.0.0.0"
     assert port == 80
     assert method_path == "GET /dummy/path HTTP/1.1"
     assert status == expected_status
-    assert process_time == 0.32
\ No newline at end of file
+    assert process_time == 0.32
+
+
+def test_get_request_msg_args_without_client():
+    scope = dict(method="GET", path="/", http_version="1.1", client=None)
+    assert get_request_msg_args(scope, 200, 0.32)[:2] == ("-", 0)
@@ -0,0 +1,70 @@
+import io
+import logging
+import threading
+import unittest.mock as mock
+from frameless.app.application import create_application
+from frameless.app.configs import Settings
+from frameless.app.utils.logging import QueueStreamHandler
+
+
+class BlockingStream(io.StringIO):
+    """Stream blocking its writes until released, counting them."""
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+        self.writes = 0
+
+    def write(self, s):
+        self.released.wait()
+        self.writes += 1
+        return super().write(s)
+
+
+def queued_logger(handler):
+    logger = logging.getLogger(f"test_queue_{id(handler)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return logger
+
+
+def test_write_in_order():
+    stream = io.StringIO()
+    handler = QueueStreamHandler(stream, maxsize=100, batch_size=10)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    logger = queued_logger(handler)
+    for i in range(25):
+        logger.info("record %d", i)
+    handler.close()
+    assert stream.getvalue().splitlines() == [f"INFO record {i}" for i in range(25)]
+    assert handler.stats() == dict(queued=0, written=25, dropped=0)
+
+
+def test_drop_on_overflow_and_batch():
+    stream = BlockingStream()
+    handler = QueueStreamHandler(stream, maxsize=10, batch_size=100)
+    logger = queued_logger(handler)
+    # the stream blocks, the logging calls do not
+    for i in range(50):
+        logger.info("record %d", i)
+    assert handler.dropped >= 30
+    stream.released.set()
+    handler.close()
+    lines = stream.getvalue().splitlines()
+    assert f"QueueStreamHandler dropped {handler.dropped} log records, the queue was full" in lines
+    assert len(lines) == 50 - handler.dropped + 1
+    # the queued records are written at once
+    assert stream.writes <= 3
+
+
+@mock.patch("frameless.app.application.get_settings")
+def test_create_application_with_log_queue(mocked_get_settings):
+    mocked_get_settings.return_value = Settings(LOG_QUEUE_ENABLED=True, LOG_QUEUE_SIZE=5)
+    create_application()
+    handlers = logging.getLogger("frameless").handlers
+    assert [type(h) for h in handlers] == [QueueStreamHandler]
+    assert handlers[0].queue.maxsize == 5
+    mocked_get_settings.return_value = Settings()
+    create_application()
+    assert [type(h) for h in logging.getLogger("frameless").handlers] == [logging.StreamHandler]
@@ -0,0 +1,48 @@
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Integer, select
+from frameless.app.db import Base
+from frameless.app.utils.errors import InvalidCursorError
+from frameless.app.utils.pagination import decode_cursor, encode_cursor, next_cursor, paginate
+
+
+class DummyPage(Base):
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime)
+
+
+@pytest.mark.parametrize("values", [(1,), (datetime(2023, 1, 1, 12, 30), 7),
+                                    (datetime(2023, 1, 1, tzinfo=timezone.utc), 7)])
+def test_encode_decode_cursor(values):
+    cursor = encode_cursor(*values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == values
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "e30", "W3siZHQiOiJ4In1d"])
+def test_decode_cursor_fail(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_paginate():
+    columns = (DummyPage.created_at, DummyPage.id)
+    query = paginate(select(DummyPage), columns, limit=10, skip=20)
+    assert "ORDER BY dummypage.created_at, dummypage.id" in str(query)
+    assert "OFFSET" in str(query)
+    query = paginate(select(DummyPage), columns, limit=10, skip=20,
+                     cursor=encode_cursor(datetime(2023, 1, 1), 7))
+    assert "(dummypage.created_at, dummypage.id) > (" in str(query)
+    assert "OFFSET" not in str(query)
+    query = paginate(select(DummyPage), (DummyPage.id,), limit=10, cursor=encode_cursor(7))
+    assert "dummypage.id > " in str(query)
+    with pytest.raises(InvalidCursorError):
+        paginate(select(DummyPage), columns, limit=10, cursor=encode_cursor(7))
+
+
+def test_next_cursor():
+    rows = [DummyPage(id=1, created_at=datetime(2023, 1, 1)),
+            DummyPage(id=2, created_at=datetime(2023, 1, 2))]
+    assert next_cursor(rows, 3, "created_at", "id") is None
+    assert next_cursor([], 0, "id") is None
+    assert decode_cursor(next_cursor(rows, 2, "created_at", "id")) == (datetime(2023, 1, 2), 2)
@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+from frameless.app.utils.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_coalesce_calls():
+    flights, calls = SingleFlight(), []
+
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    results = await asyncio.gather(*(flights.do(key, lambda key=key: fetch(key))
+                                     for key in ["a", "a", "b", "a"]))
+    assert results == ["A", "A", "B", "A"]
+    assert calls == ["a", "b"]
+    assert flights.stats() == dict(calls=4, coalesced=2, in_flight=0)
+    # a later call starts a new flight
+    assert await flights.do("a", lambda: fetch("a")) == "A"
+    assert calls == ["a", "b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_share_exception_and_survive_cancellation():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    first = asyncio.ensure_future(flights.do("a", fail))
+    second = asyncio.ensure_future(flights.do("a", fail))
+    await asyncio.sleep(0)
+    # the cancelled caller does not cancel the call for the other one
+    first.cancel()
+    with pytest.raises(ValueError):
+        await second
+    assert first.cancelled()
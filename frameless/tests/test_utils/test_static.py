@@ -0,0 +1,95 @@
+import gzip
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from frameless.app.utils.static import MediaFiles, precompress
+
+FINGERPRINTED = "0f343b0931126a20f133d67c2b018a3b.png"
+
+
+@pytest.fixture
+def media_dir(tmp_path):
+    (tmp_path / FINGERPRINTED).write_bytes(bytes(range(256)) * 4)
+    (tmp_path / "index.html").write_text("<html>" + "frameless " * 500 + "</html>")
+    return tmp_path
+
+
+@pytest.fixture
+def media_client(media_dir):
+    app = FastAPI()
+    app.mount("/media", MediaFiles(directory=media_dir))
+    return TestClient(app)
+
+
+def test_cache_control(media_client):
+    response = media_client.get(f"/media/{FINGERPRINTED}")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["accept-ranges"] == "bytes"
+    response = media_client.get("/media/index.html")
+    assert response.headers["cache-control"] == "no-cache"
+    response = media_client.get("/media/index.html",
+                                headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+
+def test_cache_control_private(media_dir):
+    app = FastAPI()
+    app.mount("/media", MediaFiles(directory=media_dir, public=False))
+    media_client = TestClient(app)
+    response = media_client.get(f"/media/{FINGERPRINTED}")
+    assert response.headers["cache-control"] == "private, max-age=31536000, immutable"
+    response = media_client.get("/media/index.html")
+    assert response.headers["cache-control"] == "no-cache"
+
+
+def test_range(media_client):
+    data = bytes(range(256)) * 4
+    response = media_client.get(f"/media/{FINGERPRINTED}", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+    assert response.content == data[10:20]
+    response = media_client.get(f"/media/{FINGERPRINTED}", headers={"Range": "bytes=-4"})
+    assert response.content == data[-4:]
+    response = media_client.get(f"/media/{FINGERPRINTED}", headers={"Range": "bytes=2000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+    # a stale If-Range gets the whole file
+    response = media_client.get(f"/media/{FINGERPRINTED}",
+                                headers={"Range": "bytes=10-19", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == data
+
+
+def test_precompressed_variant(media_dir, media_client):
+    written = precompress(str(media_dir))
+    assert str(media_dir / "index.html.gz") in written
+    assert str(media_dir / f"{FINGERPRINTED}.gz") not in written
+    html = (media_dir / "index.html").read_bytes()
+    assert gzip.decompress((media_dir / "index.html.gz").read_bytes()) == html
+
+    response = media_client.get("/media/index.html", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"].startswith("text/html")
+    assert response.content == html
+    response = media_client.get("/media/index.html", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.content == html
+
+
+def test_stale_variant_not_served(media_dir, media_client):
+    precompress(str(media_dir))
+    stat = os.stat(media_dir / "index.html")
+    for suffix in (".gz", ".br"):
+        if os.path.exists(media_dir / f"index.html{suffix}"):
+            os.utime(media_dir / f"index.html{suffix}", (stat.st_atime, stat.st_mtime - 10))
+    response = media_client.get("/media/index.html", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in response.headers
+
+
+def test_missing_upload_directory(tmp_path):
+    app = FastAPI()
+    app.mount("/uploads", MediaFiles(directory=tmp_path / "missing", check_dir=False))
+    assert TestClient(app).get("/uploads/image.png").status_code == 404
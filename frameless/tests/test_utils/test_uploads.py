@@ -0,0 +1,41 @@
+import hashlib
+import io
+import os
+import pytest
+from fastapi import UploadFile
+from frameless.app.utils.errors import UploadTooLargeError
+from frameless.app.utils.uploads import save_upload
+
+
+class ChunkRecorder(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.read_sizes = []
+
+    def read(self, size=-1):
+        self.read_sizes.append(size)
+        return super().read(size)
+
+
+@pytest.mark.asyncio
+async def test_save_upload(tmp_path):
+    data = os.urandom(10_000)
+    file = ChunkRecorder(data)
+    path = str(tmp_path / "dummy.png")
+    size, digest = await save_upload(UploadFile(file=file, filename="dummy.png"), path,
+                                     chunk_size=4096)
+    assert size == 10_000
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert set(file.read_sizes) == {4096}
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert os.listdir(tmp_path) == ["dummy.png"]
+
+
+@pytest.mark.asyncio
+async def test_save_upload_too_large(tmp_path):
+    path = str(tmp_path / "dummy.png")
+    upload = UploadFile(file=io.BytesIO(b"x" * 10_000), filename="dummy.png")
+    with pytest.raises(UploadTooLargeError):
+        await save_upload(upload, path, chunk_size=4096, max_size=5000)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,87 @@
+import asyncio
+import socket
+import httpx
+import pytest
+import pytest_asyncio
+from pydantic import ValidationError
+from frameless.app.schemas.content import ContentJobCreate
+from frameless.app.utils.errors import UnsafeURLError
+from frameless.app.utils.urls import (PublicAddressTransport, check_public_host, is_public_address,
+                                      resolve_public_url)
+
+
+@pytest.mark.parametrize("address, public", [
+    ("93.184.216.34", True),
+    ("2606:2800:220:1:248:1893:25c8:1946", True),
+    ("127.0.0.1", False),
+    ("169.254.169.254", False),
+    ("10.1.2.3", False),
+    ("192.168.0.1", False),
+    ("0.0.0.0", False),
+    ("::1", False),
+    ("fd00::1", False),
+    ("::ffff:127.0.0.1", False),
+])
+def test_is_public_address(address, public):
+    assert is_public_address(address) is public
+
+
+@pytest.mark.parametrize("host", ["localhost", "api.localhost", "127.0.0.1", "[::1]",
+                                  "169.254.169.254"])
+def test_check_public_host(host):
+    with pytest.raises(UnsafeURLError):
+        check_public_host(host)
+
+
+def test_check_public_host_name():
+    # host names are only checked once resolved
+    assert check_public_host("example.com") is None
+
+
+@pytest.mark.parametrize("webhook_url", ["http://localhost:8000/hook", "http://10.0.0.2/hook",
+                                         "http://169.254.169.254/latest/meta-data",
+                                         "ftp://example.com/hook"])
+def test_job_webhook_url_refused(webhook_url):
+    with pytest.raises(ValidationError):
+        ContentJobCreate(theme="adventure", owner_id=1, webhook_url=webhook_url)
+
+
+@pytest_asyncio.fixture
+async def fake_dns(monkeypatch):
+    addresses = {"public.test": "93.184.216.34", "internal.test": "10.0.0.2"}
+
+    async def getaddrinfo(host, port, **kwargs):
+        if host not in addresses:
+            raise socket.gaierror(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (addresses[host], port))]
+
+    monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo)
+    return addresses
+
+
+@pytest.mark.asyncio
+async def test_resolve_public_url(fake_dns):
+    assert await resolve_public_url("https://public.test/hook") == ["93.184.216.34"]
+    for url in ("https://internal.test/hook", "https://unknown.test/hook", "file:///etc/passwd"):
+        with pytest.raises(UnsafeURLError):
+            await resolve_public_url(url)
+
+
+@pytest.mark.asyncio
+async def test_public_address_transport(fake_dns):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(204)
+
+    transport = PublicAddressTransport(httpx.MockTransport(handler))
+    async with httpx.AsyncClient(transport=transport) as client:
+        assert (await client.post("https://public.test:8443/hook")).status_code == 204
+        with pytest.raises(UnsafeURLError):
+            await client.post("https://internal.test/hook")
+    # the request goes to the checked address, as sent to the host name
+    request, = requests
+    assert str(request.url) == "https://93.184.216.34:8443/hook"
+    assert request.headers["Host"] == "public.test:8443"
+    assert request.extensions["sni_hostname"] == "public.test"